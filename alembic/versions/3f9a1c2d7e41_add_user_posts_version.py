@@ -0,0 +1,26 @@
+"""add user posts version
+
+Revision ID: 3f9a1c2d7e41
+Revises: ce1acc8171fc
+Create Date: 2026-10-19 09:12:03.418230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2d7e41'
+down_revision = 'ce1acc8171fc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('posts_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('posts_version')
@@ -0,0 +1,33 @@
+"""add idempotency keys
+
+Revision ID: 7d3b9e1f4a62
+Revises: c5a0d7e3f418
+Create Date: 2026-10-19 21:14:52.208631
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3b9e1f4a62'
+down_revision = 'c5a0d7e3f418'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('idempotency_keys',
+    sa.Column('key', sa.BINARY(length=16), nullable=False),
+    sa.Column('fingerprint', sa.BINARY(length=16), nullable=False),
+    sa.Column('response', sa.LargeBinary(), nullable=True),
+    sa.Column('locked_until', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_idempotency_keys_expires_at'), 'idempotency_keys', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_idempotency_keys_expires_at'), table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
@@ -0,0 +1,27 @@
+"""add posts fulltext index
+
+Revision ID: 8b2e5d0a6c13
+Revises: 3f9a1c2d7e41
+Create Date: 2026-10-19 10:41:27.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e5d0a6c13'
+down_revision = '3f9a1c2d7e41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Other databases use the application's in-process search index instead
+    if op.get_context().dialect.name == 'mysql':
+        op.create_index('ix_posts_text_fulltext', 'posts', ['text'], unique=False, mysql_prefix='FULLTEXT')
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name == 'mysql':
+        op.drop_index('ix_posts_text_fulltext', table_name='posts')
@@ -0,0 +1,26 @@
+"""add users last write at
+
+Revision ID: 9e2a6c4f1d73
+Revises: 7d3b9e1f4a62
+Create Date: 2026-10-19 22:03:17.640284
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e2a6c4f1d73'
+down_revision = '7d3b9e1f4a62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('last_write_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('last_write_at')
@@ -0,0 +1,54 @@
+"""add posts archive
+
+Revision ID: a4d7e2c9b150
+Revises: f2c6a9d83b17
+Create Date: 2026-10-19 18:32:10.418266
+
+"""
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d7e2c9b150'
+down_revision = 'f2c6a9d83b17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('posts_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('text_bytes', sa.Integer(), nullable=False),
+    sa.Column('compressed', sa.Boolean(), server_default='0', nullable=False),
+    sa.Column('body', sa.LargeBinary(length=16777215), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_posts_archive_user_id_created_at', 'posts_archive', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    # Move archived posts back into the posts table
+    connection = op.get_bind()
+    archive = sa.table('posts_archive', sa.column('id'), sa.column('user_id'), sa.column('created_at'),
+                       sa.column('compressed'), sa.column('body'))
+    posts = sa.table('posts', sa.column('id'), sa.column('text'), sa.column('user_id'), sa.column('created_at'))
+    rows = [
+        {
+            'id': row.id,
+            'text': (zlib.decompress(row.body) if row.compressed else row.body).decode('utf-8'),
+            'user_id': row.user_id,
+            'created_at': row.created_at,
+        }
+        for row in connection.execute(sa.select(archive))
+    ]
+    if rows:
+        connection.execute(posts.insert(), rows)
+
+    op.drop_index('ix_posts_archive_user_id_created_at', table_name='posts_archive')
+    op.drop_table('posts_archive')
@@ -0,0 +1,38 @@
+"""add post changes
+
+Revision ID: b81e4f6a9d27
+Revises: a4d7e2c9b150
+Create Date: 2026-10-19 19:54:37.120943
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b81e4f6a9d27'
+down_revision = 'a4d7e2c9b150'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('post_changes',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('version', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('deleted', sa.Boolean(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('user_id', 'version')
+    )
+    op.create_index('ix_post_changes_created_at', 'post_changes', ['created_at'], unique=False)
+
+    with op.batch_alter_table('user_post_stats') as batch_op:
+        batch_op.add_column(sa.Column('changes_compacted_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('user_post_stats') as batch_op:
+        batch_op.drop_column('changes_compacted_version')
+    op.drop_index('ix_post_changes_created_at', table_name='post_changes')
+    op.drop_table('post_changes')
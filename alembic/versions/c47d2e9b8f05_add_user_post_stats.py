@@ -0,0 +1,47 @@
+"""add user post stats
+
+Revision ID: c47d2e9b8f05
+Revises: 8b2e5d0a6c13
+Create Date: 2026-10-19 11:26:48.551307
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47d2e9b8f05'
+down_revision = '8b2e5d0a6c13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_posts_user_id_created_at', 'posts', ['user_id', 'created_at'], unique=False)
+    stats = op.create_table('user_post_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('post_count', sa.Integer(), nullable=False),
+    sa.Column('total_text_bytes', sa.BigInteger(), nullable=False),
+    sa.Column('last_post_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Backfill from the existing posts
+    posts = sa.table('posts', sa.column('user_id'), sa.column('text'), sa.column('id'), sa.column('created_at'))
+    op.execute(
+        stats.insert().from_select(
+            ['user_id', 'post_count', 'total_text_bytes', 'last_post_at'],
+            sa.select(
+                posts.c.user_id,
+                sa.func.count(posts.c.id),
+                sa.func.coalesce(sa.func.sum(sa.func.length(sa.cast(posts.c.text, sa.LargeBinary))), 0),
+                sa.func.max(posts.c.created_at),
+            ).group_by(posts.c.user_id)
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_post_stats')
+    op.drop_index('ix_posts_user_id_created_at', table_name='posts')
@@ -0,0 +1,30 @@
+"""add posts deleted_at
+
+Revision ID: c5a0d7e3f418
+Revises: b81e4f6a9d27
+Create Date: 2026-10-19 20:41:05.663208
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a0d7e3f418'
+down_revision = 'b81e4f6a9d27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('posts') as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_posts_deleted_at', 'posts', ['deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    # Finish purging first: tombstones would become live posts again
+    op.execute("DELETE FROM posts WHERE deleted_at IS NOT NULL")
+    op.drop_index('ix_posts_deleted_at', table_name='posts')
+    with op.batch_alter_table('posts') as batch_op:
+        batch_op.drop_column('deleted_at')
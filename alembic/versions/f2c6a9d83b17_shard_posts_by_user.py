@@ -0,0 +1,61 @@
+"""shard posts by user
+
+Revision ID: f2c6a9d83b17
+Revises: e91b7c4d2a58
+Create Date: 2026-10-19 17:48:26.904115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c6a9d83b17'
+down_revision = 'e91b7c4d2a58'
+branch_labels = None
+depends_on = None
+
+# Names given to the unnamed foreign keys when SQLite tables are recreated
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def drop_user_foreign_key(table: str) -> None:
+    if op.get_context().dialect.name == 'mysql':
+        op.drop_constraint(f'{table}_ibfk_1', table, type_='foreignkey')
+    else:
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint(f'fk_{table}_user_id_users', type_='foreignkey')
+
+
+def upgrade() -> None:
+    # Posts and their statistics may live on another database than users
+    drop_user_foreign_key('posts')
+    drop_user_foreign_key('user_post_stats')
+
+    # Every existing user's posts are on the current database, shard 0
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('post_shard', sa.SmallInteger(), nullable=True))
+    op.execute("UPDATE users SET post_shard = 0")
+
+    id_blocks = op.create_table('id_blocks',
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.Column('next_id', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    posts = sa.table('posts', sa.column('id'))
+    op.execute(
+        id_blocks.insert().from_select(
+            ['name', 'next_id'],
+            sa.select(sa.literal('posts'), sa.func.coalesce(sa.func.max(posts.c.id), 0) + 1)
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('id_blocks')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('post_shard')
+    with op.batch_alter_table('user_post_stats') as batch_op:
+        batch_op.create_foreign_key('user_post_stats_ibfk_1', 'users', ['user_id'], ['id'])
+    with op.batch_alter_table('posts') as batch_op:
+        batch_op.create_foreign_key('posts_ibfk_1', 'users', ['user_id'], ['id'])
@@ -0,0 +1,25 @@
+import hmac
+from typing import Optional
+from fastapi import Header, HTTPException, status
+
+from app.core.config import settings
+
+async def require_debug_token(debug_token: Optional[str] = Header(None, alias="X-Debug-Token")):
+    """
+    Reject requests to the debug and metrics endpoints without the configured debug token.
+    
+    The endpoints expose internals of the worker, so they stay closed while
+    DEBUG_TOKEN is unset.
+    
+    Args:
+        debug_token (Optional[str]): The X-Debug-Token header.
+        
+    Raises:
+        HTTPException: 403 if no debug token is configured or the header doesn't match it.
+    """
+    expected = settings.DEBUG_TOKEN
+    if not expected or debug_token is None or not hmac.compare_digest(debug_token.encode(), expected.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="A valid X-Debug-Token header is required"
+        )
@@ -0,0 +1,79 @@
+import ipaddress
+import math
+from fastapi import Request, HTTPException, status
+
+from app.core.config import settings
+from app.core.rate_limit import InMemoryRateLimitBackend, RateLimiter, TokenBucketLimit
+
+# Limits for the endpoints that run a bcrypt operation per request
+auth_rate_limiter = RateLimiter(
+    InMemoryRateLimitBackend(settings.RATE_LIMIT_MAX_BUCKETS),
+    {
+        "ip": TokenBucketLimit(settings.AUTH_RATE_LIMIT_PER_IP_PER_MINUTE, settings.AUTH_RATE_LIMIT_PER_IP_BURST),
+        "email": TokenBucketLimit(settings.AUTH_RATE_LIMIT_PER_EMAIL_PER_MINUTE, settings.AUTH_RATE_LIMIT_PER_EMAIL_BURST),
+    },
+)
+
+# Load balancers and reverse proxies allowed to report the client address
+trusted_proxies = [ipaddress.ip_network(proxy, strict=False) for proxy in settings.TRUSTED_PROXIES]
+
+
+def _is_trusted(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies)
+
+
+def client_address(request: Request) -> str:
+    """
+    Get the address of the client that sent a request.
+
+    Behind a trusted proxy the peer is the proxy itself, so X-Forwarded-For is
+    read from the right: each proxy appends the address it received the request
+    from, and the first address not in TRUSTED_PROXIES is the client. Entries
+    further left were written by the client and can't be trusted.
+
+    Args:
+        request (Request): FastAPI request object.
+
+    Returns:
+        str: Client IP address, or "unknown".
+    """
+    address = request.client.host if request.client else "unknown"
+    if not _is_trusted(address):
+        return address
+
+    forwarded = ",".join(request.headers.getlist("x-forwarded-for"))
+    for hop in reversed([hop.strip() for hop in forwarded.split(",") if hop.strip()]):
+        address = hop
+        if not _is_trusted(hop):
+            break
+    return address
+
+
+async def enforce_auth_rate_limit(request: Request, email: str):
+    """
+    Reject an authentication attempt that exceeds the per-IP or per-email rate limit.
+
+    Called before any password hashing so throttled attempts cost no bcrypt work.
+
+    Args:
+        request (Request): FastAPI request object.
+        email (str): Email address the attempt is for.
+
+    Raises:
+        HTTPException: 429 with a Retry-After header if a limit is exceeded.
+    """
+    if not settings.AUTH_RATE_LIMIT_ENABLED:
+        return
+
+    retry_after = await auth_rate_limiter.hit(ip=client_address(request), email=email.lower())
+
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many authentication attempts. Please try again later.",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
@@ -1,4 +1,5 @@
-from fastapi import Request, HTTPException, status
+from typing import List
+from fastapi import Query, Request, HTTPException, status
 from app.core.config import settings
 
 async def validate_request_size(request: Request):
@@ -21,4 +22,82 @@ async def validate_request_size(request: Request):
             raise HTTPException(
                 status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
                 detail=f"Request size too large. Maximum allowed size is {settings.MAX_REQUEST_SIZE_BYTES} bytes"
-            ) 
\ No newline at end of file
+            ) 
+
+async def read_body_into_buffer(request: Request) -> bytearray:
+    """
+    Read the request body into a single buffer, enforcing the maximum request size.
+    
+    Request.body() keeps every received chunk and then joins them into a new
+    bytes object. Here the buffer is allocated once from the Content-Length
+    header and each chunk is copied into it as it arrives; without the header
+    the buffer grows as needed.
+    
+    Args:
+        request (Request): FastAPI request object.
+        
+    Returns:
+        bytearray: The body.
+        
+    Raises:
+        HTTPException: If the body exceeds the maximum allowed size or its Content-Length.
+    """
+    content_length = request.headers.get("content-length")
+    expected = int(content_length) if content_length and content_length.isdigit() else None
+    limit = settings.MAX_REQUEST_SIZE_BYTES if expected is None else min(expected, settings.MAX_REQUEST_SIZE_BYTES)
+    
+    if expected is not None and expected > settings.MAX_REQUEST_SIZE_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Request size too large. Maximum allowed size is {settings.MAX_REQUEST_SIZE_BYTES} bytes"
+        )
+    
+    buffer = bytearray(expected or 0)
+    received = 0
+    async for chunk in request.stream():
+        end = received + len(chunk)
+        if end > limit:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Request size too large. Maximum allowed size is {limit} bytes"
+            )
+        buffer[received:end] = chunk
+        received = end
+    
+    if received < len(buffer):
+        # Shorter than announced; shrinking in place doesn't copy the data received
+        del buffer[received:]
+    return buffer
+
+async def parse_post_ids(
+    ids: str = Query(..., description="Comma-separated post IDs, e.g. 3,17,42"),
+) -> List[int]:
+    """
+    Parse a comma-separated list of post IDs, enforcing the maximum batch size.
+    
+    Args:
+        ids (str): The ids query parameter.
+        
+    Returns:
+        List[int]: The IDs, in request order, duplicates included.
+        
+    Raises:
+        HTTPException: If an ID is not a positive integer or there are too many IDs.
+    """
+    parts = ids.split(",")
+    if len(parts) > settings.POSTS_BY_IDS_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Too many IDs. At most {settings.POSTS_BY_IDS_MAX} posts can be fetched at once"
+        )
+    
+    post_ids = []
+    for part in parts:
+        part = part.strip()
+        if not part.isdigit() or int(part) == 0:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="IDs must be positive integers"
+            )
+        post_ids.append(int(part))
+    return post_ids
@@ -1,12 +1,21 @@
 from app.services.post_service import PostService
 from app.services.auth_service import AuthService
 from app.core.database import get_db
+from app.core.sharding import ShardSessions
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends
 
 
-def get_post_service(db: AsyncSession = Depends(get_db)) -> PostService:
-    return PostService(db)
+async def get_shard_sessions(db: AsyncSession = Depends(get_db)):
+    async with ShardSessions(db) as shards:
+        yield shards
+
+
+def get_post_service(
+    db: AsyncSession = Depends(get_db),
+    shards: ShardSessions = Depends(get_shard_sessions),
+) -> PostService:
+    return PostService(db, shards)
 
 
 def get_auth_service(db: AsyncSession = Depends(get_db)) -> AuthService:
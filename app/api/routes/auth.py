@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, status
+from typing import Dict, Optional
+from fastapi import APIRouter, Depends, Request, status
 
 from app.schemas.user import UserCreate, UserLogin
-from app.schemas.token import Token
+from app.schemas.token import Token, TokenPayload, RefreshRequest, LogoutRequest
+from app.core.security import get_token_payload
 from app.services.auth_service import AuthService
 from app.api.dependencies.services import get_auth_service
+from app.api.dependencies.rate_limit import enforce_auth_rate_limit
 
 router = APIRouter()
 
 
 @router.post("/signup", response_model=Token, status_code=status.HTTP_201_CREATED)
 async def signup(
+    request: Request,
     user_data: UserCreate,
     auth_service: AuthService = Depends(get_auth_service)
 ):
@@ -20,17 +24,23 @@ async def signup(
     and returns an access token for authentication.
     
     Args:
+        request (Request): FastAPI request object, used for per-IP rate limiting.
         user_data (UserCreate): User data including email and password.
         auth_service (AuthService): Authentication service dependency.
         
     Returns:
         Token: Access token for authentication.
+        
+    Raises:
+        HTTPException: 429 if the rate limit for this IP or email is exceeded.
     """
+    await enforce_auth_rate_limit(request, user_data.email)
     return await auth_service.signup_user(user_data.email, user_data.password)
 
 
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
     user_data: UserLogin,
     auth_service: AuthService = Depends(get_auth_service)
 ):
@@ -41,10 +51,63 @@ async def login(
     and returns an access token for authentication.
     
     Args:
+        request (Request): FastAPI request object, used for per-IP rate limiting.
         user_data (UserLogin): User data including email and password.
         auth_service (AuthService): Authentication service dependency.
         
     Returns:
         Token: Access token for authentication.
+        
+    Raises:
+        HTTPException: 429 if the rate limit for this IP or email is exceeded.
     """
+    await enforce_auth_rate_limit(request, user_data.email)
     return await auth_service.login_user(user_data.email, user_data.password)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    refresh_data: RefreshRequest,
+    auth_service: AuthService = Depends(get_auth_service)
+):
+    """
+    Exchange a refresh token for new tokens.
+    
+    Lets clients renew an expiring access token without sending the password
+    again. The refresh token is single-use: the response carries its replacement.
+    
+    Args:
+        refresh_data (RefreshRequest): The refresh token.
+        auth_service (AuthService): Authentication service dependency.
+        
+    Returns:
+        Token: New access and refresh tokens.
+        
+    Raises:
+        HTTPException: 401 if the refresh token is invalid, expired or already used.
+    """
+    return await auth_service.refresh_tokens(refresh_data.refresh_token)
+
+
+@router.post("/logout", response_model=Dict[str, str])
+async def logout(
+    logout_data: Optional[LogoutRequest] = None,
+    token_data: TokenPayload = Depends(get_token_payload),
+    auth_service: AuthService = Depends(get_auth_service)
+):
+    """
+    Log out by revoking the current access token.
+    
+    The access token is rejected by every worker from then on. Pass the
+    refresh token in the body to revoke it too.
+    
+    Args:
+        logout_data (Optional[LogoutRequest]): Optional refresh token to revoke.
+        token_data (TokenPayload): Claims of the access token from the request.
+        auth_service (AuthService): Authentication service dependency.
+        
+    Returns:
+        Dict[str, str]: Success message.
+    """
+    await auth_service.logout(token_data, logout_data.refresh_token if logout_data else None)
+    return {"message": "Logged out successfully"}
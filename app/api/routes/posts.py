@@ -1,11 +1,15 @@
-from typing import List, Dict
-from fastapi import APIRouter, Depends, status
+from typing import List, Dict, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
 
+from app.core.config import settings
+from app.core.idempotency import post_idempotency
 from app.core.security import get_current_user
-from app.schemas.post import PostCreate, Post, PostDelete
+from app.schemas.post import (
+    PostCreate, Post, PostChanges, PostDelete, PostLookup, PostSearchPage, PostStats, check_post_text
+)
 from app.services.post_service import PostService
 from app.models.user import User
-from app.api.dependencies.request_validators import validate_request_size
+from app.api.dependencies.request_validators import validate_request_size, read_body_into_buffer, parse_post_ids
 from app.api.dependencies.services import get_post_service
 
 router = APIRouter()
@@ -14,6 +18,9 @@ router = APIRouter()
 @router.post("/posts", response_model=Dict[str, int], status_code=status.HTTP_201_CREATED)
 async def add_post(
     post_data: PostCreate,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", min_length=1, max_length=255),
     current_user: User = Depends(get_current_user),
     post_service: PostService = Depends(get_post_service),
     _: None = Depends(validate_request_size)
@@ -22,38 +29,268 @@ async def add_post(
     Create a new post.
     
     This endpoint creates a new post with the provided text content,
-    associating it with the authenticated user.
+    associating it with the authenticated user. A retry sent with the same
+    Idempotency-Key as an earlier request gets that request's response
+    instead of creating another post.
     
     Args:
         post_data (PostCreate): Post data including text content.
+        request (Request): FastAPI request object.
+        response (Response): Response used to flag replayed results.
+        idempotency_key (Optional[str]): Client-chosen key identifying the request across retries.
         current_user (User): Authenticated user from token dependency.
-        db (AsyncSession): Database session dependency.
+        post_service (PostService): Post service dependency.
         _ (None): Request size validation dependency.
         
     Returns:
         Dict[str, int]: Dictionary with the post ID.
     """
-    return await post_service.create_post(post_data.text, current_user)
+    if idempotency_key is None:
+        return await post_service.create_post(post_data.text, current_user)
+    
+    result, replayed = await post_idempotency.execute(
+        f"create_post:{current_user.id}",
+        idempotency_key,
+        await request.body(),
+        lambda claim: post_service.create_post(post_data.text, current_user, claim=claim),
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+
+@router.post(
+    "/posts/text",
+    response_model=Dict[str, int],
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={"requestBody": {"required": True, "content": {"text/plain": {"schema": {"type": "string"}}}}},
+)
+async def add_post_text(
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", min_length=1, max_length=255),
+    current_user: User = Depends(get_current_user),
+    post_service: PostService = Depends(get_post_service),
+    body: bytearray = Depends(read_body_into_buffer),
+):
+    """
+    Create a new post from a text/plain body, the low-copy path for large posts.
+    
+    The body is read into one buffer and decoded once; the text is then
+    validated in place with the same rules as POST /api/posts, and its UTF-8
+    size is taken from the body instead of being recomputed. Supports
+    Idempotency-Key like POST /api/posts.
+    
+    Args:
+        request (Request): FastAPI request object.
+        response (Response): Response used to flag replayed results.
+        idempotency_key (Optional[str]): Client-chosen key identifying the request across retries.
+        current_user (User): Authenticated user from token dependency.
+        post_service (PostService): Post service dependency.
+        body (bytearray): The request body, UTF-8 encoded post content.
+        
+    Returns:
+        Dict[str, int]: Dictionary with the post ID.
+        
+    Raises:
+        HTTPException: 415 if the body isn't text/plain, 422 if it isn't valid post text.
+    """
+    media_type = request.headers.get("content-type", "text/plain").split(";")[0].strip().lower()
+    if media_type != "text/plain":
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Post body must be text/plain"
+        )
+    try:
+        text = check_post_text(body.decode("utf-8"))
+    except ValueError as exc:  # also covers UnicodeDecodeError
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(exc)
+        )
+    
+    if idempotency_key is None:
+        return await post_service.create_post(text, current_user, len(body))
+    
+    result, replayed = await post_idempotency.execute(
+        f"create_post:{current_user.id}",
+        idempotency_key,
+        body,
+        lambda claim: post_service.create_post(text, current_user, len(body), claim),
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Check whether the request's If-None-Match header matches an ETag.
+    
+    Args:
+        request (Request): FastAPI request object.
+        etag (str): Current entity tag.
+        
+    Returns:
+        bool: True if the client already holds the current representation.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
 
 
 @router.get("/posts", response_model=List[Post])
 async def get_posts(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size, to page with a cursor"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous response's X-Next-Cursor header"),
     current_user: User = Depends(get_current_user),
     post_service: PostService = Depends(get_post_service),
 ):
     """
-    Get all posts for the authenticated user.
+    Get the authenticated user's posts, newest first.
     
-    This endpoint retrieves all posts associated with the authenticated user.
+    Without parameters, this endpoint returns all of the user's recent posts,
+    leaving out archived ones. The response carries an ETag derived from the
+    user's posts version; a request whose If-None-Match matches it gets 304
+    without any posts being loaded. While the database is failing, the last
+    cached posts may be returned instead, without an ETag. With limit or cursor, it returns one page;
+    paging past the recent posts continues into the archive. The X-Next-Cursor
+    header holds the cursor for the next page, and is absent on the last page.
+    The full listing also has an X-Changes-Token header, to follow changes
+    with GET /api/posts/changes from then on.
     
     Args:
+        request (Request): FastAPI request object.
+        response (Response): Response used to set the ETag, X-Next-Cursor and X-Changes-Token headers.
+        limit (Optional[int]): Page size.
+        cursor (Optional[str]): Cursor for the next page.
         current_user (User): Authenticated user from token dependency.
-        db (AsyncSession): Database session dependency.
+        post_service (PostService): Post service dependency.
         
     Returns:
         List[Post]: List of posts.
     """
-    return await post_service.get_user_posts(current_user)
+    if limit is not None or cursor is not None:
+        posts, next_cursor = await post_service.get_posts_page(
+            current_user,
+            limit or settings.POSTS_PAGE_SIZE,
+            cursor,
+        )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return posts
+    
+    etag = post_service.posts_etag(current_user)
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    posts, version = await post_service.get_posts(current_user)
+    # Posts served stale because the database failed must not be cached under the current ETag
+    if version == current_user.posts_version:
+        response.headers["ETag"] = etag
+    response.headers["X-Next-Cursor"] = post_service.next_page_cursor(posts)
+    response.headers["X-Changes-Token"] = post_service.changes_token(version)
+    return posts
+
+
+@router.get("/posts/by-ids", response_model=List[PostLookup])
+async def get_posts_by_ids(
+    post_ids: List[int] = Depends(parse_post_ids),
+    current_user: User = Depends(get_current_user),
+    post_service: PostService = Depends(get_post_service),
+):
+    """
+    Get several of the authenticated user's posts by ID in one request.
+    
+    Results come in the order of the requested IDs. IDs of posts that don't
+    exist or belong to another user get an entry with found set to false.
+    
+    Args:
+        post_ids (List[int]): Requested post IDs, from the ids query parameter.
+        current_user (User): Authenticated user from token dependency.
+        post_service (PostService): Post service dependency.
+        
+    Returns:
+        List[PostLookup]: One result per requested ID.
+    """
+    return await post_service.get_posts_by_ids(current_user, post_ids)
+
+
+@router.get("/posts/changes", response_model=PostChanges)
+async def get_post_changes(
+    since: str = Query(..., description="X-Changes-Token of a listing, or next_token of the previous response"),
+    limit: int = Query(1000, ge=1, le=1000, description="Maximum number of changes"),
+    current_user: User = Depends(get_current_user),
+    post_service: PostService = Depends(get_post_service),
+):
+    """
+    Get the authenticated user's posts created and deleted since a change token.
+    
+    Lets clients keep a copy of their posts up to date without listing them
+    all again. Call again with next_token while has_more is true. Changes are
+    kept for POST_CHANGES_RETENTION_DAYS; an older token gets 410 Gone, and
+    the client must list its posts again.
+    
+    Args:
+        since (str): Change token.
+        limit (int): Maximum number of changes.
+        current_user (User): Authenticated user from token dependency.
+        post_service (PostService): Post service dependency.
+        
+    Returns:
+        PostChanges: Created posts, deleted post IDs and the next token.
+    """
+    return await post_service.get_changes(current_user, since, limit)
+
+
+@router.get("/posts/stats", response_model=PostStats)
+async def get_post_stats(
+    current_user: User = Depends(get_current_user),
+    post_service: PostService = Depends(get_post_service),
+):
+    """
+    Get statistics about the authenticated user's posts.
+    
+    Reads a single precomputed row instead of scanning the user's posts.
+    
+    Args:
+        current_user (User): Authenticated user from token dependency.
+        post_service (PostService): Post service dependency.
+        
+    Returns:
+        PostStats: Post count, total text size in bytes and newest post time.
+    """
+    return await post_service.get_stats(current_user)
+
+
+@router.get("/posts/search", response_model=PostSearchPage)
+async def search_posts(
+    q: str = Query(..., min_length=1, max_length=256, description="Search terms"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of results"),
+    cursor: Optional[str] = Query(None, description="Cursor returned with the previous page"),
+    current_user: User = Depends(get_current_user),
+    post_service: PostService = Depends(get_post_service),
+):
+    """
+    Search the authenticated user's posts.
+    
+    Results are ranked by relevance and paged with an opaque cursor.
+    
+    Args:
+        q (str): Search terms.
+        limit (int): Maximum number of results.
+        cursor (Optional[str]): Cursor for the next page.
+        current_user (User): Authenticated user from token dependency.
+        post_service (PostService): Post service dependency.
+        
+    Returns:
+        PostSearchPage: Matching posts and the cursor for the next page.
+    """
+    return await post_service.search_posts(current_user, q, limit, cursor)
 
 
 @router.delete("/posts", response_model=Dict[str, str])
@@ -0,0 +1,225 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Concurrency limit that adapts to observed latency (AIMD).
+
+    The limit grows by about one per window of requests that finish within the
+    target latency, and shrinks multiplicatively (at most once per target
+    latency interval) when requests are slow or fail. Requests over the limit
+    wait in a FIFO queue; they are rejected immediately when the expected wait
+    exceeds the queue timeout, or when the timeout passes before a slot frees up.
+    """
+
+    BACKOFF_RATIO = 0.9
+    LATENCY_SMOOTHING = 0.2
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int,
+        max_limit: int,
+        target_latency: float,
+        queue_timeout: float,
+        max_queue: int,
+        min_limit: int = 1,
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            name (str): Route group name, used in metrics.
+            initial_limit (int): Starting concurrency limit.
+            max_limit (int): Upper bound for the limit.
+            target_latency (float): Latency in seconds above which the limit is reduced.
+            queue_timeout (float): Maximum seconds a request may wait for a slot.
+            max_queue (int): Maximum number of waiting requests.
+            min_limit (int): Lower bound for the limit.
+        """
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.avg_latency = target_latency
+        self._last_backoff = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        metrics.register_gauge(f"admission.{name}.limit", lambda: self.limit)
+        metrics.register_gauge(f"admission.{name}.in_flight", lambda: self.in_flight)
+        metrics.register_gauge(f"admission.{name}.queued", lambda: len(self._waiters))
+
+    async def acquire(self) -> bool:
+        """
+        Wait for a concurrency slot.
+
+        Returns:
+            bool: True if a slot was acquired, False if the request should be shed.
+        """
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return True
+
+        queued = len(self._waiters)
+        expected_wait = (queued + 1) * self.avg_latency / self.limit
+        if queued >= self.max_queue or expected_wait > self.queue_timeout:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before cancellation
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0, failed=True)
+            raise
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+    def release(self, latency: float, failed: bool = False) -> None:
+        """
+        Release a slot and adjust the limit from the request's outcome.
+
+        Args:
+            latency (float): Request duration in seconds.
+            failed (bool): Whether the request failed with a server error.
+        """
+        self.in_flight -= 1
+        self.avg_latency += self.LATENCY_SMOOTHING * (latency - self.avg_latency)
+
+        if failed or latency > self.target_latency:
+            now = time.monotonic()
+            if now - self._last_backoff >= self.target_latency:
+                self.limit = max(self.min_limit, self.limit * self.BACKOFF_RATIO)
+                self._last_backoff = now
+        elif self.in_flight + 1 >= self.limit / 2:
+            # Only grow while at least half of the limit is being used
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+        # Hand freed slots straight to waiting requests
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+
+def build_limiters() -> Dict[str, AdaptiveConcurrencyLimiter]:
+    """
+    Create one limiter per route group from the application settings.
+
+    Returns:
+        Dict[str, AdaptiveConcurrencyLimiter]: Limiters by group name.
+    """
+    return {
+        group: AdaptiveConcurrencyLimiter(
+            name=group,
+            initial_limit=initial_limit,
+            max_limit=settings.ADMISSION_MAX_LIMITS[group],
+            target_latency=settings.ADMISSION_TARGET_LATENCY_MS[group] / 1000,
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000,
+            max_queue=settings.ADMISSION_MAX_QUEUE,
+        )
+        for group, initial_limit in settings.ADMISSION_INITIAL_LIMITS.items()
+    }
+
+
+# Endpoints that run a bcrypt operation per request
+AUTH_PATHS = {"/api/login", "/api/signup"}
+
+
+def route_group(method: str, path: str) -> Optional[str]:
+    """
+    Classify a request into a route group.
+
+    Each group has its own limit so that expensive endpoints (bcrypt-heavy auth)
+    cannot use up the capacity of cheap ones (cached post reads).
+
+    Args:
+        method (str): HTTP method.
+        path (str): Request path.
+
+    Returns:
+        Optional[str]: Group name, or None for requests that bypass admission control.
+    """
+    if not path.startswith("/api/"):
+        return None
+    if path in AUTH_PATHS:
+        return "auth"
+    if method in ("GET", "HEAD"):
+        return "read"
+    return "write"
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware that sheds load per route group with a fast 503.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.limiters = build_limiters()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        group = route_group(scope["method"], scope["path"])
+        limiter = self.limiters.get(group)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            metrics.increment(f"admission.{group}.rejected")
+            await self._reject(send)
+            return
+
+        start = time.monotonic()
+        failed = True
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+            failed = status_code >= 500
+        finally:
+            limiter.release(time.monotonic() - start, failed)
+
+    @staticmethod
+    async def _reject(send) -> None:
+        body = b'{"detail":"Server is overloaded, please retry"}'
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", b"1"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,10 +1,30 @@
+import logging
 import time
-from typing import Dict, Any, Tuple, Optional
+from typing import Dict, Any, Tuple, Optional, Set, Callable, Awaitable, List
+from app.core import tasks
 from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
 
 # Simple in-memory cache implementation
-# Structure: {key: (data, expiry_timestamp)}
-cache: Dict[str, Tuple[Any, float]] = {}
+# Structure: {key: (data, expiry_timestamp, stale_until_timestamp)}
+# Entries past their expiry are stale: they can still be served until stale_until.
+# Beyond CACHE_MAX_ENTRIES, the least recently stored entries are evicted.
+cache: Dict[str, Tuple[Any, float, float]] = {}
+
+# Per-post entries, same structure. Kept apart so that looking up many posts
+# can't evict other users' post lists; beyond CACHE_MAX_POST_ENTRIES, the least
+# recently stored ones are evicted.
+post_cache: Dict[str, Tuple[Any, float, float]] = {}
+
+# Users' ID, posts version and post shard, same structure. Kept apart so that
+# authenticating requests can't evict post lists; beyond CACHE_MAX_USER_ENTRIES,
+# the least recently stored ones are evicted.
+user_cache: Dict[str, Tuple[Any, float, float]] = {}
+
+# Keys with a background refresh in progress
+refreshing: Set[str] = set()
 
 def get_cache(key: str) -> Optional[Any]:
     """
@@ -17,15 +37,75 @@ def get_cache(key: str) -> Optional[Any]:
         Optional[Any]: The cached data if found and valid, None otherwise.
     """
     if key in cache:
-        data, expiry = cache[key]
-        if time.time() < expiry:
+        data, expiry, stale_until = cache[key]
+        now = time.time()
+        if now < expiry:
+            logger.debug("Cache hit: %s", key)
             return data
-        else:
-            # Remove expired cache entry
+        elif now >= stale_until:
+            # Remove entries too old to be served even when stale
             del cache[key]
+    logger.debug("Cache miss: %s", key)
     return None
 
-def set_cache(key: str, data: Any, expiry_seconds: int = None) -> None:
+def get_cache_entry(key: str, store: Dict[str, Tuple[Any, float, float]] = cache) -> Optional[Tuple[Any, bool]]:
+    """
+    Retrieve data from cache, including stale data past its expiry.
+    
+    Args:
+        key (str): The cache key to retrieve.
+        store (Dict[str, Tuple[Any, float, float]], optional): Cache dictionary to read,
+                                                               cache or user_cache.
+        
+    Returns:
+        Optional[Tuple[Any, bool]]: The cached data and whether it is stale, or None if
+        there is no entry or it is too old to be served.
+    """
+    if key in store:
+        data, expiry, stale_until = store[key]
+        now = time.time()
+        if now < stale_until:
+            logger.debug("Cache hit: %s", key)
+            return data, now >= expiry
+        # Remove entries too old to be served even when stale
+        del store[key]
+    logger.debug("Cache miss: %s", key)
+    return None
+
+def get_cache_many(keys: List[str], store: Dict[str, Tuple[Any, float, float]] = cache) -> Dict[str, Any]:
+    """
+    Retrieve several entries from cache at once, skipping missing and expired ones.
+    
+    Args:
+        keys (List[str]): The cache keys to retrieve.
+        store (Dict[str, Tuple[Any, float, float]], optional): Cache dictionary to read,
+                                                               cache or post_cache.
+        
+    Returns:
+        Dict[str, Any]: The valid cached data, by key.
+    """
+    now = time.time()
+    found = {}
+    for key in keys:
+        entry = store.get(key)
+        if entry is None:
+            continue
+        data, expiry, stale_until = entry
+        if now < expiry:
+            found[key] = data
+        elif now >= stale_until:
+            # Remove entries too old to be served even when stale
+            del store[key]
+    logger.debug("Cache hits: %s of %s", len(found), len(keys))
+    return found
+
+def set_cache(
+    key: str,
+    data: Any,
+    expiry_seconds: int = None,
+    max_stale_seconds: int = None,
+    store: Dict[str, Tuple[Any, float, float]] = cache,
+) -> None:
     """
     Store data in the cache with an expiration time.
     
@@ -34,22 +114,98 @@ def set_cache(key: str, data: Any, expiry_seconds: int = None) -> None:
         data (Any): The data to cache.
         expiry_seconds (int, optional): Time in seconds until the cache expires.
                                        Defaults to the application setting.
+        max_stale_seconds (int, optional): Time in seconds past expiry during which the
+                                          data can still be served stale.
+                                          Defaults to the application setting.
+        store (Dict[str, Tuple[Any, float, float]], optional): Cache dictionary to write,
+                                                               cache or user_cache.
     """
     if expiry_seconds is None:
         expiry_seconds = settings.CACHE_EXPIRATION_SECONDS
+    if max_stale_seconds is None:
+        max_stale_seconds = settings.CACHE_MAX_STALE_SECONDS
         
     expiry = time.time() + expiry_seconds
-    cache[key] = (data, expiry)
+    # Re-insert so the entry moves to the end of the eviction order
+    store.pop(key, None)
+    store[key] = (data, expiry, expiry + max_stale_seconds)
+    _evict(store)
+
+def set_cache_many(
+    items: Dict[str, Any],
+    expiry_seconds: int = None,
+    store: Dict[str, Tuple[Any, float, float]] = cache,
+) -> None:
+    """
+    Store several entries in the cache with the same expiration time.
+    
+    Args:
+        items (Dict[str, Any]): Data to cache, by key.
+        expiry_seconds (int, optional): Time in seconds until the entries expire.
+                                       Defaults to the application setting.
+        store (Dict[str, Tuple[Any, float, float]], optional): Cache dictionary to write,
+                                                               cache or post_cache.
+    """
+    if expiry_seconds is None:
+        expiry_seconds = settings.CACHE_EXPIRATION_SECONDS
+    
+    expiry = time.time() + expiry_seconds
+    stale_until = expiry + settings.CACHE_MAX_STALE_SECONDS
+    for key, data in items.items():
+        store.pop(key, None)
+        store[key] = (data, expiry, stale_until)
+    _evict(store)
+
+def _evict(store: Dict[str, Tuple[Any, float, float]]) -> None:
+    if store is post_cache:
+        max_entries = settings.CACHE_MAX_POST_ENTRIES
+    elif store is user_cache:
+        max_entries = settings.CACHE_MAX_USER_ENTRIES
+    else:
+        max_entries = settings.CACHE_MAX_ENTRIES
+    # Dictionaries keep insertion order, so the first entries are the least recently stored
+    while len(store) > max_entries:
+        del store[next(iter(store))]
+
+def refresh_in_background(key: str, refresh: Callable[[], Awaitable[None]]) -> bool:
+    """
+    Refresh a cache entry in the background, unless a refresh of it is already running.
+    
+    Args:
+        key (str): The cache key being refreshed.
+        refresh (Callable[[], Awaitable[None]]): Coroutine function that reloads the data
+                                                and stores it in the cache.
+        
+    Returns:
+        bool: True if a refresh was started.
+    """
+    if key in refreshing:
+        return False
+    refreshing.add(key)
+    metrics.increment("cache.background_refreshes")
+    
+    async def run() -> None:
+        try:
+            await refresh()
+        finally:
+            refreshing.discard(key)
+    
+    tasks.spawn(run(), name=f"cache-refresh-{key}")
+    return True
 
 def clear_cache(key: str = None) -> None:
     """
     Clear cache entries.
     
     Args:
-        key (str, optional): Specific key to clear. If None, clears all cache.
+        key (str, optional): Specific key to clear. If None, clears all cache,
+                            per-post and user entries included.
     """
     if key:
-        if key in cache:
-            del cache[key]
+        cache.pop(key, None)
+        post_cache.pop(key, None)
+        user_cache.pop(key, None)
     else:
-        cache.clear() 
\ No newline at end of file
+        cache.clear()
+        post_cache.clear()
+        user_cache.clear()
@@ -0,0 +1,142 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Tuple, Type, TypeVar
+
+from sqlalchemy.exc import InterfaceError, OperationalError, TimeoutError as PoolTimeoutError
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+T = TypeVar("T")
+
+# Errors meaning the database is down, unreachable or overloaded, as opposed to a bad query:
+# lost or refused connections, pool checkout timeouts and network errors
+DATABASE_ERRORS: Tuple[Type[BaseException], ...] = (
+    OperationalError,
+    InterfaceError,
+    PoolTimeoutError,
+    OSError,
+    asyncio.TimeoutError,
+)
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling an operation whose circuit is open.
+    """
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit {name} is open")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency for a while.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    fail immediately with CircuitOpenError, instead of each waiting on the
+    failing dependency and holding a connection. After reset_seconds a single
+    trial call is let through: if it succeeds the circuit closes, otherwise it
+    stays open for another reset_seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_seconds: float,
+        failure_types: Tuple[Type[BaseException], ...] = DATABASE_ERRORS,
+    ):
+        """
+        Initialize a closed circuit.
+
+        Args:
+            name (str): Name used in metrics.
+            failure_threshold (int): Consecutive failures that open the circuit.
+            reset_seconds (float): How long the circuit stays open before a trial call.
+            failure_types (Tuple[Type[BaseException], ...]): Exceptions counted as failures;
+                others pass through without affecting the circuit.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failure_types = failure_types
+        self.failures = 0
+        self.opened_at = None  # monotonic time the circuit opened, None while closed
+        self._trial_running = False
+        metrics.register_gauge(f"circuit.{name}.open", lambda: 0 if self.opened_at is None else 1)
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    async def call(self, operation: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run an operation unless the circuit is open.
+
+        Args:
+            operation (Callable[[], Awaitable[T]]): Coroutine function calling the dependency.
+
+        Returns:
+            T: The operation's result.
+
+        Raises:
+            CircuitOpenError: If the circuit is open and no trial call is due.
+        """
+        trial = False
+        if self.opened_at is not None:
+            remaining = self.opened_at + self.reset_seconds - time.monotonic()
+            if remaining > 0 or self._trial_running:
+                metrics.increment(f"circuit.{self.name}.rejected")
+                raise CircuitOpenError(self.name, max(remaining, 1.0))
+            trial = self._trial_running = True
+
+        try:
+            result = await operation()
+        except self.failure_types:
+            self._record_failure()
+            raise
+        finally:
+            if trial:
+                self._trial_running = False
+
+        self.failures = 0
+        if self.opened_at is not None:
+            self.opened_at = None
+            metrics.increment(f"circuit.{self.name}.closed")
+        return result
+
+    def _record_failure(self) -> None:
+        self.failures += 1
+        if self.opened_at is not None:
+            # A failed trial keeps the circuit open for another period
+            self.opened_at = time.monotonic()
+        elif self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            metrics.increment(f"circuit.{self.name}.opened")
+
+
+# Structure: {name: breaker}
+breakers: Dict[str, CircuitBreaker] = {}
+
+
+def circuit_breaker(name: str) -> CircuitBreaker:
+    """
+    Get the breaker with a name, creating it with the configured thresholds.
+
+    Args:
+        name (str): Breaker name, e.g. one per database.
+
+    Returns:
+        CircuitBreaker: The breaker.
+    """
+    breaker = breakers.get(name)
+    if breaker is None:
+        breaker = breakers[name] = CircuitBreaker(
+            name,
+            settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+            settings.CIRCUIT_BREAKER_RESET_SECONDS,
+        )
+    return breaker
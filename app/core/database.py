@@ -1,24 +1,100 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from contextlib import AsyncExitStack
+from typing import Type
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.deadlines import DeadlineSession, install_statement_timeouts
+from app.core.sqlite import SQLiteSession, apply_pragmas, is_file_database
+from app.core.replicas import ReplicaSet, RoutingSession, build_write_tracker, current_user_id, read_from_primary
 
-# Create async engine for SQLAlchemy
-engine = create_async_engine(settings.DATABASE_URL, echo=True)
 
-# Create async session factory
-AsyncSessionLocal = sessionmaker(
-    engine, 
-    class_=AsyncSession, 
+def build_engine(url: str) -> AsyncEngine:
+    """
+    Create an async engine with the configured connection pool settings.
+
+    Args:
+        url (str): Database connection string.
+
+    Returns:
+        AsyncEngine: SQLAlchemy async engine.
+    """
+    # SQL is logged through the logging pipeline when DB_ECHO is set, not echoed synchronously
+    options = {
+        "pool_pre_ping": True,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+    sqlite = make_url(url).get_backend_name() == "sqlite"
+    if sqlite:
+        options["pool_pre_ping"] = False  # nothing to ping on a local database
+        # Files are pooled rather than reopened per session (aiosqlite's default), so each
+        # connection's pragmas, page cache and memory map are reused. In-memory databases
+        # keep SQLAlchemy's single shared connection.
+        if is_file_database(make_url(url)):
+            options["poolclass"] = AsyncAdaptedQueuePool
+    if "poolclass" in options or not sqlite:
+        options["pool_size"] = settings.DB_POOL_SIZE
+        options["max_overflow"] = settings.DB_MAX_OVERFLOW
+    target = create_async_engine(url, **options)
+    if sqlite:
+        apply_pragmas(target)
+    install_statement_timeouts(target)
+    return target
+
+
+def session_class(target: AsyncEngine) -> Type[AsyncSession]:
+    """
+    Get the session class for an engine's database.
+
+    Args:
+        target (AsyncEngine): The engine.
+
+    Returns:
+        Type[AsyncSession]: SQLiteSession on SQLite, which queues write transactions, otherwise DeadlineSession.
+    """
+    return SQLiteSession if target.dialect.name == "sqlite" else DeadlineSession
+
+
+# Create async engine for SQLAlchemy. No connection is opened until first use;
+# the application lifespan warms the pool up and disposes it on shutdown.
+engine = build_engine(settings.DATABASE_URL)
+
+# Read replicas (none unless DATABASE_REPLICA_URLS is set) and the users whose
+# reads stay on the primary because they wrote recently
+replicas = ReplicaSet([build_engine(url) for url in settings.DATABASE_REPLICA_URLS])
+write_tracker = build_write_tracker(settings.WRITE_TRACKER, engine)
+
+# Session factory that only uses the primary, for reads that must see the
+# latest committed data
+PrimarySessionLocal = sessionmaker(
+    engine,
+    class_=session_class(engine),
     expire_on_commit=False
 )
 
+# Create async session factory. With replicas configured, its sessions send
+# plain reads to them.
+if replicas.engines:
+    AsyncSessionLocal = sessionmaker(
+        engine,
+        class_=session_class(engine),
+        expire_on_commit=False,
+        sync_session_class=RoutingSession,
+        replicas=replicas,
+        write_tracker=write_tracker,
+    )
+else:
+    AsyncSessionLocal = PrimarySessionLocal
+
 # Create a base class for all models
 Base = declarative_base()
 
 async def get_db():
     """
     Dependency function to get a database session.
-    
+
     Yields:
         AsyncSession: SQLAlchemy async session.
     """
@@ -26,4 +102,49 @@ async def get_db():
         try:
             yield session
         finally:
-            await session.close() 
\ No newline at end of file
+            await session.close()
+
+async def bind_request_user(user_id: str) -> None:
+    """
+    Associate the current request with a user for read routing.
+
+    Writes the request commits are attributed to the user, and its reads go
+    to the primary if the user wrote within the read-your-writes window.
+
+    Args:
+        user_id (str): ID of the authenticated user.
+    """
+    if not replicas.engines:
+        return
+    current_user_id.set(user_id)
+    if await write_tracker.wrote_recently(user_id):
+        read_from_primary.set(True)
+
+async def warm_up_pool(target: AsyncEngine, connections: int) -> None:
+    """
+    Open pooled connections ahead of traffic so early requests don't pay for connection setup.
+
+    All connections are held open at the same time so the pool creates distinct
+    connections, then they are returned to the pool together.
+
+    Args:
+        target (AsyncEngine): Engine whose pool should be warmed up.
+        connections (int): Number of connections to open, capped at the pool size.
+    """
+    pool_size = getattr(target.pool, "size", lambda: connections)()
+    async with AsyncExitStack() as stack:
+        for _ in range(min(connections, pool_size)):
+            await stack.enter_async_context(target.connect())
+
+async def check_database(target: AsyncEngine) -> None:
+    """
+    Run a readiness probe query against the database.
+
+    Args:
+        target (AsyncEngine): Engine to probe.
+
+    Raises:
+        SQLAlchemyError: If the database is not reachable.
+    """
+    async with target.connect() as connection:
+        await connection.execute(text("SELECT 1"))
@@ -0,0 +1,285 @@
+import asyncio
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Optional, TypeVar
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.admission import route_group
+from app.core.config import settings
+from app.core.metrics import metrics
+
+T = TypeVar("T")
+
+# Monotonic time by which the current request must be answered, None outside requests
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+# MySQL error raised when a SELECT runs past its MAX_EXECUTION_TIME hint
+_MYSQL_QUERY_TIMEOUT = 3024
+
+# SQLite VM instructions between checks of the statement deadline
+_SQLITE_PROGRESS_INSTRUCTIONS = 1000
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when the current request's deadline passes before a database call finishes.
+    """
+
+    def __init__(self):
+        super().__init__("Request deadline exceeded")
+
+
+def time_left() -> Optional[float]:
+    """
+    Seconds left until the current request's deadline.
+
+    Returns:
+        Optional[float]: Remaining time, negative once it has passed; None without a deadline.
+    """
+    expires_at = request_deadline.get()
+    return None if expires_at is None else expires_at - time.monotonic()
+
+
+@contextmanager
+def deadline_lifted():
+    """
+    Run the enclosed database calls without the request deadline.
+
+    For the calls that follow a committed write: failing them would answer
+    504 although the write happened, and a retry would make it twice.
+    """
+    token = request_deadline.set(None)
+    try:
+        yield
+    finally:
+        request_deadline.reset(token)
+
+
+def deadline_for(method: str, path: str) -> Optional[float]:
+    """
+    Look up the deadline of a request in the settings.
+
+    A "METHOD /path" entry takes precedence over the entry of the route group.
+
+    Args:
+        method (str): HTTP method.
+        path (str): Request path.
+
+    Returns:
+        Optional[float]: Deadline in seconds, or None for requests without one.
+    """
+    deadlines = settings.REQUEST_DEADLINES_MS
+    milliseconds = deadlines.get(f"{method} {path}")
+    if milliseconds is None:
+        milliseconds = deadlines.get(route_group(method, path))
+    return milliseconds / 1000 if milliseconds else None
+
+
+def is_statement_timeout(error: BaseException) -> bool:
+    """
+    Check whether a driver error is a statement stopped by its deadline.
+
+    Args:
+        error (BaseException): The DBAPI exception.
+
+    Returns:
+        bool: True for MySQL's execution time limit, SQLite's interrupt and, once
+            the deadline has passed, SQLite's busy timeout.
+    """
+    args = getattr(error, "args", ())
+    if args and args[0] == _MYSQL_QUERY_TIMEOUT:
+        return True
+    if type(error).__module__ != "sqlite3":
+        return False
+    if str(error) == "database is locked":
+        remaining = time_left()
+        return remaining is not None and remaining <= 0
+    return str(error) == "interrupted"
+
+
+class _StatementDeadline:
+    """
+    Deadline of the statement running on a SQLite connection.
+
+    SQLite calls the progress handler from the driver's thread while a
+    statement runs; a true result interrupts the statement. Waiting for
+    another connection's write lock doesn't call it, so the busy timeout of
+    write statements is lowered to the time left instead.
+    """
+    __slots__ = ("expires_at", "busy_timeout_ms", "default_busy_timeout_ms")
+
+    def __init__(self):
+        self.expires_at: Optional[float] = None
+        self.busy_timeout_ms = 0
+        self.default_busy_timeout_ms = 0
+
+    def progress_handler(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    async def install(self, connection) -> None:
+        await connection.set_progress_handler(self.progress_handler, _SQLITE_PROGRESS_INSTRUCTIONS)
+        async with connection.execute("PRAGMA busy_timeout") as cursor:
+            self.default_busy_timeout_ms = self.busy_timeout_ms = (await cursor.fetchone())[0]
+
+    async def set_busy_timeout(self, connection, milliseconds: int) -> None:
+        async with connection.execute(f"PRAGMA busy_timeout = {milliseconds}"):
+            self.busy_timeout_ms = milliseconds
+
+
+def install_statement_timeouts(target: AsyncEngine) -> None:
+    """
+    Give the statements of an engine the time left until the request deadline.
+
+    On MySQL, SELECTs get a MAX_EXECUTION_TIME optimizer hint, so the server
+    stops them and the connection stays usable. On SQLite, a progress handler
+    interrupts statements past the deadline and write statements wait at most
+    the time left for the write lock. Other statements and databases are only
+    bounded by DeadlineSession.
+
+    Args:
+        target (AsyncEngine): Engine to install the timeouts on.
+    """
+    sync_engine = target.sync_engine
+
+    if sync_engine.dialect.name == "sqlite":
+        @event.listens_for(sync_engine, "connect")
+        def _install_progress_handler(dbapi_connection, connection_record):
+            deadline = connection_record.info["statement_deadline"] = _StatementDeadline()
+            dbapi_connection.run_async(deadline.install)
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def _arm_progress_handler(conn, cursor, statement, parameters, context, executemany):
+            deadline = conn.info["statement_deadline"]
+            deadline.expires_at = request_deadline.get()
+            if statement.startswith("SELECT "):
+                return
+            busy_timeout_ms = deadline.default_busy_timeout_ms
+            if deadline.expires_at is not None:
+                remaining_ms = math.ceil((deadline.expires_at - time.monotonic()) * 1000)
+                busy_timeout_ms = max(1, min(busy_timeout_ms, remaining_ms))
+            if busy_timeout_ms != deadline.busy_timeout_ms:
+                conn.connection.dbapi_connection.run_async(
+                    lambda connection: deadline.set_busy_timeout(connection, busy_timeout_ms)
+                )
+
+        # Disarmed after each statement, so a passed deadline can't interrupt the commit
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def _disarm_progress_handler(conn, cursor, statement, parameters, context, executemany):
+            conn.info["statement_deadline"].expires_at = None
+
+        @event.listens_for(sync_engine, "handle_error")
+        def _disarm_after_error(exception_context):
+            if exception_context.connection is not None:
+                exception_context.connection.info["statement_deadline"].expires_at = None
+
+    elif sync_engine.dialect.name == "mysql":
+        @event.listens_for(sync_engine, "before_cursor_execute", retval=True)
+        def _add_execution_time_hint(conn, cursor, statement, parameters, context, executemany):
+            remaining = time_left()
+            # MariaDB has no MAX_EXECUTION_TIME hint
+            if remaining is not None and not conn.dialect.is_mariadb and statement.startswith("SELECT "):
+                milliseconds = max(1, math.ceil(remaining * 1000))
+                statement = f"SELECT /*+ MAX_EXECUTION_TIME({milliseconds}) */ {statement[7:]}"
+            return statement, parameters
+
+
+class DeadlineSession(AsyncSession):
+    """
+    Async session whose database calls are bounded by the request deadline.
+
+    A call made after the deadline fails at once. A statement stopped by the
+    database's own timeout leaves a healthy connection behind. As a backstop,
+    a call still running DB_DEADLINE_GRACE_MS past the deadline is cancelled
+    and its connection is discarded rather than returned to the pool, since
+    it may still be busy with the query. All three raise DeadlineExceeded.
+    Commits are never cancelled once started, so DeadlineExceeded always
+    means that the transaction was not committed.
+    With aiosqlite, discarding the connection still waits for the driver's
+    thread to finish the statement, so the backstop only bounds the calls
+    SQLite can interrupt.
+    """
+
+    async def execute(self, *args, **kwargs):
+        return await self._within_deadline(super().execute(*args, **kwargs))
+
+    async def scalar(self, *args, **kwargs):
+        return await self._within_deadline(super().scalar(*args, **kwargs))
+
+    async def scalars(self, *args, **kwargs):
+        return await self._within_deadline(super().scalars(*args, **kwargs))
+
+    async def get(self, *args, **kwargs):
+        return await self._within_deadline(super().get(*args, **kwargs))
+
+    async def flush(self, *args, **kwargs):
+        return await self._within_deadline(super().flush(*args, **kwargs))
+
+    async def refresh(self, *args, **kwargs):
+        return await self._within_deadline(super().refresh(*args, **kwargs))
+
+    async def commit(self):
+        # Only bounded until it starts: a commit cut short may have happened anyway
+        return await self._within_deadline(super().commit(), cancel=False)
+
+    async def _within_deadline(self, operation: Awaitable[T], cancel: bool = True) -> T:
+        remaining = time_left()
+        if remaining is None:
+            return await operation
+        if remaining <= 0:
+            operation.close()
+            raise DeadlineExceeded()
+
+        timeout = asyncio.timeout(remaining + settings.DB_DEADLINE_GRACE_MS / 1000 if cancel else None)
+        try:
+            async with timeout:
+                return await operation
+        except TimeoutError:
+            if not timeout.expired():
+                raise
+            metrics.increment("deadline.connections_discarded")
+            await self.invalidate()
+            raise DeadlineExceeded() from None
+        except DBAPIError as error:
+            if not is_statement_timeout(error.orig):
+                raise
+            metrics.increment("deadline.statement_timeouts")
+            raise DeadlineExceeded() from error
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware that sets the deadline of each request from REQUEST_DEADLINES_MS.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        seconds = deadline_for(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if seconds is None:
+            await self.app(scope, receive, send)
+            return
+
+        token = request_deadline.set(time.monotonic() + seconds)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_deadline.reset(token)
+
+
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded) -> JSONResponse:
+    """
+    Answer requests whose deadline passed during a database call with 504.
+    """
+    metrics.increment("deadline.exceeded")
+    return JSONResponse(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        content={"detail": "The request took too long and was abandoned, please retry"}
+    )
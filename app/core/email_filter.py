@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from typing import Optional
+
+from app.core.config import settings
+from app.core.database import PrimarySessionLocal
+from app.repositories.user_repository import UserRepository
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Bloom filter over strings.
+
+    Answers "definitely not added" or "possibly added"; the false positive rate
+    stays at or below error_rate until more than capacity items are added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        """
+        Size the filter.
+
+        Args:
+            capacity (int): Expected number of items.
+            error_rate (float): Target false positive rate at that capacity.
+        """
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _hashes(self, item: str):
+        # Double hashing: derive all positions from one 128-bit digest
+        digest = int.from_bytes(hashlib.blake2b(item.encode(), digest_size=16).digest(), "little")
+        return digest & 0xFFFFFFFFFFFFFFFF, (digest >> 64) | 1
+
+    def add(self, item: str) -> None:
+        h1, h2 = self._hashes(item)
+        bits, size = self.bits, self.size
+        for _ in range(self.hash_count):
+            position = h1 % size
+            bits[position >> 3] |= 1 << (position & 7)
+            h1 += h2
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        h1, h2 = self._hashes(item)
+        bits, size = self.bits, self.size
+        for _ in range(self.hash_count):
+            position = h1 % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+            h1 += h2
+        return True
+
+
+class RegisteredEmailFilter:
+    """
+    In-memory filter of registered emails, used to skip database lookups for unknown emails.
+
+    The filter is loaded by streaming the users table and updated on signup.
+    Users are only ever added, so the filter also tracks the highest user ID it
+    has loaded. Before answering "unknown" it catches up on users created
+    since then (e.g. by other workers), unless it already did so within
+    EMAIL_FILTER_MAX_STALENESS_MS; concurrent catch-ups are coalesced into a
+    single query. IDs are assigned at insert but may commit out of order, so a
+    user with a lower ID can appear after a higher one was read; each catch-up
+    therefore re-reads a window of IDs below the highest one.
+    """
+
+    # User IDs re-read on every catch-up to find users committed out of ID order
+    OVERLAP = 100
+
+    def __init__(self, capacity: int, error_rate: float):
+        """
+        Initialize an empty, not yet loaded filter.
+
+        Args:
+            capacity (int): Expected number of users.
+            error_rate (float): Target false positive rate.
+        """
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.ready = False
+        # Highest user ID in the filter; users below it may still be committing
+        self.max_user_id = 0
+        self._synced_at = 0.0
+        self._sync_lock = asyncio.Lock()
+        self._pending_sync: Optional[asyncio.Future] = None
+
+    @staticmethod
+    def _key(email: str) -> str:
+        # Email lookups may be case-insensitive in the database, so fold case here too
+        return email.lower()
+
+    def add(self, email: str) -> None:
+        """
+        Add a newly registered email.
+
+        Args:
+            email (str): The email address.
+        """
+        self.bloom.add(self._key(email))
+
+    def may_contain(self, email: str) -> bool:
+        """
+        Check the filter without contacting the database.
+
+        Args:
+            email (str): The email address.
+
+        Returns:
+            bool: False only if the email was definitely not registered when the filter last synced.
+        """
+        return not self.ready or self._key(email) in self.bloom
+
+    async def may_exist(self, email: str) -> bool:
+        """
+        Check whether an email may be registered, catching up on new users if needed.
+
+        Args:
+            email (str): The email address.
+
+        Returns:
+            bool: False only if no user with this email existed when the filter last caught
+                up, at most EMAIL_FILTER_MAX_STALENESS_MS ago.
+        """
+        if self.may_contain(email):
+            return True
+        staleness = time.monotonic() - self._synced_at
+        if staleness * 1000 > settings.EMAIL_FILTER_MAX_STALENESS_MS:
+            await self.sync()
+        return self.may_contain(email)
+
+    async def load(self, batch_size: int) -> None:
+        """
+        Stream the users table into the filter and mark it ready.
+
+        Args:
+            batch_size (int): Users read per query.
+        """
+        await self._read_new_users(batch_size)
+        self.ready = True
+        logger.info("Registered email filter loaded with %s users", self.bloom.count)
+
+    async def sync(self) -> None:
+        """
+        Read users created since the last load or sync.
+
+        Callers that arrive while a sync is waiting to start join it; its query
+        starts after they arrived, so they see every user committed before that.
+        """
+        if self._pending_sync is None:
+            self._pending_sync = asyncio.ensure_future(self._run_sync())
+        await asyncio.shield(self._pending_sync)
+
+    async def _run_sync(self) -> None:
+        async with self._sync_lock:
+            self._pending_sync = None
+            await self._read_new_users(settings.EMAIL_FILTER_LOAD_BATCH_SIZE)
+
+    async def _read_new_users(self, batch_size: int) -> None:
+        started = time.monotonic()
+        after_id = max(0, self.max_user_id - self.OVERLAP)
+        async with PrimarySessionLocal() as session:
+            repository = UserRepository(session)
+            while True:
+                users = await repository.get_emails_after(after_id, batch_size)
+                for _, email in users:
+                    if self._key(email) not in self.bloom:
+                        self.add(email)
+                if users:
+                    after_id = users[-1][0]
+                if len(users) < batch_size:
+                    break
+        self.max_user_id = max(self.max_user_id, after_id)
+        self._synced_at = started
+
+
+registered_emails = RegisteredEmailFilter(
+    settings.EMAIL_FILTER_EXPECTED_USERS,
+    settings.EMAIL_FILTER_FALSE_POSITIVE_RATE,
+)
@@ -0,0 +1,438 @@
+import asyncio
+import hashlib
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import PrimarySessionLocal
+from app.core.metrics import metrics
+from app.repositories.idempotency_key_repository import IdempotencyKeyRepository
+
+
+class IdempotencyStore(ABC):
+    """
+    Storage interface for the responses of requests sent with an Idempotency-Key.
+
+    The database store is shared by all workers. The in-memory store only
+    recognizes retries that land on the worker that handled the original
+    request, so it is only for a single worker.
+    """
+
+    @abstractmethod
+    async def reserve(self, key: bytes, fingerprint: bytes) -> Optional[Tuple[bytes, Optional[bytes]]]:
+        """
+        Claim a key for a new request, unless it is already known.
+
+        Args:
+            key (bytes): Digest of the scoped idempotency key.
+            fingerprint (bytes): Digest of the request payload.
+
+        Returns:
+            Optional[Tuple[bytes, Optional[bytes]]]: None if the key was free and is now held by
+            the caller. Otherwise the existing (fingerprint, response); the response is None
+            while the original request is still in flight.
+        """
+
+    @abstractmethod
+    async def complete(self, key: bytes, response: bytes) -> None:
+        """
+        Record the response of the request holding a key and wake the requests waiting for it.
+
+        Args:
+            key (bytes): Key claimed with reserve.
+            response (bytes): Serialized response.
+        """
+
+    @abstractmethod
+    async def record(self, session: AsyncSession, key: bytes, response: bytes) -> None:
+        """
+        Record the response of the request holding a key in a session's transaction.
+
+        The key is completed when the transaction commits, together with the
+        write the response describes, and stays in flight if it rolls back.
+
+        Args:
+            session (AsyncSession): Session on the primary database.
+            key (bytes): Key claimed with reserve.
+            response (bytes): Serialized response.
+        """
+
+    @abstractmethod
+    async def has_response(self, key: bytes) -> bool:
+        """
+        Check whether the request holding a key has completed.
+
+        Args:
+            key (bytes): Key claimed with reserve.
+
+        Returns:
+            bool: True once a response is recorded.
+        """
+
+    @abstractmethod
+    async def release(self, key: bytes) -> None:
+        """
+        Forget a key whose request failed, so that a retry runs it again.
+
+        Args:
+            key (bytes): Key claimed with reserve.
+        """
+
+    @abstractmethod
+    async def wait(self, key: bytes, timeout: float) -> None:
+        """
+        Wait until the request holding a key completes or is released.
+
+        Args:
+            key (bytes): Key held by an in-flight request.
+            timeout (float): Maximum number of seconds to wait.
+        """
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    """
+    Process-local store holding digests and serialized responses only.
+
+    Every key lives for the same TTL, so insertion order is expiry order and
+    expired keys are dropped from the front. Memory is bounded by max_keys;
+    the oldest keys are forgotten first.
+    """
+
+    def __init__(self, ttl_seconds: float, max_keys: int):
+        """
+        Initialize an empty store.
+
+        Args:
+            ttl_seconds (float): How long a key is remembered.
+            max_keys (int): Maximum number of keys kept.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_keys = max_keys
+        # Structure: {key: [fingerprint, monotonic expiry, response or None while in flight]}
+        self._records: "OrderedDict[bytes, List[Any]]" = OrderedDict()
+        # Structure: {key: event set when the in-flight request finishes}
+        self._in_flight: Dict[bytes, asyncio.Event] = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    async def reserve(self, key: bytes, fingerprint: bytes) -> Optional[Tuple[bytes, Optional[bytes]]]:
+        now = time.monotonic()
+        self._expire(now)
+        record = self._records.get(key)
+        if record is not None:
+            return record[0], record[2]
+        while len(self._records) >= self.max_keys:
+            self._forget(next(iter(self._records)))
+        self._records[key] = [fingerprint, now + self.ttl_seconds, None]
+        self._in_flight[key] = asyncio.Event()
+        return None
+
+    async def complete(self, key: bytes, response: bytes) -> None:
+        self._complete(key, response)
+
+    async def record(self, session: AsyncSession, key: bytes, response: bytes) -> None:
+        session.info.setdefault(_ON_COMMIT, []).append(lambda: self._complete(key, response))
+
+    async def has_response(self, key: bytes) -> bool:
+        record = self._records.get(key)
+        return record is not None and record[2] is not None
+
+    async def release(self, key: bytes) -> None:
+        self._forget(key)
+
+    async def wait(self, key: bytes, timeout: float) -> None:
+        event = self._in_flight.get(key)
+        if event is None:
+            return
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _expire(self, now: float) -> None:
+        records = self._records
+        while records:
+            key, record = next(iter(records.items()))
+            if record[1] > now:
+                break
+            self._forget(key)
+
+    def _complete(self, key: bytes, response: bytes) -> None:
+        record = self._records.get(key)
+        if record is not None:
+            record[2] = response
+        event = self._in_flight.pop(key, None)
+        if event is not None:
+            event.set()
+
+    def _forget(self, key: bytes) -> None:
+        self._records.pop(key, None)
+        event = self._in_flight.pop(key, None)
+        if event is not None:
+            event.set()
+
+
+# Session.info entry holding the in-memory completions to run if the transaction commits
+_ON_COMMIT = "idempotency_on_commit"
+
+
+@event.listens_for(Session, "after_commit")
+def _complete_recorded_keys(session: Session) -> None:
+    for complete in session.info.pop(_ON_COMMIT, ()):
+        complete()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_recorded_keys(session: Session) -> None:
+    session.info.pop(_ON_COMMIT, None)
+
+
+class DatabaseIdempotencyStore(IdempotencyStore):
+    """
+    Store backed by the idempotency_keys table on the primary database.
+
+    Claiming a key is an insert, so the primary key decides between
+    concurrent requests on any worker. Waiting polls the row. A request that
+    is still in flight after lease_seconds is presumed dead (e.g. its worker
+    crashed), and a retry takes its key over.
+    """
+
+    POLL_SECONDS = 0.05
+
+    def __init__(self, ttl_seconds: float, lease_seconds: float):
+        """
+        Initialize the store.
+
+        Args:
+            ttl_seconds (float): How long a key is remembered.
+            lease_seconds (float): How long a key stays claimed by a request that hasn't finished.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+
+    async def reserve(self, key: bytes, fingerprint: bytes) -> Optional[Tuple[bytes, Optional[bytes]]]:
+        async with PrimarySessionLocal() as session:
+            repository = IdempotencyKeyRepository(session)
+            while True:
+                now = datetime.utcnow()
+                locked_until = now + timedelta(seconds=self.lease_seconds)
+                expires_at = now + timedelta(seconds=self.ttl_seconds)
+                if await repository.insert(key, fingerprint, locked_until, expires_at):
+                    return None
+                if await repository.take_over(key, fingerprint, now, locked_until, expires_at):
+                    return None
+                record = await repository.get(key)
+                # Otherwise released in the meantime: try to claim it again
+                if record is not None:
+                    return record.fingerprint, record.response
+
+    async def complete(self, key: bytes, response: bytes) -> None:
+        async with PrimarySessionLocal() as session:
+            await IdempotencyKeyRepository(session).complete(key, response)
+
+    async def record(self, session: AsyncSession, key: bytes, response: bytes) -> None:
+        await IdempotencyKeyRepository(session).record(key, response)
+
+    async def has_response(self, key: bytes) -> bool:
+        async with PrimarySessionLocal() as session:
+            record = await IdempotencyKeyRepository(session).get(key)
+        return record is not None and record.response is not None
+
+    async def release(self, key: bytes) -> None:
+        async with PrimarySessionLocal() as session:
+            await IdempotencyKeyRepository(session).release(key)
+
+    async def wait(self, key: bytes, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(min(self.POLL_SECONDS, max(0.0, deadline - time.monotonic())))
+            # A short session per poll, so waiting doesn't hold a pooled connection
+            async with PrimarySessionLocal() as session:
+                record = await IdempotencyKeyRepository(session).get(key)
+            if record is None or record.response is not None:
+                return
+
+
+class IdempotencyClaim:
+    """
+    A key held by the request running the operation.
+
+    The operation records its result with record, in the transaction of the
+    write it reports, so the key can't be released once that write committed.
+    An operation whose write commits elsewhere, e.g. a post on another shard,
+    reports that with written.
+    """
+
+    def __init__(self, store: IdempotencyStore, key: bytes):
+        """
+        Initialize a claim with nothing recorded.
+
+        Args:
+            store (IdempotencyStore): Store holding the key.
+            key (bytes): Key claimed with reserve.
+        """
+        self.store = store
+        self.key = key
+        self.recorded = False
+        self.written: Optional[Any] = None
+
+    async def record(self, session: AsyncSession, result: Any) -> None:
+        """
+        Record the result in the session's transaction, before it commits.
+
+        Args:
+            session (AsyncSession): Session on the primary database.
+            result (Any): JSON-serializable result.
+        """
+        await self.store.record(session, self.key, _serialize(result))
+        self.recorded = True
+
+    def wrote(self, result: Any) -> None:
+        """
+        Note that the write committed in a transaction other than the recording one.
+
+        Args:
+            result (Any): JSON-serializable result.
+        """
+        self.written = result
+
+
+def _serialize(result: Any) -> bytes:
+    return json.dumps(result, separators=(",", ":")).encode()
+
+
+def build_idempotency_store(name: str) -> IdempotencyStore:
+    """
+    Create the idempotency store selected in the settings.
+
+    Args:
+        name (str): "database" or "memory".
+
+    Returns:
+        IdempotencyStore: The store.
+
+    Raises:
+        ValueError: If the name is unknown.
+    """
+    if name == "database":
+        return DatabaseIdempotencyStore(settings.IDEMPOTENCY_KEY_TTL_SECONDS, settings.IDEMPOTENCY_LEASE_SECONDS)
+    if name == "memory":
+        return InMemoryIdempotencyStore(settings.IDEMPOTENCY_KEY_TTL_SECONDS, settings.IDEMPOTENCY_MAX_KEYS)
+    raise ValueError(f"Unknown idempotency store: {name}")
+
+
+class IdempotentRequests:
+    """
+    Runs each idempotent operation at most once per key.
+
+    The first request with a key runs the operation and its JSON result is
+    recorded. A retry with the same key and payload gets the recorded result
+    without running the operation again; while the original is still running,
+    the retry waits for it. Reusing a key with a different payload is an error.
+    A failed operation's key is released, so it can be retried, only when its
+    write is known not to have committed; otherwise the key is kept, and a
+    retry gets the recorded result or, once the lease has run out, runs again.
+    """
+
+    def __init__(self, store: IdempotencyStore, wait_seconds: float):
+        """
+        Initialize the coordinator.
+
+        Args:
+            store (IdempotencyStore): Where keys and results are recorded.
+            wait_seconds (float): How long a retry waits for the original request to finish.
+        """
+        self.store = store
+        self.wait_seconds = wait_seconds
+        if isinstance(store, InMemoryIdempotencyStore):
+            metrics.register_gauge("idempotency.keys", lambda: len(store))
+
+    async def execute(
+        self,
+        scope: str,
+        key: str,
+        payload: bytes,
+        operation: Callable[[IdempotencyClaim], Awaitable[Any]],
+    ) -> Tuple[Any, bool]:
+        """
+        Run an operation unless a request with the same key already did.
+
+        Args:
+            scope (str): Namespace of the key, e.g. the route and user, so clients can't collide.
+            key (str): The client's Idempotency-Key.
+            payload (bytes): Request body, compared between the original request and retries.
+            operation (Callable[[IdempotencyClaim], Awaitable[Any]]): Coroutine function returning a
+                JSON-serializable result. It should record the result with the claim in the
+                transaction of its write; results it doesn't record are recorded once it returns.
+
+        Returns:
+            Tuple[Any, bool]: The result, and whether it is a replay of an earlier request's.
+
+        Raises:
+            HTTPException: 422 if the key was used with a different payload, 409 if the
+                original request is still running after the wait.
+        """
+        store_key = hashlib.blake2b(f"{scope}\0{key}".encode(), digest_size=16).digest()
+        fingerprint = hashlib.blake2b(payload, digest_size=16).digest()
+        deadline = time.monotonic() + self.wait_seconds
+
+        while True:
+            existing = await self.store.reserve(store_key, fingerprint)
+            if existing is None:
+                break
+            stored_fingerprint, response = existing
+            if stored_fingerprint != fingerprint:
+                metrics.increment("idempotency.mismatch")
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used with a different request"
+                )
+            if response is not None:
+                metrics.increment("idempotency.replayed")
+                return json.loads(response), True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                metrics.increment("idempotency.conflict")
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress",
+                    headers={"Retry-After": "1"}
+                )
+            metrics.increment("idempotency.waited")
+            await self.store.wait(store_key, remaining)
+
+        claim = IdempotencyClaim(self.store, store_key)
+        try:
+            result = await operation(claim)
+        except BaseException:
+            await self._settle_failure(claim)
+            raise
+        if not claim.recorded:
+            await self.store.complete(store_key, _serialize(result))
+        return result, False
+
+    async def _settle_failure(self, claim: IdempotencyClaim) -> None:
+        # Checked on the primary: the commit may have gone through before the failure
+        if claim.recorded and await self.store.has_response(claim.key):
+            return
+        if claim.written is not None:
+            # Failing here too leaves the key in flight until its lease runs out
+            await self.store.complete(claim.key, _serialize(claim.written))
+            return
+        await self.store.release(claim.key)
+
+
+post_idempotency = IdempotentRequests(
+    build_idempotency_store(settings.IDEMPOTENCY_STORE),
+    settings.IDEMPOTENCY_WAIT_SECONDS,
+)
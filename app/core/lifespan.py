@@ -0,0 +1,130 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from itertools import chain, zip_longest
+
+from fastapi import FastAPI
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core import tasks
+from app.core.cache import clear_cache
+from app.core.config import settings
+from app.core.database import engine, replicas, AsyncSessionLocal, warm_up_pool, check_database
+from app.core.email_filter import registered_emails
+from app.core.logs import log_pipeline
+from app.core.purge import post_purger
+from app.core.revocation import token_revocations
+from app.core.sharding import ShardSessions, shard_router
+from app.repositories.post_repository import PostRepository
+from app.services.post_service import PostService
+
+logger = logging.getLogger(__name__)
+
+# Delay between readiness probe attempts while the database is unreachable
+WARMUP_RETRY_SECONDS = 2.0
+
+
+async def warm_post_cache(user_count: int) -> None:
+    """
+    Pre-populate the post list cache for the most recently active users.
+
+    Args:
+        user_count (int): Number of users whose posts to cache.
+    """
+    async with AsyncSessionLocal() as session, ShardSessions(session) as shards:
+        # Take the most active users of every shard in turn
+        per_shard = [
+            await PostRepository(shards.get(shard)).get_recently_active_user_ids(user_count)
+            for shard in range(len(shard_router.engines))
+        ]
+        user_ids = [user_id for user_id in chain.from_iterable(zip_longest(*per_shard)) if user_id is not None]
+        post_service = PostService(session, shards)
+        for user_id in user_ids[:user_count]:
+            await post_service.refresh_cache(user_id)
+
+
+async def warm_up(app: FastAPI) -> None:
+    """
+    Warm up the connection pool and cache, then mark the application as ready.
+
+    The readiness probe is retried until the database answers, so a worker that
+    starts before the database keeps reporting not ready instead of crashing.
+
+    Args:
+        app (FastAPI): The application being started.
+    """
+    while True:
+        try:
+            await warm_up_pool(engine, settings.DB_POOL_WARMUP_CONNECTIONS)
+            await check_database(engine)
+            break
+        except (SQLAlchemyError, OSError) as exc:
+            logger.warning("Database not ready, retrying: %s", exc)
+            await asyncio.sleep(WARMUP_RETRY_SECONDS)
+
+    # Replicas that fail their first check get reads once a later check passes
+    await replicas.check()
+
+    # Load the revoked tokens before reporting ready
+    try:
+        await token_revocations.sync()
+    except SQLAlchemyError:
+        logger.exception("Loading revoked tokens failed")
+
+    # Until loaded, the email filter answers "maybe" for everything
+    if settings.EMAIL_FILTER_ENABLED:
+        tasks.spawn(registered_emails.load(settings.EMAIL_FILTER_LOAD_BATCH_SIZE), name="email-filter-load")
+
+    if settings.CACHE_WARMUP_USERS > 0:
+        try:
+            await warm_post_cache(settings.CACHE_WARMUP_USERS)
+        except SQLAlchemyError:
+            logger.exception("Post cache warm-up failed")
+
+    app.state.ready = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Own the database engine and cache for the lifetime of the application.
+
+    On startup the warm-up runs in the background while /ready reports not ready.
+    On shutdown pending background work is flushed, the cache is cleared, the
+    engine's pooled connections are closed and queued log records are written.
+
+    Args:
+        app (FastAPI): The application being started.
+    """
+    log_pipeline.start()
+    app.state.ready = False
+    warmup_task = tasks.spawn(warm_up(app), name="warm-up")
+    revocation_task = tasks.spawn(
+        token_revocations.run(settings.TOKEN_REVOCATION_SYNC_SECONDS),
+        name="token-revocation-sync",
+    )
+    purge_task = None
+    if settings.POST_PURGE_ENABLED:
+        purge_task = tasks.spawn(post_purger.run(), name="post-purger")
+    replica_check_task = None
+    if replicas.engines:
+        replica_check_task = tasks.spawn(
+            replicas.run(settings.DB_REPLICA_HEALTH_CHECK_SECONDS),
+            name="replica-health-check",
+        )
+
+    yield
+
+    app.state.ready = False
+    warmup_task.cancel()
+    revocation_task.cancel()
+    if purge_task is not None:
+        purge_task.cancel()
+    if replica_check_task is not None:
+        replica_check_task.cancel()
+    await tasks.drain(settings.GRACEFUL_SHUTDOWN_SECONDS)
+    clear_cache()
+    await replicas.dispose()
+    await shard_router.dispose()
+    await engine.dispose()
+    log_pipeline.stop()
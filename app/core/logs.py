@@ -0,0 +1,229 @@
+import json
+import logging
+import queue
+import random
+import re
+import secrets
+import sys
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, TextIO
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# ID of the request being handled, attached to every record logged for it
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+access_logger = logging.getLogger("app.access")
+
+# Attributes every record has; any other attribute was passed with extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+# Request IDs accepted from the X-Request-ID header
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Stamps records with the current request ID, on the thread that logged them.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get() or "-"
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of the records of high-volume loggers.
+
+    A rate applies to a logger and its children. Warnings and errors are
+    always kept, as are the records of loggers without a rate.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        """
+        Initialize the filter.
+
+        Args:
+            rates (Dict[str, float]): Fraction of records kept, by logger name.
+        """
+        super().__init__()
+        self.rates = rates
+        # Structure: {logger name: rate}, resolved once per logger
+        self._resolved: Dict[str, float] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._resolved.get(record.name)
+        if rate is None:
+            rate = self._resolved[record.name] = self._rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+    def _rate_for(self, name: str) -> float:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Queue handler that drops records when the queue is full.
+
+    The standard handler reports a full queue through handleError, which
+    writes a traceback to stderr from the logging thread, i.e. the event loop.
+    """
+
+    def __init__(self, records: queue.Queue):
+        super().__init__(records)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Wait for room on shutdown rather than failing on a full queue
+        self.queue.put(self._sentinel)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line.
+
+    Fields passed with extra= are included as top-level keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", "-") != "-":
+            entry["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class LogPipeline:
+    """
+    Moves log records off the event loop.
+
+    Loggers only put records on a bounded queue; a background thread formats
+    and writes them. If the output can't keep up, the queue fills and new
+    records are dropped and counted, so logging never blocks request handling.
+    """
+
+    def __init__(self):
+        self.handler: Optional[DroppingQueueHandler] = None
+        self.listener: Optional[QueueListener] = None
+        metrics.register_gauge("logging.dropped", lambda: self.handler.dropped if self.handler else 0)
+        metrics.register_gauge("logging.queued", lambda: self.handler.queue.qsize() if self.handler else 0)
+
+    def start(self, stream: Optional[TextIO] = None) -> None:
+        """
+        Route the records of all loggers through the queue.
+
+        Args:
+            stream (Optional[TextIO]): Where records are written; stdout by default.
+        """
+        self.stop()
+
+        writer = logging.StreamHandler(stream or sys.stdout)
+        if settings.LOG_FORMAT == "json":
+            writer.setFormatter(JsonFormatter())
+        else:
+            writer.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"))
+
+        self.handler = DroppingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+        self.handler.addFilter(RequestIdFilter())
+        self.handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+        root = logging.getLogger()
+        root.addHandler(self.handler)
+        root.setLevel(settings.LOG_LEVEL)
+        if settings.DB_ECHO:
+            logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+
+        self.listener = _Listener(self.handler.queue, writer)
+        self.listener.start()
+
+    def stop(self) -> None:
+        """
+        Detach the queue and write out the records still in it.
+        """
+        if self.handler is not None:
+            logging.getLogger().removeHandler(self.handler)
+        if self.listener is not None:
+            self.listener.stop()
+        self.listener = None
+
+
+log_pipeline = LogPipeline()
+
+
+class AccessLogMiddleware:
+    """
+    ASGI middleware that assigns each request an ID and writes one access log record for it.
+
+    The ID is taken from a well-formed X-Request-ID header when the client (or
+    a proxy) sends one, and is returned in the X-Request-ID response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(b"x-request-id", b"").decode("latin-1")
+        current_id = incoming if _VALID_REQUEST_ID.fullmatch(incoming) else secrets.token_hex(8)
+        token = request_id.set(current_id)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", current_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            client = scope.get("client")
+            access_logger.log(
+                logging.WARNING if status_code >= 500 else logging.INFO,
+                "%s %s %s",
+                scope["method"],
+                scope["path"],
+                status_code,
+                extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route.path if route is not None else None,
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                    "client": client[0] if client else None,
+                },
+            )
+            request_id.reset(token)
@@ -0,0 +1,245 @@
+import random
+import re
+import sys
+import tracemalloc
+from collections import deque
+from typing import Any, Dict, List, Tuple
+
+from app.core.metrics import metrics
+
+# Trailing IDs are stripped from cache keys to group them, e.g. user_posts_42 -> user_posts_
+_KEY_ID = re.compile(r"\d+$")
+
+
+def deep_sizeof(obj: Any) -> int:
+    """
+    Estimate the memory held by an object and everything it references.
+
+    Follows containers, instance dictionaries and slots, counting each object
+    once. Classes, modules and functions are not followed.
+
+    Args:
+        obj (Any): The object to measure.
+
+    Returns:
+        int: Size in bytes.
+    """
+    seen = set()
+    pending = deque([obj])
+    total = 0
+
+    while pending:
+        current = pending.pop()
+        if id(current) in seen or isinstance(current, type):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+
+        if isinstance(current, (str, bytes, bytearray, int, float, bool)) or current is None:
+            continue
+        if isinstance(current, dict):
+            pending.extend(current.keys())
+            pending.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset, deque)):
+            pending.extend(current)
+        else:
+            instance_dict = getattr(current, "__dict__", None)
+            if instance_dict is not None:
+                pending.append(instance_dict)
+            for slot in getattr(type(current), "__slots__", ()):
+                if hasattr(current, slot):
+                    pending.append(getattr(current, slot))
+
+    return total
+
+
+def cache_footprint(cache: Dict[str, Tuple[Any, float, float]]) -> Dict[str, Any]:
+    """
+    Measure the response cache, broken down by key prefix.
+
+    Walks every entry, so it takes time proportional to the cached data.
+
+    Args:
+        cache (Dict[str, Tuple[Any, float, float]]): The cache dictionary from app.core.cache.
+
+    Returns:
+        Dict[str, Any]: Entry count and deep size, in total and per key prefix.
+    """
+    by_prefix: Dict[str, Dict[str, int]] = {}
+    for key, entry in list(cache.items()):
+        group = by_prefix.setdefault(_KEY_ID.sub("", key), {"entries": 0, "bytes": 0})
+        group["entries"] += 1
+        group["bytes"] += sys.getsizeof(key) + deep_sizeof(entry)
+
+    return {
+        "entries": sum(group["entries"] for group in by_prefix.values()),
+        "bytes": sum(group["bytes"] for group in by_prefix.values()) + sys.getsizeof(cache),
+        "by_prefix": by_prefix,
+    }
+
+
+class RouteMemoryProfile:
+    """
+    Allocation growth attributed to one route, from sampled snapshots.
+
+    Attributes:
+        samples (int): Number of requests sampled.
+        growth_bytes (int): Net memory allocated and still held after the sampled requests.
+        sites (Dict[str, int]): Net growth per allocation site (file:line).
+    """
+    __slots__ = ("samples", "growth_bytes", "sites")
+
+    def __init__(self):
+        self.samples = 0
+        self.growth_bytes = 0
+        self.sites: Dict[str, int] = {}
+
+    def add(self, differences: List[tracemalloc.StatisticDiff], max_sites: int) -> None:
+        self.samples += 1
+        for difference in differences:
+            self.growth_bytes += difference.size_diff
+            if difference.size_diff:
+                frame = difference.traceback[0]
+                site = f"{frame.filename}:{frame.lineno}"
+                self.sites[site] = self.sites.get(site, 0) + difference.size_diff
+        if len(self.sites) > max_sites:
+            # Keep the sites that grew most
+            self.sites = dict(sorted(self.sites.items(), key=lambda item: -item[1])[:max_sites])
+
+    def as_dict(self, top: int) -> Dict[str, Any]:
+        sites = sorted(self.sites.items(), key=lambda item: -item[1])[:top]
+        return {
+            "samples": self.samples,
+            "growth_bytes": self.growth_bytes,
+            "top_sites": [{"site": site, "growth_bytes": size} for site, size in sites],
+        }
+
+
+class MemoryProfilerMiddleware:
+    """
+    ASGI middleware recording memory use per route with tracemalloc.
+
+    tracemalloc counts the whole process, so each measure also includes the
+    allocations of any request that overlaps. Two are recorded per request:
+
+    - memory.request_allocated_bytes.<route>: memory allocated between the
+      request's start and the start of its response, i.e. what it holds once
+      the response is built. Recorded for every request; under concurrency it
+      is blurred by the overlapping requests, so read it over many samples.
+    - memory.request_peak_bytes.<route>: the peak above the start. The peak
+      can only be reset for one request at a time, so it is only recorded
+      for requests that ran alone, and then is exact.
+
+    A sample of the requests is also bracketed with snapshots to attribute the
+    memory they leave allocated to routes and allocation sites; again,
+    concurrent requests blur the attribution, which only becomes meaningful
+    over many samples.
+
+    Tracing slows every allocation down; enable it only while investigating.
+    """
+
+    # Allocation sites kept per route
+    MAX_SITES = 200
+
+    def __init__(self, app, sample_rate: float, frames: int = 1):
+        """
+        Start tracing allocations.
+
+        Args:
+            app: The ASGI application.
+            sample_rate (float): Fraction of requests bracketed with snapshots.
+            frames (int): Stack frames stored per allocation.
+        """
+        self.app = app
+        self.sample_rate = sample_rate
+        self.in_flight = 0
+        # Requests started so far, to tell whether another one overlapped
+        self.started = 0
+        self.routes: Dict[str, RouteMemoryProfile] = {}
+        self._filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ]
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        memory_profiler.middleware = self
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        alone = self.in_flight == 0
+        if alone:
+            tracemalloc.reset_peak()
+        self.in_flight += 1
+        self.started += 1
+        ticket = self.started
+        start, _ = tracemalloc.get_traced_memory()
+        before = None
+        if random.random() < self.sample_rate:
+            before = tracemalloc.take_snapshot().filter_traces(self._filters)
+
+        allocated = None
+
+        async def send_wrapper(message):
+            nonlocal allocated
+            if message["type"] == "http.response.start":
+                allocated = tracemalloc.get_traced_memory()[0] - start
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.in_flight -= 1
+            _, peak = tracemalloc.get_traced_memory()
+            route = scope.get("route")
+            name = f"{scope['method']} {route.path if route is not None else 'unmatched'}"
+            if allocated is not None:
+                metrics.observe(f"memory.request_allocated_bytes.{name}", max(0, allocated))
+            # No other request started while this one ran, so the peak is its own
+            if alone and self.started == ticket:
+                metrics.observe(f"memory.request_peak_bytes.{name}", max(0, peak - start))
+            if before is not None:
+                after = tracemalloc.take_snapshot().filter_traces(self._filters)
+                profile = self.routes.get(name)
+                if profile is None:
+                    profile = self.routes[name] = RouteMemoryProfile()
+                profile.add(after.compare_to(before, "lineno"), self.MAX_SITES)
+
+
+class MemoryProfiler:
+    """
+    Entry point of the debug endpoint to the memory profiling data.
+    """
+
+    def __init__(self):
+        self.middleware = None
+
+    def report(self, cache: Dict[str, Tuple[Any, float, float]], top: int = 10) -> Dict[str, Any]:
+        """
+        Build the memory report.
+
+        Args:
+            cache (Dict[str, Tuple[Any, float, float]]): The cache dictionaries from app.core.cache,
+                merged.
+            top (int): Allocation sites listed per route.
+
+        Returns:
+            Dict[str, Any]: Traced memory, cache footprint and per-route growth.
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        routes = self.middleware.routes if self.middleware is not None else {}
+        return {
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "cache": cache_footprint(cache),
+            "routes": {
+                name: profile.as_dict(top)
+                for name, profile in sorted(routes.items(), key=lambda item: -item[1].growth_bytes)
+            },
+        }
+
+
+memory_profiler = MemoryProfiler()
@@ -0,0 +1,90 @@
+from typing import Callable, Dict, Any
+
+
+class Summary:
+    """
+    Running count, sum and maximum of observed values.
+    """
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "avg": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+        }
+
+
+class Metrics:
+    """
+    Process-local metrics registry.
+
+    Counters and summaries are updated in place on the hot path; gauges are
+    callbacks evaluated only when a snapshot is taken.
+    """
+
+    def __init__(self):
+        self.counters: Dict[str, float] = {}
+        self.summaries: Dict[str, Summary] = {}
+        self.gauges: Dict[str, Callable[[], float]] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """
+        Increase a counter.
+
+        Args:
+            name (str): Counter name.
+            value (float): Amount to add.
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float) -> None:
+        """
+        Record a value in a summary.
+
+        Args:
+            name (str): Summary name.
+            value (float): Observed value.
+        """
+        summary = self.summaries.get(name)
+        if summary is None:
+            summary = self.summaries[name] = Summary()
+        summary.observe(value)
+
+    def register_gauge(self, name: str, callback: Callable[[], float]) -> None:
+        """
+        Register a gauge whose value is read when a snapshot is taken.
+
+        Args:
+            name (str): Gauge name.
+            callback (Callable[[], float]): Function returning the current value.
+        """
+        self.gauges[name] = callback
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the current value of every metric.
+
+        Returns:
+            Dict[str, Any]: Counters, gauges and summaries by name.
+        """
+        return {
+            "counters": dict(self.counters),
+            "gauges": {name: callback() for name, callback in self.gauges.items()},
+            "summaries": {name: summary.as_dict() for name, summary in self.summaries.items()},
+        }
+
+
+metrics = Metrics()
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.sharding import shard_router
+from app.repositories.post_repository import PostRepository
+
+logger = logging.getLogger(__name__)
+
+
+class PostPurger:
+    """
+    Hard-deletes soft-deleted posts in the background.
+
+    Deleting a post only marks it with a tombstone. The purger removes the
+    tombstoned rows in small batches, one short transaction each, with a
+    pause in between. A batch only runs while the worker's connection pool to
+    the shard is nearly idle, so purging waits for quiet periods instead of
+    competing with requests for connections and locks.
+
+    Every worker runs a purger. Two may pick the same batch, which only wastes
+    a query.
+    """
+
+    def __init__(self, batch_size: int, pause_seconds: float, idle_seconds: float, max_busy_connections: int):
+        """
+        Initialize the purger.
+
+        Args:
+            batch_size (int): Posts deleted per transaction.
+            pause_seconds (float): Delay between batches while tombstones are waiting.
+            idle_seconds (float): Delay between checks once no tombstones are left.
+            max_busy_connections (int): Batches run only while at most this many of the
+                shard's pooled connections are checked out.
+        """
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.idle_seconds = idle_seconds
+        self.max_busy_connections = max_busy_connections
+        # Structure: {shard: tombstones waiting}, counted when a shard runs out of
+        # full batches and decremented as batches are purged in between
+        self.backlog: Dict[int, int] = {}
+        metrics.register_gauge("posts.purge_backlog", lambda: sum(self.backlog.values()))
+
+    def is_quiet(self, shard: int) -> bool:
+        """
+        Check whether a shard's connection pool is idle enough to purge.
+
+        Args:
+            shard (int): Shard index.
+
+        Returns:
+            bool: True if few enough connections are in use.
+        """
+        pool = shard_router.engines[shard].pool
+        checked_out = getattr(pool, "checkedout", lambda: 0)()
+        return checked_out <= self.max_busy_connections
+
+    async def purge_batch(self, shard: int) -> Optional[int]:
+        """
+        Purge one batch of tombstones on a shard, unless it is busy.
+
+        Args:
+            shard (int): Shard index.
+
+        Returns:
+            Optional[int]: Number of posts deleted, None if the shard was busy.
+        """
+        if not self.is_quiet(shard):
+            metrics.increment("posts.purge_deferred")
+            return None
+
+        async with shard_router.session(shard) as session:
+            repository = PostRepository(session)
+            purged = await repository.purge_deleted(self.batch_size)
+            if purged < self.batch_size:
+                # Caught up, so counting what is left is cheap
+                self.backlog[shard] = await repository.count_deleted()
+            else:
+                self.backlog[shard] = max(0, self.backlog.get(shard, purged) - purged)
+
+        if purged:
+            metrics.increment("posts.purged", purged)
+        return purged
+
+    async def run(self) -> None:
+        """
+        Purge tombstones on every shard until cancelled.
+        """
+        while True:
+            waiting = False
+            for shard in range(len(shard_router.engines)):
+                try:
+                    purged = await self.purge_batch(shard)
+                except SQLAlchemyError as exc:
+                    logger.warning("Purging deleted posts on shard %s failed: %r", shard, exc)
+                    continue
+                # A busy shard with a backlog is retried after the short pause
+                waiting = waiting or purged == self.batch_size or (purged is None and self.backlog.get(shard, 1) > 0)
+            await asyncio.sleep(self.pause_seconds if waiting else self.idle_seconds)
+
+
+post_purger = PostPurger(
+    settings.POST_PURGE_BATCH_SIZE,
+    settings.POST_PURGE_PAUSE_SECONDS,
+    settings.POST_PURGE_IDLE_SECONDS,
+    settings.POST_PURGE_MAX_BUSY_CONNECTIONS,
+)
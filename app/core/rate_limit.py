@@ -0,0 +1,150 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage interface for token buckets.
+
+    The in-memory backend keeps limits per worker process. Implement this
+    interface over a shared store (e.g. Redis with an atomic script) to enforce
+    limits across all workers.
+    """
+
+    @abstractmethod
+    async def consume(self, buckets: List[Tuple[str, float, float]], cost: float = 1.0) -> float:
+        """
+        Take tokens from every bucket, or from none of them.
+
+        A request rejected by one bucket must not use up the others, so the
+        check and the take are a single atomic step.
+
+        Args:
+            buckets (List[Tuple[str, float, float]]): (key, rate, capacity) per bucket, where rate
+                is the number of tokens added per second and capacity the burst size.
+            cost (float): Number of tokens to take from each bucket.
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise the longest wait in seconds until every
+                bucket has enough tokens.
+        """
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Token buckets held in a process-local LRU dictionary.
+
+    Memory is bounded by max_buckets: when full, buckets that have refilled
+    completely (and so are equivalent to a new bucket) are dropped first, then
+    the least recently used one.
+    """
+
+    def __init__(self, max_buckets: int):
+        """
+        Initialize the backend.
+
+        Args:
+            max_buckets (int): Maximum number of buckets kept in memory.
+        """
+        self.max_buckets = max_buckets
+        # Structure: {key: [tokens, last_update_monotonic, seconds_to_refill]}
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    async def consume(self, buckets: List[Tuple[str, float, float]], cost: float = 1.0) -> float:
+        return self.take(buckets, cost)
+
+    def take(self, buckets: List[Tuple[str, float, float]], cost: float = 1.0) -> float:
+        """
+        Synchronous version of consume, see RateLimitBackend.consume.
+        """
+        now = time.monotonic()
+        refilled = [self._refill(key, rate, capacity, now) for key, rate, capacity in buckets]
+
+        # Nothing is taken unless every bucket has enough tokens
+        waits = [(cost - bucket[0]) / rate for bucket, (_, rate, _) in zip(refilled, buckets)]
+        retry_after = max(waits, default=0.0)
+        if retry_after > 0:
+            return retry_after
+        for bucket in refilled:
+            bucket[0] -= cost
+        return 0.0
+
+    def _refill(self, key: str, rate: float, capacity: float, now: float) -> List[float]:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_buckets:
+                self._evict(now)
+            bucket = [capacity, now, capacity / rate]
+            self._buckets[key] = bucket
+        else:
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def _evict(self, now: float) -> None:
+        # Buckets are ordered by last use. Drop the least recently used ones while they
+        # have refilled completely, since a new bucket would start full too; stop at the
+        # first that hasn't. If that freed nothing, drop the least recently used anyway.
+        buckets = self._buckets
+        while buckets:
+            key, (tokens, updated, refill) = next(iter(buckets.items()))
+            if now - updated < refill:
+                break
+            del buckets[key]
+        if len(buckets) >= self.max_buckets:
+            buckets.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class TokenBucketLimit:
+    """
+    A rate limit expressed as a sustained rate plus a burst size.
+
+    Attributes:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum burst.
+    """
+
+    def __init__(self, per_minute: int, burst: int):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst)
+
+
+class RateLimiter:
+    """
+    Checks a request against several keyed token-bucket limits at once.
+    """
+
+    def __init__(self, backend: RateLimitBackend, limits: Dict[str, TokenBucketLimit]):
+        """
+        Initialize the limiter.
+
+        Args:
+            backend (RateLimitBackend): Bucket storage.
+            limits (Dict[str, TokenBucketLimit]): Limits by dimension name (e.g. "ip", "email").
+        """
+        self.backend = backend
+        self.limits = limits
+
+    async def hit(self, **keys: str) -> float:
+        """
+        Record one attempt for each dimension.
+
+        The attempt is only counted if every dimension allows it.
+
+        Args:
+            **keys (str): Key per dimension, e.g. ip="1.2.3.4", email="a@b.c".
+
+        Returns:
+            float: 0 if allowed, otherwise the longest wait in seconds before retrying.
+        """
+        buckets = []
+        for dimension, key in keys.items():
+            limit = self.limits[dimension]
+            buckets.append((f"{dimension}:{key}", limit.rate, limit.capacity))
+        return await self.backend.consume(buckets)
@@ -0,0 +1,279 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import text, Select, DateTime, Integer, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import column, table
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# User the current request acts for, set from the access token
+current_user_id: ContextVar[Optional[str]] = ContextVar("current_user_id", default=None)
+
+# Whether reads in the current request must go to the primary
+read_from_primary: ContextVar[bool] = ContextVar("read_from_primary", default=False)
+
+
+@contextmanager
+def primary_reads():
+    """
+    Route the reads made inside the block to the primary.
+    """
+    token = read_from_primary.set(True)
+    try:
+        yield
+    finally:
+        read_from_primary.reset(token)
+
+
+class ReplicaSet:
+    """
+    Read replica engines with health checks and round-robin selection.
+
+    A replica only receives reads after its probe query has succeeded, and
+    stops receiving them as soon as a probe fails.
+    """
+
+    def __init__(self, engines: List[AsyncEngine]):
+        """
+        Initialize with every replica considered unhealthy until checked.
+
+        Args:
+            engines (List[AsyncEngine]): One engine per replica.
+        """
+        self.engines = engines
+        self.healthy: List[AsyncEngine] = []
+        self._next = 0
+        metrics.register_gauge("db.replicas.healthy", lambda: len(self.healthy))
+
+    def choose(self) -> Optional[AsyncEngine]:
+        """
+        Pick the next healthy replica.
+
+        Returns:
+            Optional[AsyncEngine]: A replica engine, or None if none is healthy.
+        """
+        healthy = self.healthy
+        if not healthy:
+            return None
+        self._next = (self._next + 1) % len(healthy)
+        return healthy[self._next]
+
+    async def check(self) -> None:
+        """
+        Probe every replica and update the healthy list.
+        """
+        healthy = []
+        for replica in self.engines:
+            try:
+                async with replica.connect() as connection:
+                    await connection.execute(text("SELECT 1"))
+                healthy.append(replica)
+            except (SQLAlchemyError, OSError) as exc:
+                logger.warning("Read replica %s failed its health check: %s", replica.url.host, exc)
+        self.healthy = healthy
+
+    async def run(self, interval: float) -> None:
+        """
+        Check the replicas periodically until cancelled.
+
+        Args:
+            interval (float): Seconds between checks.
+        """
+        while True:
+            await self.check()
+            await asyncio.sleep(interval)
+
+    async def dispose(self) -> None:
+        for replica in self.engines:
+            await replica.dispose()
+
+
+class WriteTracker(ABC):
+    """
+    Interface for remembering which users wrote recently.
+
+    Reads by a user who wrote within the window go to the primary, so they
+    see their own writes despite replication lag. The in-memory tracker only
+    knows about writes handled by the current worker; the database tracker
+    covers requests that land on any worker or instance.
+    """
+
+    @abstractmethod
+    def record_write(self, user_id: str) -> None:
+        """
+        Remember that a user just committed a write.
+
+        Called synchronously right after the commit, before the request
+        answers, so the user's next request already sees it.
+
+        Args:
+            user_id (str): ID of the user.
+        """
+
+    @abstractmethod
+    async def wrote_recently(self, user_id: str) -> bool:
+        """
+        Check whether a user wrote within the window.
+
+        Args:
+            user_id (str): ID of the user.
+
+        Returns:
+            bool: True if the user's reads must go to the primary.
+        """
+
+
+class InMemoryWriteTracker(WriteTracker):
+    """
+    Per-worker write tracker holding one deadline per user.
+
+    Memory is bounded by max_users; the users whose writes are oldest are
+    forgotten first.
+    """
+
+    def __init__(self, window_seconds: float, max_users: int):
+        """
+        Initialize the tracker.
+
+        Args:
+            window_seconds (float): How long reads stay on the primary after a write.
+            max_users (int): Maximum number of users tracked.
+        """
+        self.window_seconds = window_seconds
+        self.max_users = max_users
+        # Structure: {user_id: monotonic deadline}, oldest write first
+        self._deadlines: "OrderedDict[str, float]" = OrderedDict()
+
+    def record_write(self, user_id: str) -> None:
+        self._deadlines[user_id] = time.monotonic() + self.window_seconds
+        self._deadlines.move_to_end(user_id)
+        while len(self._deadlines) > self.max_users:
+            self._deadlines.popitem(last=False)
+
+    async def wrote_recently(self, user_id: str) -> bool:
+        deadline = self._deadlines.get(user_id)
+        if deadline is None:
+            return False
+        if deadline <= time.monotonic():
+            del self._deadlines[user_id]
+            return False
+        return True
+
+
+# Only the columns the database tracker uses; the User model can't be imported here
+_users = table("users", column("id", Integer), column("last_write_at", DateTime))
+
+
+class DatabaseWriteTracker(WriteTracker):
+    """
+    Write tracker keeping each user's last write time in users.last_write_at on the primary.
+
+    Shared by every worker and instance, at the cost of a primary key lookup
+    on the primary per authenticated request.
+    """
+
+    def __init__(self, target: AsyncEngine, window_seconds: float):
+        """
+        Initialize the tracker.
+
+        Args:
+            target (AsyncEngine): Engine of the primary.
+            window_seconds (float): How long reads stay on the primary after a write.
+        """
+        self.engine = target
+        self.window_seconds = window_seconds
+
+    def record_write(self, user_id: str) -> None:
+        # Runs within the committing session's greenlet, so the synchronous API can be used
+        try:
+            with self.engine.sync_engine.begin() as connection:
+                connection.execute(
+                    update(_users).where(_users.c.id == int(user_id)).values(last_write_at=datetime.utcnow())
+                )
+        except SQLAlchemyError as exc:
+            # The write itself is committed, so the request must not fail now
+            logger.warning("Recording a write by user %s failed: %r", user_id, exc)
+
+    async def wrote_recently(self, user_id: str) -> bool:
+        if not user_id.isdigit():
+            return False
+        async with self.engine.connect() as connection:
+            last_write_at = await connection.scalar(
+                select(_users.c.last_write_at).where(_users.c.id == int(user_id))
+            )
+        return last_write_at is not None and datetime.utcnow() - last_write_at < timedelta(seconds=self.window_seconds)
+
+
+def build_write_tracker(name: str, target: AsyncEngine) -> WriteTracker:
+    """
+    Create the write tracker selected in the settings.
+
+    Args:
+        name (str): "database" or "memory".
+        target (AsyncEngine): Engine of the primary.
+
+    Returns:
+        WriteTracker: The tracker.
+
+    Raises:
+        ValueError: If the name is unknown.
+    """
+    if name == "database":
+        return DatabaseWriteTracker(target, settings.READ_YOUR_WRITES_SECONDS)
+    if name == "memory":
+        return InMemoryWriteTracker(settings.READ_YOUR_WRITES_SECONDS, settings.READ_YOUR_WRITES_MAX_USERS)
+    raise ValueError(f"Unknown write tracker: {name}")
+
+
+def _is_plain_read(clause) -> bool:
+    return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+class RoutingSession(Session):
+    """
+    Session that sends plain reads to a replica and everything else to the primary.
+
+    Writes, flushes and SELECT ... FOR UPDATE go to the session's bind, the
+    primary. Once a session has used the primary, its later reads stay there
+    too, so a transaction never reads around its own writes. Reads also go to
+    the primary when the read_from_primary context variable is set, e.g. for
+    a user who wrote within the read-your-writes window.
+    """
+
+    def __init__(self, *args, replicas: ReplicaSet, write_tracker: WriteTracker, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self.write_tracker = write_tracker
+        self._primary_only = False
+        self._wrote = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if not self._primary_only and not self._flushing and _is_plain_read(clause) and not read_from_primary.get():
+            replica = self.replicas.choose()
+            if replica is not None:
+                return replica.sync_engine
+        if self._flushing or not _is_plain_read(clause):
+            self._wrote = True
+        self._primary_only = True
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+    def commit(self) -> None:
+        super().commit()
+        if self._wrote:
+            self._wrote = False
+            user_id = current_user_id.get()
+            if user_id is not None:
+                self.write_tracker.record_write(user_id)
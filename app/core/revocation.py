@@ -0,0 +1,242 @@
+import asyncio
+import calendar
+import logging
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.core.database import PrimarySessionLocal
+from app.core.metrics import metrics
+from app.repositories.revoked_token_repository import RevokedTokenRepository
+
+logger = logging.getLogger(__name__)
+
+
+class TokenDenylist:
+    """
+    Set of revoked token IDs, each kept only until its token expires.
+
+    IDs are grouped into buckets by expiry time. Expired tokens are rejected
+    by their signature check anyway, so whole buckets are dropped once their
+    last token has expired, without per-ID timers. Memory is bounded by the
+    number of tokens revoked within one access token lifetime.
+    """
+
+    def __init__(self, bucket_seconds: int):
+        """
+        Initialize an empty denylist.
+
+        Args:
+            bucket_seconds (int): Width of an expiry bucket.
+        """
+        self.bucket_seconds = bucket_seconds
+        self._ids: Set[str] = set()
+        # Structure: {bucket: [jti, ...]}, bucket = ceil(exp / bucket_seconds)
+        self._buckets: Dict[int, List[str]] = {}
+
+    def __contains__(self, jti: str) -> bool:
+        return jti in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, jti: str, exp: int) -> None:
+        """
+        Add a revoked token.
+
+        Args:
+            jti (str): ID of the revoked token.
+            exp (int): The token's expiry as a Unix timestamp.
+        """
+        now = time.time()
+        self.expire(now)
+        if exp <= now or jti in self._ids:
+            return
+        self._ids.add(jti)
+        self._buckets.setdefault(-(-exp // self.bucket_seconds), []).append(jti)
+
+    def expire(self, now: float) -> None:
+        """
+        Drop the buckets whose tokens have all expired.
+
+        Args:
+            now (float): Current Unix time.
+        """
+        expired = [bucket for bucket in self._buckets if bucket * self.bucket_seconds <= now]
+        for bucket in expired:
+            self._ids.difference_update(self._buckets.pop(bucket))
+
+
+class RevocationChannel(ABC):
+    """
+    Interface for sharing revocations between worker processes.
+
+    The database channel stores revocations in the revoked_tokens table, which
+    every worker polls. Implement this interface over a message bus (e.g. Redis
+    pub/sub) to propagate revocations faster.
+    """
+
+    @abstractmethod
+    async def publish(self, jti: str, exp: int) -> None:
+        """
+        Announce a revocation to all workers.
+
+        Args:
+            jti (str): ID of the revoked token.
+            exp (int): The token's expiry as a Unix timestamp.
+        """
+
+    @abstractmethod
+    async def poll(self) -> List[Tuple[str, int]]:
+        """
+        Get the revocations announced since the previous poll.
+
+        Revocations may be returned more than once, including ones published by
+        this worker.
+
+        Returns:
+            List[Tuple[str, int]]: (jti, exp) pairs.
+        """
+
+
+class LocalRevocationChannel(RevocationChannel):
+    """
+    Channel for a single worker process: revocations are never shared.
+    """
+
+    async def publish(self, jti: str, exp: int) -> None:
+        pass
+
+    async def poll(self) -> List[Tuple[str, int]]:
+        return []
+
+
+class DatabaseRevocationChannel(RevocationChannel):
+    """
+    Channel backed by the revoked_tokens table.
+
+    Each poll reads rows with a higher ID than the last one seen. IDs are
+    assigned at insert but become visible at commit, so a row can appear after
+    a row with a higher ID; each poll therefore re-reads a small window of IDs
+    below the last one seen.
+    """
+
+    # Rows re-read on every poll to catch revocations committed out of ID order
+    OVERLAP = 100
+
+    def __init__(self, batch_size: int = 1000):
+        """
+        Initialize the channel.
+
+        Args:
+            batch_size (int): Revocations read per query.
+        """
+        self.batch_size = batch_size
+        self.last_id = 0
+
+    async def publish(self, jti: str, exp: int) -> None:
+        async with PrimarySessionLocal() as session:
+            await RevokedTokenRepository(session).create(jti, datetime.utcfromtimestamp(exp))
+
+    async def poll(self) -> List[Tuple[str, int]]:
+        revocations = []
+        after_id = max(0, self.last_id - self.OVERLAP)
+        now = datetime.utcnow()
+        async with PrimarySessionLocal() as session:
+            repository = RevokedTokenRepository(session)
+            while True:
+                rows = await repository.get_after(after_id, now, self.batch_size)
+                revocations.extend((jti, calendar.timegm(expires_at.timetuple())) for _, jti, expires_at in rows)
+                if rows:
+                    after_id = rows[-1][0]
+                if len(rows) < self.batch_size:
+                    break
+        self.last_id = max(self.last_id, after_id)
+        return revocations
+
+
+def build_revocation_channel(name: str) -> RevocationChannel:
+    """
+    Create the revocation channel selected in the settings.
+
+    Args:
+        name (str): "database" or "local".
+
+    Returns:
+        RevocationChannel: The channel.
+
+    Raises:
+        ValueError: If the name is unknown.
+    """
+    if name == "database":
+        return DatabaseRevocationChannel()
+    if name == "local":
+        return LocalRevocationChannel()
+    raise ValueError(f"Unknown token revocation channel: {name}")
+
+
+class TokenRevocations:
+    """
+    Revoked access tokens, checked in memory on every authenticated request.
+
+    Revocations made by this worker take effect immediately; those made by
+    other workers arrive through the channel within one sync interval.
+    """
+
+    def __init__(self, channel: RevocationChannel, bucket_seconds: int):
+        """
+        Initialize with an empty denylist.
+
+        Args:
+            channel (RevocationChannel): Channel shared with the other workers.
+            bucket_seconds (int): Width of the denylist's expiry buckets.
+        """
+        self.channel = channel
+        self.denylist = TokenDenylist(bucket_seconds)
+        metrics.register_gauge("token_revocation.denylist_size", lambda: len(self.denylist))
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self.denylist
+
+    async def revoke(self, jti: str, exp: int) -> None:
+        """
+        Revoke a token in this worker and announce it to the others.
+
+        Args:
+            jti (str): ID of the token.
+            exp (int): The token's expiry as a Unix timestamp.
+        """
+        self.denylist.add(jti, exp)
+        await self.channel.publish(jti, exp)
+
+    async def sync(self) -> None:
+        """
+        Apply revocations announced by other workers and drop expired ones.
+        """
+        for jti, exp in await self.channel.poll():
+            self.denylist.add(jti, exp)
+        self.denylist.expire(time.time())
+
+    async def run(self, interval: float) -> None:
+        """
+        Sync periodically until cancelled.
+
+        Args:
+            interval (float): Seconds between syncs.
+        """
+        while True:
+            try:
+                await self.sync()
+            except (SQLAlchemyError, OSError) as exc:
+                logger.warning("Token revocation sync failed: %s", exc)
+            await asyncio.sleep(interval)
+
+
+token_revocations = TokenRevocations(
+    build_revocation_channel(settings.TOKEN_REVOCATION_CHANNEL),
+    settings.TOKEN_DENYLIST_BUCKET_SECONDS,
+)
@@ -0,0 +1,195 @@
+import heapq
+import math
+import re
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# BM25 ranking parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase word tokens.
+
+    Args:
+        text (str): Text to tokenize.
+
+    Returns:
+        List[str]: Tokens in order of appearance.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class UserPostIndex:
+    """
+    Inverted index over one user's posts.
+
+    Attributes:
+        version (int): The user's posts version the index reflects.
+        postings (Dict[str, Dict[int, int]]): Term frequency per post, by term.
+        doc_terms (Dict[int, Tuple[str, ...]]): Distinct terms per post, used for removal.
+        doc_lengths (Dict[int, int]): Token count per post.
+    """
+
+    def __init__(self, version: int):
+        self.version = version
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_terms: Dict[int, Tuple[str, ...]] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        self.total_length = 0
+
+    def add(self, post_id: int, text: str) -> None:
+        if post_id in self.doc_lengths:
+            self.remove(post_id)
+        tokens = tokenize(text)
+        frequencies: Dict[str, int] = {}
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0) + 1
+        for term, frequency in frequencies.items():
+            self.postings.setdefault(term, {})[post_id] = frequency
+        self.doc_terms[post_id] = tuple(frequencies)
+        self.doc_lengths[post_id] = len(tokens)
+        self.total_length += len(tokens)
+
+    def remove(self, post_id: int) -> None:
+        for term in self.doc_terms.pop(post_id, ()):
+            posting = self.postings[term]
+            del posting[post_id]
+            if not posting:
+                del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(post_id, 0)
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        after: Optional[Tuple[float, int]] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Rank posts against a query with BM25.
+
+        Args:
+            query (str): Search terms.
+            limit (int): Maximum number of results.
+            after (Optional[Tuple[float, int]]): (score, post_id) of the last result of the previous page.
+
+        Returns:
+            List[Tuple[int, float]]: (post_id, score) pairs, best match first, ties by newest post.
+        """
+        doc_count = len(self.doc_lengths)
+        if not doc_count:
+            return []
+        avg_length = self.total_length / doc_count or 1.0
+
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            df = len(posting)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            lengths = self.doc_lengths
+            for post_id, tf in posting.items():
+                norm = K1 * (1 - B + B * lengths[post_id] / avg_length)
+                scores[post_id] = scores.get(post_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+
+        candidates: Iterable[Tuple[int, float]] = scores.items()
+        if after is not None:
+            after_score, after_id = after
+            candidates = (
+                (post_id, score) for post_id, score in candidates
+                if score < after_score or (score == after_score and post_id < after_id)
+            )
+        return heapq.nsmallest(limit, candidates, key=lambda item: (-item[1], -item[0]))
+
+
+class InMemorySearchIndex:
+    """
+    Per-user inverted indexes used as the search engine when the database has no full-text support.
+
+    Each user's index is built on first search and kept up to date by post
+    creates and deletes in this process. It is tagged with the user's posts
+    version, so changes made by other workers are detected and the index is
+    rebuilt. At most max_users indexes are kept, least recently used first out.
+    """
+
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self._indexes: "OrderedDict[int, UserPostIndex]" = OrderedDict()
+
+    def get(self, user_id: int, version: int) -> Optional[UserPostIndex]:
+        """
+        Get a user's index if it reflects the given posts version.
+
+        Args:
+            user_id (int): User ID.
+            version (int): The user's current posts version.
+
+        Returns:
+            Optional[UserPostIndex]: The index, or None if it is missing or outdated.
+        """
+        index = self._indexes.get(user_id)
+        if index is None or index.version != version:
+            return None
+        self._indexes.move_to_end(user_id)
+        return index
+
+    def build(self, user_id: int, version: int, posts: Iterable[Tuple[int, str]]) -> UserPostIndex:
+        """
+        Build and store a user's index.
+
+        Args:
+            user_id (int): User ID.
+            version (int): The posts version the posts were read at.
+            posts (Iterable[Tuple[int, str]]): (post_id, text) pairs.
+
+        Returns:
+            UserPostIndex: The new index.
+        """
+        index = UserPostIndex(version)
+        for post_id, text in posts:
+            index.add(post_id, text)
+        self._indexes[user_id] = index
+        self._indexes.move_to_end(user_id)
+        while len(self._indexes) > self.max_users:
+            self._indexes.popitem(last=False)
+        return index
+
+    def add(self, user_id: int, post_id: int, text: str) -> None:
+        index = self._indexes.get(user_id)
+        if index is not None:
+            index.add(post_id, text)
+
+    def remove(self, user_id: int, post_id: int) -> None:
+        index = self._indexes.get(user_id)
+        if index is not None:
+            index.remove(post_id)
+
+    def advance(self, user_id: int, from_version: int, to_version: int) -> None:
+        """
+        Move a user's index to a new posts version after an incremental update.
+
+        The index is dropped if it wasn't at from_version, since it then missed
+        a change made elsewhere.
+
+        Args:
+            user_id (int): User ID.
+            from_version (int): Version before the change.
+            to_version (int): Version after the change.
+        """
+        index = self._indexes.get(user_id)
+        if index is None:
+            return
+        if index.version == from_version:
+            index.version = to_version
+        else:
+            del self._indexes[user_id]
+
+
+post_search_index = InMemorySearchIndex(settings.SEARCH_INDEX_MAX_USERS)
@@ -1,5 +1,11 @@
+import hashlib
+import hmac
+import logging
+import secrets
 from datetime import datetime, timedelta
-from typing import Optional, Any, Dict
+from functools import lru_cache
+from math import ceil
+from typing import Optional, Any, Dict, Tuple
 from jose import jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -7,14 +13,29 @@ from fastapi.security import OAuth2PasswordBearer
 from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import get_cache_entry, set_cache, user_cache
+from app.core.circuit_breaker import CircuitOpenError, DATABASE_ERRORS, circuit_breaker
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_db, bind_request_user
+from app.core.deadlines import DeadlineExceeded
+from app.core.metrics import metrics
+from app.core.replicas import primary_reads
+from app.core.revocation import token_revocations
 from app.models.user import User
 from app.repositories.user_repository import UserRepository
 from app.schemas.token import TokenPayload
 
-# Create a password context for hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+# Create a password context for hashing. Pinning the allowed cost to exactly
+# BCRYPT_ROUNDS makes hashes made with any other cost count as outdated.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 # OAuth2 password bearer for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/login")
@@ -44,6 +65,41 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_password_needs_rehash(plain_password: str, hashed_password: str) -> Tuple[bool, bool]:
+    """
+    Verify a password and check whether its hash uses outdated parameters.
+    
+    Only the stored hash's parameters are inspected, so this costs a single
+    bcrypt run; the replacement hash is left to the caller.
+    
+    Args:
+        plain_password (str): Plain text password to verify.
+        hashed_password (str): Hashed password to compare against.
+        
+    Returns:
+        Tuple[bool, bool]: Whether the password matches, and whether the stored hash
+        should be replaced by one with the current parameters.
+    """
+    valid = pwd_context.verify(plain_password, hashed_password)
+    return valid, valid and pwd_context.needs_update(hashed_password)
+
+@lru_cache(maxsize=1)
+def _dummy_password_hash() -> str:
+    return pwd_context.hash("dummy-password-for-timing")
+
+def dummy_verify_password(plain_password: str) -> None:
+    """
+    Run a password verification whose result is discarded.
+    
+    Used when there is no user to check the password against, so that a failed
+    login takes as long as a wrong password and doesn't reveal whether the
+    email is registered.
+    
+    Args:
+        plain_password (str): Plain text password from the login attempt.
+    """
+    pwd_context.verify(plain_password, _dummy_password_hash())
+
 def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token.
@@ -60,7 +116,7 @@ def create_access_token(subject: str, expires_delta: Optional[timedelta] = None)
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {"exp": expire, "sub": str(subject), "jti": secrets.token_urlsafe(12)}
     encoded_jwt = jwt.encode(
         to_encode, 
         settings.SECRET_KEY, 
@@ -68,22 +124,64 @@ def create_access_token(subject: str, expires_delta: Optional[timedelta] = None)
     )
     return encoded_jwt
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db)
-) -> User:
+def new_refresh_secret() -> Tuple[str, bytes]:
     """
-    Dependency to get the current authenticated user.
+    Generate the secret part of a refresh token.
+    
+    Returns:
+        Tuple[str, bytes]: The secret to hand to the client, and its hash to store.
+    """
+    secret = secrets.token_urlsafe(32)
+    return secret, hash_refresh_secret(secret)
+
+def hash_refresh_secret(secret: str) -> bytes:
+    """
+    Hash a refresh token secret for storage and lookup.
+    
+    The secret is random and high-entropy, so a keyed hash is enough; unlike
+    passwords it doesn't need a slow hash.
+    
+    Args:
+        secret (str): The secret part of a refresh token.
+        
+    Returns:
+        bytes: 32-byte HMAC-SHA256 of the secret.
+    """
+    return hmac.new(settings.SECRET_KEY.encode(), secret.encode(), hashlib.sha256).digest()
+
+def format_refresh_token(token_id: int, secret: str) -> str:
+    return f"{token_id}.{secret}"
+
+def parse_refresh_token(token: str) -> Tuple[int, str]:
+    """
+    Split a refresh token into its ID and secret.
+    
+    Args:
+        token (str): Refresh token in the form "<id>.<secret>".
+        
+    Returns:
+        Tuple[int, str]: The token ID and secret.
+        
+    Raises:
+        ValueError: If the token is malformed.
+    """
+    token_id, _, secret = token.partition(".")
+    if not token_id.isdigit() or not secret:
+        raise ValueError("Invalid refresh token")
+    return int(token_id), secret
+
+async def get_token_payload(token: str = Depends(oauth2_scheme)) -> TokenPayload:
+    """
+    Dependency to get the validated payload of the request's access token.
     
     Args:
         token (str): JWT token from the request.
-        db (AsyncSession): Database session.
         
     Returns:
-        User: The authenticated user model.
+        TokenPayload: The token's claims.
         
     Raises:
-        HTTPException: If authentication fails.
+        HTTPException: If the token is invalid, expired or revoked.
     """
     try:
         payload = jwt.decode(
@@ -106,8 +204,69 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # In-memory set lookup, no database round trip
+    if token_data.jti and token_revocations.is_revoked(token_data.jti):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    await bind_request_user(token_data.sub)
+    return token_data
+
+async def get_current_user(
+    token_data: TokenPayload = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """
+    Dependency to get the current authenticated user.
+    
+    The user's ID, posts version and post shard are kept in the user cache,
+    rewritten only when they changed or their entry has expired. When the
+    database is down, its circuit is open or the request deadline passes, a
+    detached user built from them is returned instead, until they are older
+    than the stale limit, so that cached posts can still be served.
+    
+    Args:
+        token_data (TokenPayload): Validated access token claims.
+        db (AsyncSession): Database session.
+        
+    Returns:
+        User: The authenticated user model.
+        
+    Raises:
+        HTTPException: If authentication fails, or the database's circuit is open
+            and the user is not cached.
+    """
     user_repository = UserRepository(db)
-    user = await user_repository.get_by_id(token_data.sub)
+    
+    async def load_user() -> Optional[User]:
+        user = await user_repository.get_by_id(token_data.sub)
+        # A user who just signed up may not have reached the read replica yet
+        if not user:
+            with primary_reads():
+                user = await user_repository.get_by_id(token_data.sub)
+        return user
+    
+    cache_key = f"user_{token_data.sub}"
+    try:
+        user = await circuit_breaker("users").call(load_user)
+    except (CircuitOpenError, DeadlineExceeded, *DATABASE_ERRORS) as exc:
+        cached = get_cache_entry(cache_key, user_cache)
+        if cached is not None:
+            metrics.increment("cache.user_stale_on_error")
+            if not isinstance(exc, (CircuitOpenError, DeadlineExceeded)):
+                logger.warning("Using the cached row of user %s, loading it failed: %r", token_data.sub, exc)
+            user_id, posts_version, post_shard = cached[0]
+            return User(id=user_id, posts_version=posts_version, post_shard=post_shard)
+        if isinstance(exc, CircuitOpenError):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Database unavailable",
+                headers={"Retry-After": str(ceil(exc.retry_after))}
+            )
+        raise
     
     if not user:
         raise HTTPException(
@@ -115,4 +274,9 @@ async def get_current_user(
             detail="User not found"
         )
     
-    return user 
\ No newline at end of file
+    # Only used when the database fails; an unchanged entry is renewed once it has expired
+    row = (user.id, user.posts_version, user.post_shard)
+    cached = get_cache_entry(cache_key, user_cache)
+    if cached is None or cached[1] or cached[0] != row:
+        set_cache(cache_key, row, store=user_cache)
+    return user
@@ -0,0 +1,148 @@
+import importlib.util
+import multiprocessing
+from typing import Any, Dict
+
+import uvicorn
+
+from app.core.config import settings
+
+APP_MODULE = "app.main:app"
+
+
+def _event_loop_implementation() -> str:
+    """Use uvloop when it is installed, otherwise the stdlib asyncio loop."""
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def _http_implementation() -> str:
+    """Use the httptools parser when it is installed, otherwise h11."""
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def default_worker_count() -> int:
+    """
+    Calculate the number of worker processes.
+
+    Uses the WORKERS setting when it is set, otherwise one worker per CPU core,
+    or a single worker on SQLite, whose writes are only queued within a process.
+
+    Returns:
+        int: Number of worker processes to start.
+    """
+    if settings.WORKERS > 0:
+        return settings.WORKERS
+    if settings.DATABASE_URL.startswith("sqlite"):
+        return 1
+    return max(multiprocessing.cpu_count(), 1)
+
+
+def check_worker_count(workers: int) -> None:
+    """
+    Refuse settings that are only correct within a single worker process.
+
+    Args:
+        workers (int): Number of worker processes about to start.
+
+    Raises:
+        ValueError: If state that must be shared is kept per worker.
+    """
+    if workers <= 1:
+        return
+    if settings.DATABASE_REPLICA_URLS and settings.WRITE_TRACKER == "memory":
+        # A user's next request may land on a worker that didn't see their write
+        raise ValueError(
+            'WRITE_TRACKER="memory" needs WORKERS=1 with read replicas: other workers '
+            'would read a user\'s own writes from a lagging replica. Use the "database" tracker instead'
+        )
+    if settings.IDEMPOTENCY_STORE == "memory":
+        raise ValueError(
+            'IDEMPOTENCY_STORE="memory" needs WORKERS=1: a retry landing on another '
+            'worker would create the post again. Use the "database" store instead'
+        )
+
+
+def build_gunicorn_options() -> Dict[str, Any]:
+    """
+    Build the process manager options for the production server.
+
+    Returns:
+        Dict[str, Any]: Gunicorn configuration values.
+
+    Raises:
+        ValueError: If the settings don't allow the number of workers, see check_worker_count.
+    """
+    workers = default_worker_count()
+    check_worker_count(workers)
+    return {
+        "bind": f"{settings.HOST}:{settings.PORT}",
+        "workers": workers,
+        "worker_class": "app.core.server.TunedUvicornWorker",
+        "backlog": settings.BACKLOG,
+        "keepalive": settings.KEEP_ALIVE_SECONDS,
+        "graceful_timeout": settings.GRACEFUL_SHUTDOWN_SECONDS,
+        "timeout": settings.WORKER_TIMEOUT_SECONDS,
+        "max_requests": settings.WORKER_MAX_REQUESTS,
+        "max_requests_jitter": settings.WORKER_MAX_REQUESTS_JITTER,
+        "accesslog": None,
+    }
+
+
+def run_development() -> None:
+    """
+    Run a single auto-reloading process for local development.
+    """
+    uvicorn.run(
+        APP_MODULE,
+        host=settings.HOST,
+        port=settings.PORT,
+        reload=True,
+        access_log=not settings.ACCESS_LOG_ENABLED,
+    )
+
+
+def run_production() -> None:
+    """
+    Run the application under a multi-worker process manager.
+
+    Gunicorn supervises the workers: SIGTERM makes it stop accepting connections
+    and wait up to GRACEFUL_SHUTDOWN_SECONDS for in-flight requests to drain, and
+    workers are replaced after WORKER_MAX_REQUESTS requests (plus jitter so they
+    don't all restart at once) to cap memory growth.
+    """
+    from gunicorn.app.base import BaseApplication
+
+    class ProductionApplication(BaseApplication):
+        def __init__(self, options: Dict[str, Any]):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+
+            return app
+
+    ProductionApplication(build_gunicorn_options()).run()
+
+
+try:
+    from uvicorn.workers import UvicornWorker
+except ImportError:  # gunicorn is not available (e.g. on Windows)
+    UvicornWorker = None
+
+if UvicornWorker is not None:
+
+    class TunedUvicornWorker(UvicornWorker):
+        """
+        Uvicorn worker with explicit event loop and HTTP parser selection.
+        """
+        CONFIG_KWARGS = {
+            "loop": _event_loop_implementation(),
+            "http": _http_implementation(),
+            "lifespan": "on",
+            "timeout_graceful_shutdown": settings.GRACEFUL_SHUTDOWN_SECONDS,
+            "access_log": not settings.ACCESS_LOG_ENABLED,
+        }
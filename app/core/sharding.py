@@ -0,0 +1,199 @@
+import asyncio
+import zlib
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import engine, build_engine, session_class, PrimarySessionLocal
+from app.models.id_block import IdBlock
+
+
+class ShardRouter:
+    """
+    Maps users to the database shard that holds their posts and post statistics.
+
+    A user's shard is stored in users.post_shard, which acts as the shard
+    directory. Users without one (those who never posted) are placed by a
+    stable hash of their ID; the shard is pinned on their first post, so
+    adding shards later never moves existing users implicitly. Use the
+    reshard_posts job to move a user.
+    """
+
+    def __init__(self, urls: List[str]):
+        """
+        Create an engine per shard.
+
+        Args:
+            urls (List[str]): Shard connection strings. A shard with the primary
+                database's URL reuses its engine; no URLs means a single shard,
+                the primary database.
+        """
+        self.engines: List[AsyncEngine] = [
+            engine if url == settings.DATABASE_URL else build_engine(url)
+            for url in urls
+        ] or [engine]
+        self._sessionmakers = [
+            PrimarySessionLocal if shard_engine is engine
+            else sessionmaker(shard_engine, class_=session_class(shard_engine), expire_on_commit=False)
+            for shard_engine in self.engines
+        ]
+
+    @property
+    def sharded(self) -> bool:
+        return len(self.engines) > 1
+
+    def placement(self, user_id: int) -> int:
+        """
+        Choose the shard for a user who has no posts yet.
+
+        Args:
+            user_id (int): User ID.
+
+        Returns:
+            int: Shard index.
+        """
+        return zlib.crc32(str(user_id).encode()) % len(self.engines)
+
+    def shard_for(self, user_id: int, post_shard: Optional[int]) -> int:
+        """
+        Get the shard holding a user's posts.
+
+        Args:
+            user_id (int): User ID.
+            post_shard (Optional[int]): The user's users.post_shard value.
+
+        Returns:
+            int: Shard index.
+        """
+        return post_shard if post_shard is not None else self.placement(user_id)
+
+    def uses_primary(self, shard: int) -> bool:
+        return self.engines[shard] is engine
+
+    def session(self, shard: int) -> AsyncSession:
+        """
+        Open a new session on a shard. The caller must close it.
+
+        Args:
+            shard (int): Shard index.
+
+        Returns:
+            AsyncSession: Session bound to the shard.
+        """
+        return self._sessionmakers[shard]()
+
+    async def dispose(self) -> None:
+        for shard_engine in self.engines:
+            if shard_engine is not engine:
+                await shard_engine.dispose()
+
+
+shard_router = ShardRouter(settings.POST_SHARD_URLS)
+
+
+class ShardSessions:
+    """
+    Sessions on the post shards for one unit of work, opened on first use.
+
+    The shard on the primary database shares the caller's session, so without
+    sharding posts and users are read and written in a single transaction, as
+    before sharding existed.
+    """
+
+    def __init__(self, db: AsyncSession, router: ShardRouter = shard_router):
+        """
+        Initialize without opening any session.
+
+        Args:
+            db (AsyncSession): Session on the primary database.
+            router (ShardRouter): Shard router.
+        """
+        self.db = db
+        self.router = router
+        self._sessions: Dict[int, AsyncSession] = {}
+
+    def get(self, shard: int) -> AsyncSession:
+        """
+        Get the session for a shard.
+
+        Args:
+            shard (int): Shard index.
+
+        Returns:
+            AsyncSession: The session.
+        """
+        if self.router.uses_primary(shard):
+            return self.db
+        session = self._sessions.get(shard)
+        if session is None:
+            session = self._sessions[shard] = self.router.session(shard)
+        return session
+
+    async def close(self) -> None:
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions.clear()
+
+    async def __aenter__(self) -> "ShardSessions":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+class IdAllocator:
+    """
+    Hi/lo allocator for IDs that must be unique across shards.
+
+    A block of block_size IDs is reserved with one short transaction on the
+    primary database, then handed out from memory. IDs are unique but only
+    roughly ordered across processes, and a process's unused IDs are lost
+    when it exits.
+    """
+
+    def __init__(self, name: str, block_size: int):
+        """
+        Initialize with no reserved block.
+
+        Args:
+            name (str): Sequence name in the id_blocks table.
+            block_size (int): IDs reserved per database round trip.
+        """
+        self.name = name
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0
+        self._lock = asyncio.Lock()
+
+    async def next_id(self) -> int:
+        """
+        Get a new ID.
+
+        Returns:
+            int: An ID never returned before by any process.
+        """
+        if self._next >= self._end:
+            async with self._lock:
+                if self._next >= self._end:
+                    await self._reserve_block()
+        next_id = self._next
+        self._next += 1
+        return next_id
+
+    async def _reserve_block(self) -> None:
+        async with PrimarySessionLocal() as session:
+            stmt = (
+                update(IdBlock)
+                .where(IdBlock.name == self.name)
+                .values(next_id=IdBlock.next_id + self.block_size)
+            )
+            await session.execute(stmt)
+            end = (await session.execute(select(IdBlock.next_id).where(IdBlock.name == self.name))).scalar_one()
+            await session.commit()
+        self._next, self._end = end - self.block_size, end
+
+
+post_id_allocator = IdAllocator("posts", settings.POST_ID_BLOCK_SIZE)
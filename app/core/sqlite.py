@@ -0,0 +1,199 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.deadlines import DeadlineExceeded, DeadlineSession, time_left
+from app.core.metrics import metrics
+
+
+def is_file_database(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def apply_pragmas(target: AsyncEngine) -> None:
+    """
+    Tune every new connection of a SQLite engine with the SQLITE_* settings.
+
+    WAL lets readers run while a transaction writes. With WAL,
+    synchronous=NORMAL only syncs at checkpoints: a power loss may drop the
+    last commits but never corrupts the database. The page cache and the
+    memory map are per connection, so they pay off with a connection pool.
+
+    Args:
+        target (AsyncEngine): Engine on a SQLite database.
+    """
+    pragmas = {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "cache_size": -settings.SQLITE_CACHE_SIZE_KB,  # negative sizes are in KiB, positive ones in pages
+        "mmap_size": settings.SQLITE_MMAP_SIZE_BYTES,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+    }
+
+    @event.listens_for(target.sync_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+
+class SQLiteWriter:
+    """
+    Queue of the transactions writing to one SQLite database, one at a time.
+
+    SQLite allows a single writer per database. Without a queue, concurrent
+    writers wait for the lock in the driver's busy handler, polling with
+    growing sleeps in no particular order, and fail with "database is
+    locked" once the busy timeout passes. Here they wait on a FIFO lock
+    instead, without a thread or a poll. The queue is per process; writers in
+    other processes still wait in the busy handler.
+    """
+
+    def __init__(self, name: str):
+        """
+        Initialize the queue.
+
+        Args:
+            name (str): Database name, used in metrics.
+        """
+        self.name = name
+        self.lock = asyncio.Lock()
+        self.waiting = 0
+        metrics.register_gauge(f"sqlite.{name}.writers_waiting", lambda: self.waiting)
+
+    async def acquire(self) -> None:
+        """
+        Wait for the turn to write, at most until the request deadline.
+
+        Raises:
+            DeadlineExceeded: If the deadline passes while waiting.
+        """
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            async with asyncio.timeout(time_left()):
+                await self.lock.acquire()
+        except TimeoutError:
+            raise DeadlineExceeded() from None
+        finally:
+            self.waiting -= 1
+        metrics.observe(f"sqlite.{self.name}.writer_wait_seconds", time.monotonic() - started)
+
+    def release(self) -> None:
+        self.lock.release()
+
+
+# Structure: {database path: writer}
+writers: Dict[str, SQLiteWriter] = {}
+
+
+def writer_for(url: URL) -> SQLiteWriter:
+    """
+    Get the writer queue of a SQLite database, shared by all engines on it.
+
+    Args:
+        url (URL): Database URL.
+
+    Returns:
+        SQLiteWriter: The queue.
+    """
+    path = os.path.abspath(url.database)
+    writer = writers.get(path)
+    if writer is None:
+        name = os.path.splitext(os.path.basename(path))[0]
+        writer = writers[path] = SQLiteWriter(name)
+    return writer
+
+
+def _is_write(statement: Any) -> bool:
+    # SQLite ignores FOR UPDATE, so locking reads queue like writes to keep their guarantee
+    return getattr(statement, "is_dml", False) or getattr(statement, "_for_update_arg", None) is not None
+
+
+class SQLiteSession(DeadlineSession):
+    """
+    Session on a SQLite database whose write transactions go through its SQLiteWriter.
+
+    The turn is taken before the first write of a transaction (an INSERT,
+    UPDATE or DELETE, a SELECT ... FOR UPDATE or a flush of pending changes)
+    and given back when the transaction ends. Reads before that don't wait:
+    the driver only opens a transaction for the first write, so they never
+    hold an outdated snapshot the write would conflict with. For the same
+    reason, a session with nothing to flush ends its read-only transaction
+    before waiting, so queued writers don't hold pooled connections that
+    readers need; don't wait for a turn inside session.begin().
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._writer: Optional[SQLiteWriter] = None  # set while this session's transaction holds the turn
+
+    async def execute(self, statement, *args, **kwargs):
+        await self._before(statement)
+        return await super().execute(statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        await self._before(statement)
+        return await super().scalar(statement, *args, **kwargs)
+
+    async def scalars(self, statement, *args, **kwargs):
+        await self._before(statement)
+        return await super().scalars(statement, *args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        await self._before(None)
+        return await super().get(*args, **kwargs)
+
+    async def flush(self, *args, **kwargs):
+        await self._before(None)
+        return await super().flush(*args, **kwargs)
+
+    async def commit(self):
+        await self._before(None)
+        try:
+            return await super().commit()
+        finally:
+            self._release()
+
+    async def rollback(self):
+        try:
+            return await super().rollback()
+        finally:
+            self._release()
+
+    async def close(self):
+        try:
+            return await super().close()
+        finally:
+            self._release()
+
+    async def invalidate(self):
+        try:
+            return await super().invalidate()
+        finally:
+            self._release()
+
+    async def _before(self, statement: Any) -> None:
+        if self._writer is not None:
+            return
+        # Pending changes are flushed before the statement (autoflush), so they write too
+        pending = self.new or self.dirty or self.deleted
+        if not pending and not _is_write(statement):
+            return
+        if not pending and self.in_transaction():
+            await super().commit()
+        writer = writer_for(self.bind.url)
+        await writer.acquire()
+        self._writer = writer
+
+    def _release(self) -> None:
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
@@ -0,0 +1,53 @@
+import asyncio
+import contextvars
+import logging
+from typing import Coroutine, Any, Set
+
+from app.core.deadlines import request_deadline
+
+logger = logging.getLogger(__name__)
+
+# Background tasks started by the application. Holding a strong reference keeps
+# them from being garbage collected and lets shutdown wait for pending work.
+background_tasks: Set[asyncio.Task] = set()
+
+def spawn(coro: Coroutine[Any, Any, Any], name: str = None) -> asyncio.Task:
+    """
+    Run a coroutine in the background, tracked until it finishes.
+
+    The task outlives the request that spawned it, so it doesn't inherit the
+    request's deadline.
+
+    Args:
+        coro (Coroutine): The coroutine to run.
+        name (str, optional): Task name, used in logs.
+
+    Returns:
+        asyncio.Task: The scheduled task.
+    """
+    context = contextvars.copy_context()
+    context.run(request_deadline.set, None)
+    task = asyncio.create_task(coro, name=name, context=context)
+    background_tasks.add(task)
+    task.add_done_callback(_on_task_done)
+    return task
+
+def _on_task_done(task: asyncio.Task) -> None:
+    background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Background task %s failed", task.get_name(), exc_info=task.exception())
+
+async def drain(timeout: float) -> None:
+    """
+    Wait for pending background tasks to finish, cancelling any still running after the timeout.
+
+    Args:
+        timeout (float): Maximum number of seconds to wait.
+    """
+    if not background_tasks:
+        return
+    _, pending = await asyncio.wait(set(background_tasks), timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1 @@
+# Batch jobs and maintenance commands
\ No newline at end of file
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""
+Move posts older than POST_ARCHIVE_AFTER_DAYS from the posts table to posts_archive.
+
+Posts are scanned in primary key order and moved in small transactions with a
+pause in between, so the job can run alongside normal traffic. The owners'
+posts versions are bumped in the same transactions, so cached post lists and
+search indexes drop the archived posts. Archived posts are still listed by
+paging GET /api/posts past the recent posts, and still count in the post
+statistics, but are no longer searched.
+
+Usage:
+    python -m app.jobs.archive_posts [--older-than-days 365] [--batch-size 500] [--pause 0.1] [--no-compress]
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import PrimarySessionLocal
+from app.core.sharding import ShardSessions, shard_router
+from app.repositories.post_archive_repository import PostArchiveRepository
+from app.repositories.user_repository import UserRepository
+
+logger = logging.getLogger(__name__)
+
+
+async def archive_range(
+    primary: AsyncSession,
+    session: AsyncSession,
+    cutoff: datetime,
+    after_id: int,
+    last_id: int,
+    user_ids: List[int],
+    shard: int,
+    compress: bool,
+) -> int:
+    """
+    Archive the old posts of some users within a range of post IDs, and commit.
+
+    The users' posts versions are bumped first, locking their rows in ID order
+    as post creates and deletes do. Cached post lists, ETags and search indexes
+    are tagged with the version, so they stop covering the archived posts. On
+    a shard other than the primary's, the shard commits first, as in post
+    creates.
+
+    Args:
+        primary (AsyncSession): Session on the primary database.
+        session (AsyncSession): Session on the posts' shard, possibly the primary session.
+        cutoff (datetime): Posts created before this UTC time are archived.
+        after_id (int): The range starts after this post ID.
+        last_id (int): The range ends with this post ID.
+        user_ids (List[int]): Users owning archivable posts in the range, sorted.
+        shard (int): Shard index, pinned for users without one.
+        compress (bool): Whether to compress the archived texts.
+
+    Returns:
+        int: Number of posts archived.
+    """
+    users = UserRepository(primary)
+    for user_id in user_ids:
+        await users.increment_posts_version(user_id, shard)
+    moved = await PostArchiveRepository(session).archive_range(cutoff, after_id, last_id, user_ids, compress)
+    if session is not primary:
+        await session.commit()
+    await primary.commit()
+    return moved
+
+
+async def archive_posts(
+    older_than_days: int = settings.POST_ARCHIVE_AFTER_DAYS,
+    batch_size: int = 500,
+    pause: float = 0.1,
+    compress: bool = settings.POST_ARCHIVE_COMPRESS,
+) -> int:
+    """
+    Archive old posts on every shard.
+
+    Args:
+        older_than_days (int): Posts older than this many days are archived.
+        batch_size (int): Number of posts scanned per transaction.
+        pause (float): Seconds to sleep between batches to limit database load.
+        compress (bool): Whether to compress the archived texts.
+
+    Returns:
+        int: Number of posts archived.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    archived = 0
+
+    for shard in range(len(shard_router.engines)):
+        after_id = 0
+        while after_id is not None:
+            async with PrimarySessionLocal() as primary, ShardSessions(primary) as shards:
+                session = shards.get(shard)
+                repository = PostArchiveRepository(session)
+                last_id, user_ids = await repository.find_archivable(cutoff, after_id, batch_size)
+                moved = 0
+                if user_ids:
+                    moved = await archive_range(primary, session, cutoff, after_id, last_id, user_ids, shard, compress)
+                after_id = last_id
+            if moved:
+                logger.info("Archived %s posts on shard %s, up to post %s", moved, shard, after_id)
+            archived += moved
+            await asyncio.sleep(pause)
+
+    return archived
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--older-than-days", type=int, default=settings.POST_ARCHIVE_AFTER_DAYS, help="age of the posts to archive")
+    parser.add_argument("--batch-size", type=int, default=500, help="posts scanned per transaction")
+    parser.add_argument("--pause", type=float, default=0.1, help="seconds to sleep between batches")
+    parser.add_argument("--no-compress", action="store_true", help="store archived texts uncompressed")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    count = asyncio.run(archive_posts(
+        args.older_than_days,
+        args.batch_size,
+        args.pause,
+        settings.POST_ARCHIVE_COMPRESS and not args.no_compress,
+    ))
+    print(f"Archived {count} posts")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Measure bcrypt on this machine and recommend a cost for BCRYPT_ROUNDS.
+
+Each extra round doubles the hashing time. The recommendation is the highest
+cost whose median hash time stays within the target.
+
+Usage:
+    python -m app.jobs.calibrate_bcrypt [--target-ms 250] [--samples 5]
+"""
+import argparse
+import statistics
+import time
+from typing import Dict, Tuple
+
+import bcrypt
+
+# bcrypt's valid cost range
+MIN_ROUNDS = 4
+MAX_ROUNDS = 31
+
+
+def time_hash(rounds: int, samples: int) -> float:
+    """
+    Measure the median time of one bcrypt hash.
+
+    Args:
+        rounds (int): bcrypt cost.
+        samples (int): Number of hashes to time.
+
+    Returns:
+        float: Median time in milliseconds.
+    """
+    password = b"calibration-password"
+    durations = []
+    for _ in range(samples):
+        salt = bcrypt.gensalt(rounds)
+        started = time.perf_counter()
+        bcrypt.hashpw(password, salt)
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations)
+
+
+def calibrate(target_ms: float, samples: int = 5) -> Tuple[int, Dict[int, float]]:
+    """
+    Find the highest bcrypt cost that hashes within a time budget.
+
+    Costs are measured upwards from the minimum and the search stops at the
+    first one over the target, so the slowest measurement is about twice the target.
+
+    Args:
+        target_ms (float): Maximum acceptable time per hash in milliseconds.
+        samples (int): Hashes timed per cost.
+
+    Returns:
+        Tuple[int, Dict[int, float]]: The recommended cost, and the median time by cost measured.
+    """
+    timings: Dict[int, float] = {}
+    recommended = MIN_ROUNDS
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        timings[rounds] = time_hash(rounds, samples)
+        if timings[rounds] > target_ms:
+            break
+        recommended = rounds
+    return recommended, timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-ms", type=float, default=250.0, help="maximum time per hash in milliseconds")
+    parser.add_argument("--samples", type=int, default=5, help="hashes timed per cost")
+    args = parser.parse_args()
+
+    recommended, timings = calibrate(args.target_ms, args.samples)
+    for rounds, elapsed in timings.items():
+        print(f"rounds={rounds:2d}  {elapsed:8.1f} ms")
+    if timings[recommended] > args.target_ms:
+        print(f"Even the minimum cost exceeds {args.target_ms:g} ms per hash")
+    print(f"BCRYPT_ROUNDS={recommended}")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Delete post_changes entries older than POST_CHANGES_RETENTION_DAYS.
+
+Keeps the change log bounded by recent activity rather than by history size.
+Entries are deleted in small transactions with a pause in between, so the job
+can run alongside normal traffic. Clients whose change token is older than
+the compacted entries get 410 from GET /api/posts/changes and list their
+posts again.
+
+Usage:
+    python -m app.jobs.compact_post_changes [--older-than-days 30] [--batch-size 1000] [--pause 0.1]
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.core.sharding import shard_router
+from app.repositories.post_change_repository import PostChangeRepository
+
+logger = logging.getLogger(__name__)
+
+
+async def compact_post_changes(
+    older_than_days: int = settings.POST_CHANGES_RETENTION_DAYS,
+    batch_size: int = 1000,
+    pause: float = 0.1,
+) -> int:
+    """
+    Compact the change log on every shard.
+
+    Args:
+        older_than_days (int): Changes older than this many days are deleted.
+        batch_size (int): Number of changes looked at per transaction.
+        pause (float): Seconds to sleep between batches to limit database load.
+
+    Returns:
+        int: Number of changes deleted.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    compacted = 0
+
+    for shard in range(len(shard_router.engines)):
+        while True:
+            async with shard_router.session(shard) as session:
+                deleted = await PostChangeRepository(session).compact_batch(cutoff, batch_size)
+            if not deleted:
+                break
+            logger.info("Deleted %s post changes on shard %s", deleted, shard)
+            compacted += deleted
+            await asyncio.sleep(pause)
+
+    return compacted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--older-than-days", type=int, default=settings.POST_CHANGES_RETENTION_DAYS, help="age of the changes to delete")
+    parser.add_argument("--batch-size", type=int, default=1000, help="changes per transaction")
+    parser.add_argument("--pause", type=float, default=0.1, help="seconds to sleep between batches")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    count = asyncio.run(compact_post_changes(args.older_than_days, args.batch_size, args.pause))
+    print(f"Deleted {count} post changes")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Delete expired refresh tokens, revocations of expired access tokens and
+expired idempotency keys.
+
+Usage:
+    python -m app.jobs.purge_expired_tokens [--batch-size 1000] [--pause 0.1]
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime
+
+from app.core.database import PrimarySessionLocal
+from app.repositories.idempotency_key_repository import IdempotencyKeyRepository
+from app.repositories.refresh_token_repository import RefreshTokenRepository
+from app.repositories.revoked_token_repository import RevokedTokenRepository
+
+logger = logging.getLogger(__name__)
+
+
+async def purge_expired(repository_class, now: datetime, batch_size: int, pause: float) -> int:
+    """
+    Delete every row that expired before now, in small transactions.
+
+    Args:
+        repository_class: Repository with a delete_expired(now, limit) method.
+        now (datetime): Current UTC time.
+        batch_size (int): Number of rows deleted per transaction.
+        pause (float): Seconds to sleep between batches to limit database load.
+
+    Returns:
+        int: Number of rows deleted.
+    """
+    purged = 0
+
+    while True:
+        async with PrimarySessionLocal() as session:
+            deleted = await repository_class(session).delete_expired(now, batch_size)
+        purged += deleted
+        if deleted < batch_size:
+            break
+        await asyncio.sleep(pause)
+
+    return purged
+
+
+async def purge_expired_tokens(batch_size: int = 1000, pause: float = 0.1) -> tuple:
+    """
+    Delete expired refresh tokens, revocations and idempotency keys.
+
+    Args:
+        batch_size (int): Number of rows deleted per transaction.
+        pause (float): Seconds to sleep between batches to limit database load.
+
+    Returns:
+        tuple: Number of refresh tokens, of revocations and of idempotency keys deleted.
+    """
+    now = datetime.utcnow()
+    refresh_tokens = await purge_expired(RefreshTokenRepository, now, batch_size, pause)
+    revocations = await purge_expired(RevokedTokenRepository, now, batch_size, pause)
+    idempotency_keys = await purge_expired(IdempotencyKeyRepository, now, batch_size, pause)
+    return refresh_tokens, revocations, idempotency_keys
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per transaction")
+    parser.add_argument("--pause", type=float, default=0.1, help="seconds to sleep between batches")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    refresh_tokens, revocations, idempotency_keys = asyncio.run(purge_expired_tokens(args.batch_size, args.pause))
+    print(
+        f"Deleted {refresh_tokens} expired refresh tokens, {revocations} expired revocations "
+        f"and {idempotency_keys} expired idempotency keys"
+    )
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Repair drift between the per-user post statistics and the posts table.
+
+Usage:
+    python -m app.jobs.reconcile_post_stats [--batch-size 500] [--pause 0.1]
+"""
+import argparse
+import asyncio
+import logging
+from typing import Dict, List
+
+from sqlalchemy import select
+
+from app.core.database import PrimarySessionLocal
+from app.core.sharding import ShardSessions, shard_router
+from app.models.user import User
+from app.repositories.post_stats_repository import PostStatsRepository
+
+logger = logging.getLogger(__name__)
+
+EMPTY_STATS = (0, 0, None)
+
+
+async def reconcile_post_stats(batch_size: int = 500, pause: float = 0.1) -> int:
+    """
+    Recompute every user's post statistics and fix the rows that drifted.
+
+    Users are processed in batches, one short transaction each. The batch's
+    user rows are locked first; post creates and deletes lock the same row to
+    bump the posts version, so no write can land between computing and
+    storing the statistics. Each user's statistics are checked on the shard
+    holding their posts.
+
+    Args:
+        batch_size (int): Number of users per transaction.
+        pause (float): Seconds to sleep between batches to limit database load.
+
+    Returns:
+        int: Number of users whose statistics were repaired.
+    """
+    repaired = 0
+    last_user_id = 0
+
+    while True:
+        async with PrimarySessionLocal() as session, ShardSessions(session) as shards:
+            query = (
+                select(User.id, User.post_shard)
+                .where(User.id > last_user_id)
+                .order_by(User.id)
+                .limit(batch_size)
+                .with_for_update()
+            )
+            users = (await session.execute(query)).all()
+            if not users:
+                break
+
+            by_shard: Dict[int, List[int]] = {}
+            for user_id, post_shard in users:
+                by_shard.setdefault(shard_router.shard_for(user_id, post_shard), []).append(user_id)
+
+            for shard, user_ids in by_shard.items():
+                shard_session = shards.get(shard)
+                repository = PostStatsRepository(shard_session)
+                stored = await repository.get_many(user_ids)
+                actual = await repository.compute_many(user_ids)
+
+                for user_id in user_ids:
+                    expected = actual.get(user_id, EMPTY_STATS)
+                    current = stored.get(user_id)
+                    if current == expected or (current is None and expected == EMPTY_STATS):
+                        continue
+                    logger.info("Repairing post stats for user %s: %s -> %s", user_id, current, expected)
+                    await repository.replace(user_id, *expected)
+                    repaired += 1
+
+                await shard_session.commit()
+
+            # Releases the user row locks
+            await session.commit()
+            last_user_id = users[-1].id
+
+        await asyncio.sleep(pause)
+
+    return repaired
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500, help="users per transaction")
+    parser.add_argument("--pause", type=float, default=0.1, help="seconds to sleep between batches")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    count = asyncio.run(reconcile_post_stats(args.batch_size, args.pause))
+    print(f"Repaired post statistics for {count} users")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+"""
+Move a user's posts and post statistics to another shard, online.
+
+Posts are copied while the user keeps reading and writing. Only the final
+catch-up copy and the switch run with the user's row locked, which briefly
+holds back their post creates and deletes. The source copies are deleted
+after a grace period, so requests that resolved the old shard just before
+the switch still find the posts. The user's change log is not moved: change
+tokens from before the move get 410 and clients list their posts again.
+
+Usage:
+    python -m app.jobs.reshard_posts --user-id 42 --to-shard 1 [--batch-size 1000] [--grace-seconds 5]
+"""
+import argparse
+import asyncio
+import logging
+
+from sqlalchemy import select, update
+
+from app.core.database import PrimarySessionLocal
+from app.core.sharding import shard_router
+from app.models.user import User
+from app.repositories.post_change_repository import PostChangeRepository
+from app.repositories.post_repository import PostRepository
+from app.repositories.post_stats_repository import PostStatsRepository
+from app.repositories.user_repository import UserRepository
+
+logger = logging.getLogger(__name__)
+
+
+async def sync_table(source, target, user_id: int, batch_size: int) -> int:
+    """
+    Make a table on the target shard hold exactly the user's rows of the same table on the source.
+
+    Posts are never edited, so comparing post IDs is enough.
+
+    Args:
+        source: PostRepository or PostArchiveRepository on the source shard.
+        target: Repository of the same kind on the target shard.
+        user_id (int): User ID.
+        batch_size (int): Rows copied per query.
+
+    Returns:
+        int: Number of rows copied.
+    """
+    source_ids = set(await source.get_ids_by_user_id(user_id))
+    target_ids = set(await target.get_ids_by_user_id(user_id))
+
+    missing = sorted(source_ids - target_ids)
+    for start in range(0, len(missing), batch_size):
+        await target.insert_copies(await source.get_by_ids(user_id, missing[start:start + batch_size]))
+    await target.delete_by_ids(user_id, sorted(target_ids - source_ids))
+    return len(missing)
+
+
+async def sync_posts(
+    user_id: int,
+    source: int,
+    target: int,
+    batch_size: int,
+    changes_compacted_version: int = 0,
+) -> int:
+    """
+    Make the target shard hold exactly the user's posts and archived posts on the source shard.
+
+    The user's statistics on the target are recomputed from the copied posts.
+
+    Args:
+        user_id (int): User ID.
+        source (int): Shard to copy from.
+        target (int): Shard to copy to.
+        batch_size (int): Posts copied per query.
+        changes_compacted_version (int): Posts version before which the user's changes
+            are unavailable on the target.
+
+    Returns:
+        int: Number of posts copied.
+    """
+    async with shard_router.session(source) as source_session, shard_router.session(target) as target_session:
+        source_posts = PostRepository(source_session)
+        target_posts = PostRepository(target_session)
+        # Posts first: one archived in between is then copied twice, never missed
+        copied = await sync_table(source_posts, target_posts, user_id, batch_size)
+        copied += await sync_table(source_posts.archive, target_posts.archive, user_id, batch_size)
+        archived_ids = set(await target_posts.archive.get_ids_by_user_id(user_id))
+        duplicates = [post_id for post_id in await target_posts.get_ids_by_user_id(user_id) if post_id in archived_ids]
+        await target_posts.delete_by_ids(user_id, duplicates)
+
+        stats = PostStatsRepository(target_session)
+        actual = await stats.compute_many([user_id])
+        if user_id in actual:
+            await stats.replace(user_id, *actual[user_id])
+        else:
+            await stats.delete(user_id)
+        if changes_compacted_version:
+            await stats.record_changes_compacted(user_id, changes_compacted_version)
+        await target_session.commit()
+        return copied
+
+
+async def delete_posts(user_id: int, shard: int, batch_size: int) -> None:
+    """
+    Delete a user's posts, archived posts, changes and statistics from a shard, in batches.
+
+    Args:
+        user_id (int): User ID.
+        shard (int): Shard to delete from.
+        batch_size (int): Posts deleted per transaction.
+    """
+    async with shard_router.session(shard) as session:
+        posts = PostRepository(session)
+        for table in (posts, posts.archive):
+            post_ids = await table.get_ids_by_user_id(user_id)
+            for start in range(0, len(post_ids), batch_size):
+                await table.delete_by_ids(user_id, post_ids[start:start + batch_size])
+                await session.commit()
+        await PostChangeRepository(session).delete_by_user_id(user_id)
+        await PostStatsRepository(session).delete(user_id)
+        await session.commit()
+
+
+async def reshard_posts(user_id: int, target: int, batch_size: int = 1000, grace_seconds: float = 5.0) -> bool:
+    """
+    Move a user's posts to another shard.
+
+    Args:
+        user_id (int): User ID.
+        target (int): Index of the destination shard.
+        batch_size (int): Posts copied or deleted per query.
+        grace_seconds (float): Delay before deleting the posts from the old shard.
+
+    Returns:
+        bool: True if the posts were moved, False if they were already on the target shard.
+
+    Raises:
+        ValueError: If the user or the shard doesn't exist.
+    """
+    if not 0 <= target < len(shard_router.engines):
+        raise ValueError(f"No shard {target}; {len(shard_router.engines)} configured")
+
+    async with PrimarySessionLocal() as session:
+        if await UserRepository(session).get_by_id(user_id) is None:
+            raise ValueError(f"No user {user_id}")
+        _, post_shard = await UserRepository(session).get_posts_state(user_id)
+    source = shard_router.shard_for(user_id, post_shard)
+    if source == target:
+        return False
+
+    # Bulk copy while the user keeps writing
+    copied = await sync_posts(user_id, source, target, batch_size)
+    logger.info("Copied %s posts of user %s from shard %s to shard %s", copied, user_id, source, target)
+
+    # Post writes lock the same row, so nothing changes on the source from here on
+    async with PrimarySessionLocal() as session:
+        version = (await session.execute(
+            select(User.posts_version).where(User.id == user_id).with_for_update()
+        )).scalar_one()
+        # The change log stays behind, so only tokens from after the switch are served
+        copied = await sync_posts(user_id, source, target, batch_size, changes_compacted_version=version + 1)
+        logger.info("Copied %s posts written meanwhile", copied)
+        # The version bump invalidates cached post lists and search indexes
+        await session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(post_shard=target, posts_version=User.posts_version + 1)
+        )
+        await session.commit()
+
+    await asyncio.sleep(grace_seconds)
+    await delete_posts(user_id, source, batch_size)
+    logger.info("Moved user %s from shard %s to shard %s", user_id, source, target)
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=int, required=True, help="user whose posts to move")
+    parser.add_argument("--to-shard", type=int, required=True, help="index of the destination shard in POST_SHARD_URLS")
+    parser.add_argument("--batch-size", type=int, default=1000, help="posts per query")
+    parser.add_argument("--grace-seconds", type=float, default=5.0, help="delay before deleting the old copies")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    moved = asyncio.run(reshard_posts(args.user_id, args.to_shard, args.batch_size, args.grace_seconds))
+    print(f"Moved user {args.user_id} to shard {args.to_shard}" if moved else "Already on that shard")
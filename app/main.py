@@ -1,38 +1,135 @@
 
-from fastapi import FastAPI
+from fastapi import FastAPI, APIRouter, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from app.api.dependencies.debug import require_debug_token
 from app.api.routes import auth, posts
+from app.core.admission import AdmissionControlMiddleware
+from app.core.cache import cache, post_cache, user_cache
+from app.core.config import settings
+from app.core.deadlines import DeadlineExceeded, DeadlineMiddleware, deadline_exceeded_handler
+from app.core.lifespan import lifespan
+from app.core.logs import AccessLogMiddleware
+from app.core.memory import MemoryProfilerMiddleware, memory_profiler
+from app.core.metrics import metrics
 
-app = FastAPI(
-    title="FastAPI Blog Application",
-    description="A FastAPI application with user authentication and blog posts",
-    version="1.0.0",
-)
-
-# Set up CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(auth.router, prefix="/api", tags=["Authentication"])
-app.include_router(posts.router, prefix="/api", tags=["Posts"])
-
-@app.get("/", tags=["Root"])
+root_router = APIRouter(tags=["Root"])
+
+@root_router.get("/")
 async def root():
     """
     Root endpoint that returns a welcome message.
-    
+
     Returns:
         dict: A simple message indicating the API is running.
     """
     return {"message": "Welcome to the FastAPI Blog application!"}
 
+@root_router.get("/ready")
+async def ready(request: Request):
+    """
+    Readiness endpoint for load balancers and orchestrators.
+
+    Returns:
+        dict: The readiness status. Responds with 503 until startup warm-up has finished.
+    """
+    if not request.app.state.ready:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "warming up"}
+        )
+    return {"status": "ready"}
+
+@root_router.get("/metrics", dependencies=[Depends(require_debug_token)])
+async def get_metrics():
+    """
+    Metrics endpoint reporting this worker's counters, gauges and summaries.
+
+    Requires an X-Debug-Token header matching the DEBUG_TOKEN setting.
+
+    Returns:
+        dict: Current metric values.
+    """
+    return metrics.snapshot()
+
+debug_router = APIRouter(tags=["Debug"], dependencies=[Depends(require_debug_token)])
+
+@debug_router.get("/debug/memory")
+async def get_memory_report(top: int = 10):
+    """
+    Memory report of this worker, served when MEMORY_PROFILING_ENABLED is set.
+
+    Requires an X-Debug-Token header matching the DEBUG_TOKEN setting.
+
+    Walks the whole cache to size it, so it blocks the worker for a moment
+    when the cache is large.
+
+    Args:
+        top (int): Allocation sites listed per route.
+
+    Returns:
+        dict: Traced memory, cache entry counts and sizes by key prefix, and
+            allocation growth per route.
+    """
+    return memory_profiler.report({**cache, **post_cache, **user_cache}, top)
+
+def create_app() -> FastAPI:
+    """
+    Create and configure the FastAPI application.
+
+    Returns:
+        FastAPI: The configured application.
+    """
+    app = FastAPI(
+        title="FastAPI Blog Application",
+        description="A FastAPI application with user authentication and blog posts",
+        version="1.0.0",
+        lifespan=lifespan,
+    )
+    app.state.ready = False
+
+    # Middleware added last runs first.
+
+    # Shed load per route group before requests queue up on the database
+    if settings.ADMISSION_CONTROL_ENABLED:
+        app.add_middleware(AdmissionControlMiddleware)
+
+    # Deadlines start before admission control, so time spent queued counts against them
+    app.add_middleware(DeadlineMiddleware)
+    app.add_exception_handler(DeadlineExceeded, deadline_exceeded_handler)
+
+    # Set up CORS middleware, outside admission control so that 503s carry CORS headers
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Request IDs are assigned before anything else logs
+    if settings.ACCESS_LOG_ENABLED:
+        app.add_middleware(AccessLogMiddleware)
+
+    # Outermost, so the memory of the other middleware is accounted too
+    if settings.MEMORY_PROFILING_ENABLED:
+        app.add_middleware(
+            MemoryProfilerMiddleware,
+            sample_rate=settings.MEMORY_PROFILING_SAMPLE_RATE,
+            frames=settings.MEMORY_PROFILING_FRAMES,
+        )
+        app.include_router(debug_router)
+
+    # Include routers
+    app.include_router(root_router)
+    app.include_router(auth.router, prefix="/api", tags=["Authentication"])
+    app.include_router(posts.router, prefix="/api", tags=["Posts"])
+
+    return app
+
+app = create_app()
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    from app.core.server import run_development
+    run_development()
@@ -1,3 +1,10 @@
 # Import models here so they can be discovered by Alembic
 from app.models.user import User
-from app.models.post import Post 
\ No newline at end of file
+from app.models.post import Post
+from app.models.post_stats import UserPostStats
+from app.models.refresh_token import RefreshToken
+from app.models.revoked_token import RevokedToken
+from app.models.id_block import IdBlock
+from app.models.post_archive import ArchivedPost
+from app.models.post_change import PostChange
+from app.models.idempotency_key import IdempotencyKey
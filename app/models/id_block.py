@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, BigInteger
+
+from app.core.database import Base
+
+class IdBlock(Base):
+    """
+    SQLAlchemy model for ID sequences shared by several databases.
+    
+    Each process reserves a block of IDs at a time by advancing next_id, then
+    hands them out from memory.
+    
+    Attributes:
+        name (str): Primary key, the sequence name (e.g. "posts").
+        next_id (int): First ID not reserved yet.
+    """
+    __tablename__ = "id_blocks"
+    
+    name = Column(String(32), primary_key=True)
+    next_id = Column(BigInteger, nullable=False)
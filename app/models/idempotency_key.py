@@ -0,0 +1,27 @@
+from sqlalchemy import Column, BINARY, LargeBinary, DateTime
+
+from app.core.database import Base
+
+class IdempotencyKey(Base):
+    """
+    SQLAlchemy model for the Idempotency-Keys of recent requests, shared by all workers.
+    
+    A row is inserted when a request claims its key, so concurrent requests
+    with the same key are serialized by the primary key. The response is
+    filled in when the request completes.
+    
+    Attributes:
+        key (bytes): Digest of the scoped idempotency key.
+        fingerprint (bytes): Digest of the request payload.
+        response (bytes): Serialized response, NULL while the request is in flight.
+        locked_until (DateTime): UTC time after which an in-flight request is presumed
+            dead (e.g. its worker crashed), so a retry may take the key over.
+        expires_at (DateTime): UTC time after which the key is forgotten.
+    """
+    __tablename__ = "idempotency_keys"
+    
+    key = Column(BINARY(16), primary_key=True)
+    fingerprint = Column(BINARY(16), nullable=False)
+    response = Column(LargeBinary, nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
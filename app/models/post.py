@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -11,16 +11,28 @@ class Post(Base):
     Attributes:
         id (int): Primary key for the post.
         text (str): Content of the post.
-        user_id (int): Foreign key to the user who created the post.
+        user_id (int): ID of the user who created the post. Not a database-level
+            foreign key, since posts may live on a different shard than users.
         created_at (DateTime): Timestamp when the post was created.
+        deleted_at (DateTime): Timestamp when the post was deleted, None for live posts.
+            Deleted posts stay as tombstones until the purger removes them.
         user (relationship): Relationship to the user who created the post.
     """
     __tablename__ = "posts"
+    __table_args__ = (
+        # Full-text search index, only available on MySQL
+        Index("ix_posts_text_fulltext", "text", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+        # Serves per-user listings ordered by creation time
+        Index("ix_posts_user_id_created_at", "user_id", "created_at"),
+        # Lets the purger find tombstones without scanning live posts
+        Index("ix_posts_deleted_at", "deleted_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     text = Column(Text, nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
     
     # Relationship with user
-    user = relationship("User", back_populates="posts") 
\ No newline at end of file
+    user = relationship("User", back_populates="posts", primaryjoin="User.id == foreign(Post.user_id)") 
\ No newline at end of file
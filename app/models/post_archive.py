@@ -0,0 +1,42 @@
+import zlib
+
+from sqlalchemy import Column, Integer, Boolean, DateTime, LargeBinary, Index
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class ArchivedPost(Base):
+    """
+    SQLAlchemy model for the posts_archive table, holding posts moved out of the posts table by age.
+
+    Archived posts keep their ID and creation time, so they read like posts and
+    sort after every post still in the posts table.
+
+    Attributes:
+        id (int): ID of the original post.
+        user_id (int): ID of the user who created the post.
+        created_at (DateTime): Timestamp when the post was created.
+        archived_at (DateTime): Timestamp when the post was archived.
+        text_bytes (int): UTF-8 size of the post's text, for the post statistics.
+        compressed (bool): Whether body is zlib-compressed.
+        body (bytes): The post's text, UTF-8 encoded.
+    """
+    __tablename__ = "posts_archive"
+    __table_args__ = (
+        # Serves per-user listings ordered by creation time
+        Index("ix_posts_archive_user_id_created_at", "user_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    text_bytes = Column(Integer, nullable=False)
+    compressed = Column(Boolean, nullable=False, default=False, server_default="0")
+    # MEDIUMBLOB on MySQL, large enough for the biggest accepted post
+    body = Column(LargeBinary(length=16777215), nullable=False)
+
+    @property
+    def text(self) -> str:
+        data = zlib.decompress(self.body) if self.compressed else self.body
+        return data.decode("utf-8")
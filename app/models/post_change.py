@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, Boolean, DateTime, Index
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class PostChange(Base):
+    """
+    SQLAlchemy model for the post_changes table, an append-only log of each user's post creates and deletes.
+
+    Entries are keyed by the user's posts version after the change, so the
+    changes since a version are a range of the primary key. The log lives on
+    the same shard as the user's posts and is written in the same transaction.
+    Old entries are removed by python -m app.jobs.compact_post_changes.
+
+    Attributes:
+        user_id (int): ID of the user whose posts changed.
+        version (int): The user's posts version after the change.
+        post_id (int): ID of the created or deleted post.
+        deleted (bool): True for a delete, False for a create.
+        created_at (DateTime): Timestamp when the change was made.
+    """
+    __tablename__ = "post_changes"
+    __table_args__ = (
+        # Serves compaction by age
+        Index("ix_post_changes_created_at", "created_at"),
+    )
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    post_id = Column(Integer, nullable=False)
+    deleted = Column(Boolean, nullable=False, default=False, server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime
+
+from app.core.database import Base
+
+class UserPostStats(Base):
+    """
+    SQLAlchemy model for precomputed per-user post statistics.
+    
+    Rows are maintained in the same transaction as post creates and deletes,
+    so reading a user's statistics is a single primary key lookup.
+    
+    Attributes:
+        user_id (int): Primary key, the user the statistics belong to. Stored on
+            the same shard as the user's posts.
+        post_count (int): Number of posts the user has.
+        total_text_bytes (int): Total UTF-8 size of the user's post texts.
+        last_post_at (DateTime): Creation time of the user's newest post.
+        changes_compacted_version (int): Posts version up to which the user's entries
+            in post_changes were compacted away; older change tokens can't be served.
+    """
+    __tablename__ = "user_post_stats"
+    
+    user_id = Column(Integer, primary_key=True)
+    post_count = Column(Integer, nullable=False, default=0)
+    total_text_bytes = Column(BigInteger, nullable=False, default=0)
+    last_post_at = Column(DateTime(timezone=True), nullable=True)
+    changes_compacted_version = Column(Integer, nullable=False, default=0, server_default="0")
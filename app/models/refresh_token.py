@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, BigInteger, Boolean, DateTime, ForeignKey, BINARY
+
+from app.core.database import Base
+
+class RefreshToken(Base):
+    """
+    SQLAlchemy model for issued refresh tokens.
+    
+    Only a keyed hash of each token's secret is stored. Every rotation issues a
+    new token in the same family and marks the old one used; presenting a used
+    token again means it was stolen, and the whole family is revoked.
+    
+    Attributes:
+        id (int): Primary key, also the public part of the token.
+        user_id (int): The user the token was issued to.
+        family_id (int): Shared by all tokens rotated from the same login.
+        token_hash (bytes): HMAC-SHA256 of the token's secret.
+        expires_at (DateTime): UTC time after which the token is rejected.
+        used (bool): Whether the token has been exchanged already.
+        revoked (bool): Whether the token's family has been revoked.
+    """
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    family_id = Column(BigInteger, nullable=False, index=True)
+    token_hash = Column(BINARY(32), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    used = Column(Boolean, nullable=False, default=False, server_default="0")
+    revoked = Column(Boolean, nullable=False, default=False, server_default="0")
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime
+
+from app.core.database import Base
+
+class RevokedToken(Base):
+    """
+    SQLAlchemy model for revoked access tokens.
+    
+    Rows are only appended; workers poll for rows with a higher ID than the
+    last one they read to keep their in-memory denylist up to date.
+    
+    Attributes:
+        id (int): Primary key, increasing in insertion order.
+        jti (str): ID of the revoked token.
+        expires_at (DateTime): UTC expiry of the revoked token, after which the row is useless.
+    """
+    __tablename__ = "revoked_tokens"
+    
+    id = Column(Integer, primary_key=True)
+    jti = Column(String(32), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, SmallInteger, String, DateTime
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -13,6 +13,10 @@ class User(Base):
         email (str): User's email address, must be unique.
         hashed_password (str): Hashed password for the user.
         created_at (DateTime): Timestamp when the user was created.
+        posts_version (int): Counter incremented on every change to the user's posts.
+        post_shard (int): Index of the shard holding the user's posts, assigned on first post.
+        last_write_at (DateTime): UTC time of the user's last write, kept with read replicas
+            so their reads stay on the primary for a while.
         posts (relationship): Relationship to the user's posts.
     """
     __tablename__ = "users"
@@ -21,6 +25,14 @@ class User(Base):
     email = Column(String(255), unique=True, index=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    posts_version = Column(Integer, nullable=False, default=0, server_default="0")
+    post_shard = Column(SmallInteger, nullable=True)
+    last_write_at = Column(DateTime, nullable=True)
     
     # Relationship with posts
-    posts = relationship("Post", back_populates="user", cascade="all, delete-orphan") 
\ No newline at end of file
+    posts = relationship(
+        "Post",
+        back_populates="user",
+        cascade="all, delete-orphan",
+        primaryjoin="User.id == foreign(Post.user_id)",
+    ) 
\ No newline at end of file
@@ -0,0 +1,147 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select, update, delete, or_, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.idempotency_key import IdempotencyKey
+
+
+class IdempotencyKeyRepository:
+    """
+    Repository for the idempotency keys shared by all workers.
+    
+    Every method but record commits, so a key is visible to other workers as
+    soon as it is claimed or completed.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize the repository with a database session.
+        
+        Args:
+            db (AsyncSession): SQLAlchemy async session for database operations.
+        """
+        self.db = db
+    
+    async def insert(self, key: bytes, fingerprint: bytes, locked_until: datetime, expires_at: datetime) -> bool:
+        """
+        Claim a new key for an in-flight request.
+        
+        Args:
+            key (bytes): Key digest.
+            fingerprint (bytes): Payload digest.
+            locked_until (datetime): UTC time after which the request is presumed dead.
+            expires_at (datetime): UTC time after which the key is forgotten.
+            
+        Returns:
+            bool: True if the key was claimed, False if it already exists.
+        """
+        self.db.add(IdempotencyKey(key=key, fingerprint=fingerprint, locked_until=locked_until, expires_at=expires_at))
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            return False
+        return True
+    
+    async def get(self, key: bytes) -> Optional[IdempotencyKey]:
+        """
+        Get a key's row, bypassing the session's identity map.
+        
+        Args:
+            key (bytes): Key digest.
+            
+        Returns:
+            Optional[IdempotencyKey]: The row, or None if the key is unknown.
+        """
+        query = select(IdempotencyKey).where(IdempotencyKey.key == key).execution_options(populate_existing=True)
+        return (await self.db.execute(query)).scalar_one_or_none()
+    
+    async def take_over(
+        self,
+        key: bytes,
+        fingerprint: bytes,
+        now: datetime,
+        locked_until: datetime,
+        expires_at: datetime,
+    ) -> bool:
+        """
+        Claim a key that expired, or whose request is presumed dead.
+        
+        Args:
+            key (bytes): Key digest.
+            fingerprint (bytes): Payload digest of the new request.
+            now (datetime): Current UTC time.
+            locked_until (datetime): UTC time after which the new request is presumed dead.
+            expires_at (datetime): UTC time after which the key is forgotten.
+            
+        Returns:
+            bool: True if the key was claimed, False if it is still held or completed.
+        """
+        stmt = (
+            update(IdempotencyKey)
+            .where(
+                IdempotencyKey.key == key,
+                or_(
+                    IdempotencyKey.expires_at <= now,
+                    and_(IdempotencyKey.response.is_(None), IdempotencyKey.locked_until <= now),
+                ),
+            )
+            .values(fingerprint=fingerprint, response=None, locked_until=locked_until, expires_at=expires_at)
+        )
+        result = await self.db.execute(stmt)
+        await self.db.commit()
+        return result.rowcount > 0
+    
+    async def complete(self, key: bytes, response: bytes) -> None:
+        """
+        Record the response of a key's request.
+        
+        Args:
+            key (bytes): Key digest.
+            response (bytes): Serialized response.
+        """
+        await self.record(key, response)
+        await self.db.commit()
+    
+    async def record(self, key: bytes, response: bytes) -> None:
+        """
+        Record the response of a key's request in the current transaction, without committing.
+        
+        Args:
+            key (bytes): Key digest.
+            response (bytes): Serialized response.
+        """
+        stmt = update(IdempotencyKey).where(IdempotencyKey.key == key).values(response=response, locked_until=None)
+        await self.db.execute(stmt)
+    
+    async def release(self, key: bytes) -> None:
+        """
+        Delete a key whose request failed, unless it has completed.
+        
+        Args:
+            key (bytes): Key digest.
+        """
+        await self.db.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.response.is_(None))
+        )
+        await self.db.commit()
+    
+    async def delete_expired(self, now: datetime, limit: int) -> int:
+        """
+        Delete a batch of expired keys and commit.
+        
+        Args:
+            now (datetime): Current UTC time.
+            limit (int): Maximum number of keys to delete.
+            
+        Returns:
+            int: Number of keys deleted.
+        """
+        query = select(IdempotencyKey.key).where(IdempotencyKey.expires_at <= now).limit(limit)
+        keys = (await self.db.execute(query)).scalars().all()
+        if keys:
+            await self.db.execute(delete(IdempotencyKey).where(IdempotencyKey.key.in_(keys)))
+            await self.db.commit()
+        return len(keys)
@@ -0,0 +1,304 @@
+import zlib
+from datetime import datetime
+from typing import Optional, List, Tuple
+from sqlalchemy import select, insert, delete, func, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.post import Post
+from app.models.post_archive import ArchivedPost
+from app.repositories.post_change_repository import PostChangeRepository
+from app.repositories.post_stats_repository import PostStatsRepository, utf8_length, post_not_deleted
+
+
+def older_than(model, dialect_name: str, before: Tuple[datetime, int]):
+    """
+    Build the keyset condition for the posts that sort after a given post.
+
+    Posts are listed newest first, ties broken by descending ID.
+
+    Args:
+        model: Post or ArchivedPost.
+        dialect_name (str): Name of the database dialect.
+        before (Tuple[datetime, int]): (created_at, id) of the last post already returned.
+
+    Returns:
+        The SQL condition.
+    """
+    created_at, post_id = before
+    column, value = model.created_at, created_at
+    if dialect_name == "sqlite":
+        # SQLite stores timestamps as text, without fractional seconds when set by the
+        # server default, so compare them as numbers rather than strings
+        column, value = func.julianday(model.created_at), func.julianday(created_at.isoformat(" "))
+    return or_(column < value, and_(column == value, model.id < post_id))
+
+
+def archived_row(post: Post, compress: bool) -> dict:
+    """
+    Build the posts_archive row for a post.
+
+    Args:
+        post (Post): The post to archive.
+        compress (bool): Whether to compress the text; kept uncompressed when that doesn't save space.
+
+    Returns:
+        dict: Column values.
+    """
+    body = post.text.encode("utf-8")
+    compressed = False
+    if compress:
+        packed = zlib.compress(body)
+        if len(packed) < len(body):
+            body, compressed = packed, True
+    return {
+        "id": post.id,
+        "user_id": post.user_id,
+        "created_at": post.created_at,
+        "text_bytes": utf8_length(post.text),
+        "compressed": compressed,
+        "body": body,
+    }
+
+
+class PostArchiveRepository:
+    """
+    Repository for archived posts.
+
+    Old posts are moved from the posts table into posts_archive by the
+    archive_posts job, keeping the posts table and its indexes small. The post
+    statistics cover archived posts too, so archiving doesn't change them.
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize the repository with a database session.
+
+        Args:
+            db (AsyncSession): SQLAlchemy async session for database operations.
+        """
+        self.db = db
+        self.stats = PostStatsRepository(db)
+        self.changes = PostChangeRepository(db)
+
+    async def get_page(
+        self,
+        user_id: int,
+        limit: int,
+        before: Optional[Tuple[datetime, int]] = None,
+    ) -> List[ArchivedPost]:
+        """
+        Get a page of a user's archived posts, newest first.
+
+        Args:
+            user_id (int): User ID.
+            limit (int): Maximum number of posts.
+            before (Optional[Tuple[datetime, int]]): (created_at, id) of the last post of the previous page.
+
+        Returns:
+            List[ArchivedPost]: The posts.
+        """
+        query = select(ArchivedPost).where(ArchivedPost.user_id == user_id)
+        if before is not None:
+            query = query.where(older_than(ArchivedPost, self.db.get_bind().dialect.name, before))
+        query = query.order_by(ArchivedPost.created_at.desc(), ArchivedPost.id.desc()).limit(limit)
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
+    async def get_by_id(self, post_id: int) -> Optional[ArchivedPost]:
+        """
+        Get an archived post by ID.
+
+        Args:
+            post_id (int): Post ID.
+
+        Returns:
+            Optional[ArchivedPost]: The post if found, None otherwise.
+        """
+        query = select(ArchivedPost).where(ArchivedPost.id == post_id)
+        result = await self.db.execute(query)
+        return result.scalar_one_or_none()
+
+    async def get_by_ids(self, user_id: int, post_ids: List[int]) -> List[ArchivedPost]:
+        """
+        Get several of a user's archived posts by ID in one query.
+
+        Args:
+            user_id (int): ID of the user who owns the posts.
+            post_ids (List[int]): Post IDs.
+
+        Returns:
+            List[ArchivedPost]: The posts found, in no particular order.
+        """
+        if not post_ids:
+            return []
+        query = select(ArchivedPost).where(ArchivedPost.id.in_(post_ids), ArchivedPost.user_id == user_id)
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
+    async def get_existing_ids(self, user_id: int, post_ids: List[int]) -> List[int]:
+        """
+        Get which of several of a user's posts are in the archive, without loading them.
+
+        Args:
+            user_id (int): ID of the user who owns the posts.
+            post_ids (List[int]): Post IDs.
+
+        Returns:
+            List[int]: IDs of the archived posts found, in no particular order.
+        """
+        if not post_ids:
+            return []
+        query = select(ArchivedPost.id).where(ArchivedPost.id.in_(post_ids), ArchivedPost.user_id == user_id)
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
+    async def get_ids_by_user_id(self, user_id: int) -> List[int]:
+        """
+        Get the IDs of all of a user's archived posts.
+
+        Args:
+            user_id (int): User ID.
+
+        Returns:
+            List[int]: Post IDs, in ascending order.
+        """
+        query = select(ArchivedPost.id).where(ArchivedPost.user_id == user_id).order_by(ArchivedPost.id)
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
+    async def insert_copies(self, posts: List[ArchivedPost]) -> None:
+        """
+        Insert copies of archived posts read from another shard in the current transaction.
+
+        Post statistics are not updated.
+
+        Args:
+            posts (List[ArchivedPost]): Archived posts to copy.
+        """
+        if not posts:
+            return
+        rows = [
+            {
+                "id": post.id,
+                "user_id": post.user_id,
+                "created_at": post.created_at,
+                "archived_at": post.archived_at,
+                "text_bytes": post.text_bytes,
+                "compressed": post.compressed,
+                "body": post.body,
+            }
+            for post in posts
+        ]
+        await self.db.execute(insert(ArchivedPost), rows)
+
+    async def delete_by_ids(self, user_id: int, post_ids: List[int]) -> None:
+        """
+        Delete several of a user's archived posts in the current transaction.
+
+        Post statistics are not updated; this is for moving posts between shards.
+
+        Args:
+            user_id (int): ID of the user who owns the posts.
+            post_ids (List[int]): Post IDs.
+        """
+        if post_ids:
+            await self.db.execute(
+                delete(ArchivedPost).where(ArchivedPost.user_id == user_id, ArchivedPost.id.in_(post_ids))
+            )
+
+    async def delete(self, post_id: int, user_id: int, version: Optional[int] = None) -> bool:
+        """
+        Delete an archived post.
+
+        Args:
+            post_id (int): ID of the post to delete.
+            user_id (int): ID of the user who owns the post.
+            version (Optional[int]): The user's posts version after this change. When given,
+                the delete is logged in the user's change feed.
+
+        Returns:
+            bool: True if the post was deleted, False otherwise.
+        """
+        size_query = select(ArchivedPost.text_bytes).where(ArchivedPost.id == post_id, ArchivedPost.user_id == user_id)
+        text_bytes = (await self.db.execute(size_query)).scalar_one_or_none() or 0
+
+        stmt = delete(ArchivedPost).where(ArchivedPost.id == post_id, ArchivedPost.user_id == user_id)
+        result = await self.db.execute(stmt)
+        if result.rowcount > 0:
+            await self.stats.record_post_deleted(user_id, text_bytes)
+            if version is not None:
+                await self.changes.record(user_id, version, post_id, deleted=True)
+        await self.db.commit()
+
+        return result.rowcount > 0
+
+    async def find_archivable(self, cutoff: datetime, after_id: int, limit: int) -> Tuple[Optional[int], List[int]]:
+        """
+        Scan the next batch of posts for old ones, without locking them.
+
+        Posts are scanned in primary key order, so every batch is a short range
+        scan whatever the table size.
+
+        Args:
+            cutoff (datetime): Posts created before this UTC time are archivable.
+            after_id (int): Last post ID scanned by the previous batch, 0 to start.
+            limit (int): Number of posts scanned.
+
+        Returns:
+            Tuple[Optional[int], List[int]]: Last post ID scanned (None when no posts were left
+            to scan), and the IDs of the users owning archivable posts in the batch, sorted.
+        """
+        scan = select(Post.id).where(Post.id > after_id).order_by(Post.id).limit(limit)
+        post_ids = (await self.db.execute(scan)).scalars().all()
+        if not post_ids:
+            return None, []
+
+        owners = (
+            select(Post.user_id)
+            .where(Post.id > after_id, Post.id <= post_ids[-1], Post.created_at < cutoff, post_not_deleted)
+            .distinct()
+            .order_by(Post.user_id)
+        )
+        return post_ids[-1], list((await self.db.execute(owners)).scalars().all())
+
+    async def archive_range(
+        self,
+        cutoff: datetime,
+        after_id: int,
+        last_id: int,
+        user_ids: List[int],
+        compress: bool,
+    ) -> int:
+        """
+        Move the old posts of some users within a range of post IDs, in the current transaction.
+
+        The caller commits, after bumping the users' posts versions (see
+        find_archivable), so their cached lists and search indexes are
+        rebuilt without the archived posts.
+
+        Args:
+            cutoff (datetime): Posts created before this UTC time are archived.
+            after_id (int): The range starts after this post ID.
+            last_id (int): The range ends with this post ID.
+            user_ids (List[int]): Users whose posts are archived.
+            compress (bool): Whether to compress the archived texts.
+
+        Returns:
+            int: Number of posts archived.
+        """
+        query = (
+            select(Post)
+            .where(
+                Post.id > after_id,
+                Post.id <= last_id,
+                Post.user_id.in_(user_ids),
+                Post.created_at < cutoff,
+                post_not_deleted,
+            )
+            .with_for_update()
+        )
+        posts = (await self.db.execute(query)).scalars().all()
+        if posts:
+            await self.db.execute(insert(ArchivedPost), [archived_row(post, compress) for post in posts])
+            await self.db.execute(delete(Post).where(Post.id.in_([post.id for post in posts])))
+        return len(posts)
@@ -0,0 +1,121 @@
+from datetime import datetime
+from typing import List
+from sqlalchemy import select, insert, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.post_change import PostChange
+from app.repositories.post_stats_repository import PostStatsRepository
+
+
+class PostChangeRepository:
+    """
+    Repository for the per-user log of post creates and deletes.
+
+    Write methods don't commit: entries are recorded inside the post create or
+    delete transaction, so the log never misses a committed change.
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize the repository with a database session.
+
+        Args:
+            db (AsyncSession): SQLAlchemy async session for database operations.
+        """
+        self.db = db
+        self.stats = PostStatsRepository(db)
+
+    async def record(self, user_id: int, version: int, post_id: int, deleted: bool) -> None:
+        """
+        Log a post create or delete in the current transaction.
+
+        Args:
+            user_id (int): ID of the user whose posts changed.
+            version (int): The user's posts version after the change.
+            post_id (int): ID of the created or deleted post.
+            deleted (bool): True for a delete, False for a create.
+        """
+        await self.db.execute(
+            insert(PostChange).values(user_id=user_id, version=version, post_id=post_id, deleted=deleted)
+        )
+
+    async def latest_version(self, user_id: int) -> int:
+        """
+        Get the posts version of a user's most recent logged change.
+
+        Args:
+            user_id (int): ID of the user.
+
+        Returns:
+            int: The highest logged version, 0 if none is logged.
+        """
+        query = select(func.max(PostChange.version)).where(PostChange.user_id == user_id)
+        return (await self.db.execute(query)).scalar() or 0
+
+    async def get_since(self, user_id: int, since: int, until: int, limit: int) -> List[PostChange]:
+        """
+        Get a user's changes after a posts version, oldest first.
+
+        Args:
+            user_id (int): User ID.
+            since (int): Posts version the caller is up to date with.
+            until (int): Highest posts version to return changes for.
+            limit (int): Maximum number of changes.
+
+        Returns:
+            List[PostChange]: The changes.
+        """
+        query = (
+            select(PostChange)
+            .where(PostChange.user_id == user_id, PostChange.version > since, PostChange.version <= until)
+            .order_by(PostChange.version)
+            .limit(limit)
+        )
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
+    async def compact_batch(self, before: datetime, limit: int) -> int:
+        """
+        Delete the oldest batch of changes made before a time, and commit.
+
+        Each user's changes are removed up to their newest compacted version,
+        which is recorded so that tokens older than it are rejected rather than
+        answered with an incomplete list of changes.
+
+        Args:
+            before (datetime): Changes made before this UTC time are deleted.
+            limit (int): Maximum number of changes looked at.
+
+        Returns:
+            int: Number of changes deleted.
+        """
+        query = (
+            select(PostChange.user_id, PostChange.version)
+            .where(PostChange.created_at < before)
+            .order_by(PostChange.created_at)
+            .limit(limit)
+        )
+        # Structure: {user_id: newest version to compact}
+        horizons = {}
+        for user_id, version in await self.db.execute(query):
+            horizons[user_id] = max(version, horizons.get(user_id, 0))
+
+        deleted = 0
+        for user_id, version in horizons.items():
+            await self.stats.record_changes_compacted(user_id, version)
+            result = await self.db.execute(
+                delete(PostChange).where(PostChange.user_id == user_id, PostChange.version <= version)
+            )
+            deleted += result.rowcount
+        await self.db.commit()
+
+        return deleted
+
+    async def delete_by_user_id(self, user_id: int) -> None:
+        """
+        Delete all of a user's changes in the current transaction.
+
+        Args:
+            user_id (int): User ID.
+        """
+        await self.db.execute(delete(PostChange).where(PostChange.user_id == user_id))
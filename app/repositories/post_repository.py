@@ -1,8 +1,14 @@
-from typing import Optional, List
-from sqlalchemy import select, delete
+from datetime import datetime
+from typing import Awaitable, Callable, Optional, List, Tuple
+from sqlalchemy import select, insert, update, delete, func, and_, or_
+from sqlalchemy.dialects.mysql import match
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.search import post_search_index
 from app.models.post import Post
+from app.repositories.post_archive_repository import PostArchiveRepository, older_than
+from app.repositories.post_change_repository import PostChangeRepository
+from app.repositories.post_stats_repository import PostStatsRepository, utf8_length, post_text_bytes, post_not_deleted
 
 class PostRepository:
     """
@@ -10,6 +16,7 @@ class PostRepository:
     
     This class handles all database interactions for the Post model,
     following the repository pattern to separate business logic from data access.
+    Deleted posts are soft-deleted and left out of every read until purged.
     """
     
     def __init__(self, db: AsyncSession):
@@ -20,23 +27,49 @@ class PostRepository:
             db (AsyncSession): SQLAlchemy async session for database operations.
         """
         self.db = db
+        self.stats = PostStatsRepository(db)
+        self.archive = PostArchiveRepository(db)
+        self.changes = PostChangeRepository(db)
     
-    async def create(self, text: str, user_id: int) -> Post:
+    async def create(
+        self,
+        text: str,
+        user_id: int,
+        post_id: Optional[int] = None,
+        text_bytes: Optional[int] = None,
+        version: Optional[int] = None,
+        before_commit: Optional[Callable[[Post], Awaitable[None]]] = None,
+    ) -> Post:
         """
         Create a new post in the database.
         
         Args:
             text (str): Post content.
             user_id (int): ID of the user creating the post.
+            post_id (Optional[int]): ID to give the post, from the shared allocator when
+                posts are sharded. The database assigns one if not given.
+            text_bytes (Optional[int]): UTF-8 size of the text, if the caller already knows it.
+            version (Optional[int]): The user's posts version after this change. When given,
+                the create is logged in the user's change feed.
+            before_commit (Optional[Callable[[Post], Awaitable[None]]]): Called with the flushed
+                post just before the commit, to write more in the same transaction.
             
         Returns:
             Post: The created post.
         """
-        db_post = Post(text=text, user_id=user_id)
+        # Set here rather than by the server default, so nothing is read back after the commit
+        db_post = Post(id=post_id, text=text, user_id=user_id, created_at=datetime.utcnow())
         
         self.db.add(db_post)
+        await self.db.flush()
+        await self.stats.record_post_created(user_id, utf8_length(text) if text_bytes is None else text_bytes)
+        if version is not None:
+            await self.changes.record(user_id, version, db_post.id, deleted=False)
+        if before_commit is not None:
+            await before_commit(db_post)
         await self.db.commit()
-        await self.db.refresh(db_post)
+        
+        post_search_index.add(user_id, db_post.id, text)
         
         return db_post
     
@@ -50,13 +83,13 @@ class PostRepository:
         Returns:
             Optional[Post]: The post if found, None otherwise.
         """
-        query = select(Post).where(Post.id == post_id)
+        query = select(Post).where(Post.id == post_id, post_not_deleted)
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
     
     async def get_by_user_id(self, user_id: int) -> List[Post]:
         """
-        Get all posts for a user.
+        Get all posts for a user, not including archived posts.
         
         Args:
             user_id (int): User ID.
@@ -64,23 +97,232 @@ class PostRepository:
         Returns:
             List[Post]: List of posts belonging to the user.
         """
-        query = select(Post).where(Post.user_id == user_id).order_by(Post.created_at.desc())
+        query = select(Post).where(Post.user_id == user_id, post_not_deleted).order_by(Post.created_at.desc())
+        result = await self.db.execute(query)
+        return result.scalars().all()
+    
+    async def get_page(
+        self,
+        user_id: int,
+        limit: int,
+        before: Optional[Tuple[datetime, int]] = None,
+    ) -> List[Post]:
+        """
+        Get a page of a user's posts, newest first, not including archived posts.
+        
+        Args:
+            user_id (int): User ID.
+            limit (int): Maximum number of posts.
+            before (Optional[Tuple[datetime, int]]): (created_at, id) of the last post of the previous page.
+            
+        Returns:
+            List[Post]: The posts.
+        """
+        query = select(Post).where(Post.user_id == user_id, post_not_deleted)
+        if before is not None:
+            query = query.where(older_than(Post, self.db.get_bind().dialect.name, before))
+        query = query.order_by(Post.created_at.desc(), Post.id.desc()).limit(limit)
+        result = await self.db.execute(query)
+        return result.scalars().all()
+    
+    async def get_by_ids(self, user_id: int, post_ids: List[int]) -> List[Post]:
+        """
+        Get several of a user's posts by ID in one query.
+        
+        Args:
+            user_id (int): ID of the user who owns the posts.
+            post_ids (List[int]): Post IDs.
+            
+        Returns:
+            List[Post]: The posts found, in no particular order.
+        """
+        if not post_ids:
+            return []
+        query = select(Post).where(Post.id.in_(post_ids), Post.user_id == user_id, post_not_deleted)
+        result = await self.db.execute(query)
+        return result.scalars().all()
+    
+    async def get_existing_ids(self, user_id: int, post_ids: List[int]) -> List[int]:
+        """
+        Get which of several of a user's posts still exist, without loading them.
+        
+        Args:
+            user_id (int): ID of the user who owns the posts.
+            post_ids (List[int]): Post IDs.
+            
+        Returns:
+            List[int]: IDs of the posts found, in no particular order.
+        """
+        if not post_ids:
+            return []
+        query = select(Post.id).where(Post.id.in_(post_ids), Post.user_id == user_id, post_not_deleted)
+        result = await self.db.execute(query)
+        return result.scalars().all()
+    
+    async def get_ids_by_user_id(self, user_id: int) -> List[int]:
+        """
+        Get the IDs of all of a user's posts.
+        
+        Args:
+            user_id (int): User ID.
+            
+        Returns:
+            List[int]: Post IDs, in ascending order.
+        """
+        query = select(Post.id).where(Post.user_id == user_id, post_not_deleted).order_by(Post.id)
+        result = await self.db.execute(query)
+        return result.scalars().all()
+    
+    async def insert_copies(self, posts: List[Post]) -> None:
+        """
+        Insert copies of posts read from another shard, keeping their IDs, in the current transaction.
+        
+        Post statistics are not updated.
+        
+        Args:
+            posts (List[Post]): Posts to copy.
+        """
+        if not posts:
+            return
+        rows = [
+            {"id": post.id, "text": post.text, "user_id": post.user_id, "created_at": post.created_at}
+            for post in posts
+        ]
+        await self.db.execute(insert(Post), rows)
+    
+    async def delete_by_ids(self, user_id: int, post_ids: List[int]) -> None:
+        """
+        Delete several of a user's posts in the current transaction.
+        
+        Post statistics are not updated; this is for moving posts between shards.
+        
+        Args:
+            user_id (int): ID of the user who owns the posts.
+            post_ids (List[int]): Post IDs.
+        """
+        if post_ids:
+            await self.db.execute(delete(Post).where(Post.user_id == user_id, Post.id.in_(post_ids)))
+    
+    def supports_fulltext(self) -> bool:
+        """
+        Check whether the database has a FULLTEXT index to search posts with.
+        
+        Returns:
+            bool: True on MySQL, False otherwise.
+        """
+        return self.db.get_bind().dialect.name == "mysql"
+    
+    async def search_fulltext(
+        self,
+        user_id: int,
+        query: str,
+        limit: int,
+        after: Optional[Tuple[float, int]] = None,
+    ) -> List[Tuple[Post, float]]:
+        """
+        Search a user's posts with the MySQL FULLTEXT index.
+        
+        Args:
+            user_id (int): ID of the user whose posts to search.
+            query (str): Search terms.
+            limit (int): Maximum number of results.
+            after (Optional[Tuple[float, int]]): (score, post_id) of the last result of the previous page.
+            
+        Returns:
+            List[Tuple[Post, float]]: Posts with their relevance, best match first, ties by newest post.
+        """
+        score = match(Post.text, against=query).in_natural_language_mode()
+        stmt = select(Post, score.label("score")).where(Post.user_id == user_id, post_not_deleted, score > 0)
+        if after is not None:
+            after_score, after_id = after
+            stmt = stmt.where(or_(score < after_score, and_(score == after_score, Post.id < after_id)))
+        stmt = stmt.order_by(score.desc(), Post.id.desc()).limit(limit)
+        result = await self.db.execute(stmt)
+        return [(post, float(relevance)) for post, relevance in result.all()]
+    
+    async def get_recently_active_user_ids(self, limit: int) -> List[int]:
+        """
+        Get the IDs of the users who posted most recently.
+        
+        Args:
+            limit (int): Maximum number of user IDs to return.
+            
+        Returns:
+            List[int]: User IDs, most recently active first.
+        """
+        query = (
+            select(Post.user_id)
+            .where(post_not_deleted)
+            .group_by(Post.user_id)
+            .order_by(func.max(Post.created_at).desc())
+            .limit(limit)
+        )
         result = await self.db.execute(query)
         return result.scalars().all()
     
-    async def delete(self, post_id: int, user_id: int) -> bool:
+    async def delete(self, post_id: int, user_id: int, version: Optional[int] = None) -> bool:
         """
-        Delete a post.
+        Delete a post by marking it deleted.
+        
+        Only the deleted_at column is updated, so the request doesn't wait for
+        the row and its index entries to be removed; the purger hard-deletes
+        the tombstone later.
         
         Args:
             post_id (int): ID of the post to delete.
             user_id (int): ID of the user who owns the post.
+            version (Optional[int]): The user's posts version after this change. When given,
+                the delete is logged in the user's change feed.
             
         Returns:
             bool: True if the post was deleted, False otherwise.
         """
-        stmt = delete(Post).where(Post.id == post_id, Post.user_id == user_id)
+        size_query = select(post_text_bytes).where(Post.id == post_id, Post.user_id == user_id, post_not_deleted)
+        text_bytes = (await self.db.execute(size_query)).scalar_one_or_none() or 0
+        
+        stmt = (
+            update(Post)
+            .where(Post.id == post_id, Post.user_id == user_id, post_not_deleted)
+            .values(deleted_at=func.now())
+        )
         result = await self.db.execute(stmt)
+        if result.rowcount > 0:
+            await self.stats.record_post_deleted(user_id, text_bytes)
+            if version is not None:
+                await self.changes.record(user_id, version, post_id, deleted=True)
         await self.db.commit()
         
-        return result.rowcount > 0 
\ No newline at end of file
+        post_search_index.remove(user_id, post_id)
+        
+        return result.rowcount > 0 
+    
+    async def purge_deleted(self, limit: int) -> int:
+        """
+        Hard-delete a batch of soft-deleted posts, oldest tombstones first, and commit.
+        
+        Args:
+            limit (int): Maximum number of posts to delete.
+            
+        Returns:
+            int: Number of posts deleted.
+        """
+        query = select(Post.id).where(Post.deleted_at.is_not(None)).order_by(Post.deleted_at).limit(limit)
+        post_ids = (await self.db.execute(query)).scalars().all()
+        if not post_ids:
+            return 0
+        
+        stmt = delete(Post).where(Post.id.in_(post_ids), Post.deleted_at.is_not(None))
+        result = await self.db.execute(stmt)
+        await self.db.commit()
+        
+        return result.rowcount
+    
+    async def count_deleted(self) -> int:
+        """
+        Count the soft-deleted posts waiting to be purged.
+        
+        Returns:
+            int: Number of tombstones.
+        """
+        query = select(func.count()).select_from(Post).where(Post.deleted_at.is_not(None))
+        return (await self.db.execute(query)).scalar_one()
@@ -0,0 +1,238 @@
+from datetime import datetime
+from typing import Optional, List, Dict, Tuple
+from sqlalchemy import select, update, delete, func, cast, case, LargeBinary
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.post import Post
+from app.models.post_archive import ArchivedPost
+from app.models.post_stats import UserPostStats
+
+
+def utf8_length(text: str) -> int:
+    """
+    Get the UTF-8 encoded size of a string, without encoding it when it is ASCII.
+
+    Args:
+        text (str): The string to measure.
+
+    Returns:
+        int: Size in bytes.
+    """
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+# SQL expression for the UTF-8 size of a post's text (LENGTH counts characters on some databases)
+post_text_bytes = func.length(cast(Post.text, LargeBinary))
+
+# SQL condition leaving out soft-deleted posts, which stay in the table until purged
+post_not_deleted = Post.deleted_at.is_(None)
+
+
+def _newest_post_time(user_id: int):
+    # Served from the (user_id, created_at) indexes; archived posts are older than all others
+    return func.coalesce(
+        select(func.max(Post.created_at)).where(Post.user_id == user_id, post_not_deleted).scalar_subquery(),
+        select(func.max(ArchivedPost.created_at)).where(ArchivedPost.user_id == user_id).scalar_subquery(),
+    )
+
+
+class PostStatsRepository:
+    """
+    Repository for per-user post statistics.
+
+    Write methods don't commit: they run inside the caller's post create or
+    delete transaction so the statistics never drift from the posts table.
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize the repository with a database session.
+
+        Args:
+            db (AsyncSession): SQLAlchemy async session for database operations.
+        """
+        self.db = db
+
+    async def get(self, user_id: int) -> Optional[UserPostStats]:
+        """
+        Get a user's post statistics.
+
+        Args:
+            user_id (int): User ID.
+
+        Returns:
+            Optional[UserPostStats]: The statistics row, None if the user never posted.
+        """
+        query = select(UserPostStats).where(UserPostStats.user_id == user_id)
+        result = await self.db.execute(query)
+        return result.scalar_one_or_none()
+
+    async def record_post_created(self, user_id: int, text_bytes: int) -> None:
+        """
+        Account for a new post in the current transaction.
+
+        Must run after the post's row has been flushed.
+
+        Args:
+            user_id (int): ID of the user who created the post.
+            text_bytes (int): UTF-8 size of the post's text.
+        """
+        newest_post = _newest_post_time(user_id)
+        values = {
+            "user_id": user_id,
+            "post_count": 1,
+            "total_text_bytes": text_bytes,
+            "last_post_at": newest_post,
+        }
+        changes = {
+            "post_count": UserPostStats.post_count + 1,
+            "total_text_bytes": UserPostStats.total_text_bytes + text_bytes,
+            "last_post_at": newest_post,
+        }
+        await self._upsert(values, changes)
+
+    async def record_post_deleted(self, user_id: int, text_bytes: int) -> None:
+        """
+        Account for a deleted post in the current transaction.
+
+        Must run after the post's row has been deleted, so the newest remaining
+        post can be found.
+
+        Args:
+            user_id (int): ID of the user who owned the post.
+            text_bytes (int): UTF-8 size of the deleted post's text.
+        """
+        newest_post = _newest_post_time(user_id)
+        stmt = (
+            update(UserPostStats)
+            .where(UserPostStats.user_id == user_id)
+            .values(
+                post_count=UserPostStats.post_count - 1,
+                total_text_bytes=UserPostStats.total_text_bytes - text_bytes,
+                last_post_at=newest_post,
+            )
+        )
+        await self.db.execute(stmt)
+
+    async def get_many(self, user_ids: List[int]) -> Dict[int, Tuple[int, int, Optional[datetime]]]:
+        """
+        Get the stored statistics for several users.
+
+        Args:
+            user_ids (List[int]): User IDs.
+
+        Returns:
+            Dict[int, Tuple[int, int, Optional[datetime]]]: (post_count, total_text_bytes, last_post_at) by user ID.
+        """
+        query = select(
+            UserPostStats.user_id,
+            UserPostStats.post_count,
+            UserPostStats.total_text_bytes,
+            UserPostStats.last_post_at,
+        ).where(UserPostStats.user_id.in_(user_ids))
+        result = await self.db.execute(query)
+        return {row.user_id: (row.post_count, row.total_text_bytes, row.last_post_at) for row in result}
+
+    async def compute_many(self, user_ids: List[int]) -> Dict[int, Tuple[int, int, Optional[datetime]]]:
+        """
+        Compute the actual statistics for several users from their posts and archived posts.
+
+        Args:
+            user_ids (List[int]): User IDs.
+
+        Returns:
+            Dict[int, Tuple[int, int, Optional[datetime]]]: (post_count, total_text_bytes, last_post_at) by user ID,
+            only for users that have posts.
+        """
+        query = (
+            select(
+                Post.user_id,
+                func.count(Post.id),
+                func.coalesce(func.sum(post_text_bytes), 0),
+                func.max(Post.created_at),
+            )
+            .where(Post.user_id.in_(user_ids), post_not_deleted)
+            .group_by(Post.user_id)
+        )
+        archive_query = (
+            select(
+                ArchivedPost.user_id,
+                func.count(ArchivedPost.id),
+                func.coalesce(func.sum(ArchivedPost.text_bytes), 0),
+                func.max(ArchivedPost.created_at),
+            )
+            .where(ArchivedPost.user_id.in_(user_ids))
+            .group_by(ArchivedPost.user_id)
+        )
+        stats = {}
+        for user_id, count, size, last in await self.db.execute(archive_query):
+            stats[user_id] = (count, int(size), last)
+        for user_id, count, size, last in await self.db.execute(query):
+            # Archived posts are older than all others
+            archived_count, archived_size, _ = stats.get(user_id, (0, 0, None))
+            stats[user_id] = (count + archived_count, int(size) + archived_size, last)
+        return stats
+
+    async def replace(self, user_id: int, post_count: int, total_text_bytes: int, last_post_at: Optional[datetime]) -> None:
+        """
+        Overwrite a user's statistics with known-correct values.
+
+        Args:
+            user_id (int): User ID.
+            post_count (int): Number of posts.
+            total_text_bytes (int): Total UTF-8 size of the post texts.
+            last_post_at (Optional[datetime]): Creation time of the newest post.
+        """
+        values = {
+            "user_id": user_id,
+            "post_count": post_count,
+            "total_text_bytes": total_text_bytes,
+            "last_post_at": last_post_at,
+        }
+        changes = {key: value for key, value in values.items() if key != "user_id"}
+        await self._upsert(values, changes)
+
+    async def record_changes_compacted(self, user_id: int, version: int) -> None:
+        """
+        Record in the current transaction that a user's change log was compacted up to a posts version.
+
+        The recorded version never decreases. A user without statistics gets a
+        row with zero posts.
+
+        Args:
+            user_id (int): User ID.
+            version (int): Posts version up to which changes were removed.
+        """
+        values = {
+            "user_id": user_id,
+            "post_count": 0,
+            "total_text_bytes": 0,
+            "changes_compacted_version": version,
+        }
+        changes = {
+            "changes_compacted_version": case(
+                (UserPostStats.changes_compacted_version < version, version),
+                else_=UserPostStats.changes_compacted_version,
+            ),
+        }
+        await self._upsert(values, changes)
+
+    async def delete(self, user_id: int) -> None:
+        """
+        Delete a user's statistics row in the current transaction.
+        
+        Args:
+            user_id (int): User ID.
+        """
+        await self.db.execute(delete(UserPostStats).where(UserPostStats.user_id == user_id))
+    
+    async def _upsert(self, values: dict, changes: dict) -> None:
+        if self.db.get_bind().dialect.name == "mysql":
+            stmt = mysql.insert(UserPostStats).values(**values).on_duplicate_key_update(**changes)
+        else:
+            stmt = sqlite.insert(UserPostStats).values(**values).on_conflict_do_update(
+                index_elements=[UserPostStats.user_id],
+                set_=changes,
+            )
+        await self.db.execute(stmt)
@@ -0,0 +1,102 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.refresh_token import RefreshToken
+
+
+class RefreshTokenRepository:
+    """
+    Repository for refresh token database operations.
+    
+    Write methods don't commit, so issuing a new token and retiring the old
+    one happen in the caller's single transaction.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize the repository with a database session.
+        
+        Args:
+            db (AsyncSession): SQLAlchemy async session for database operations.
+        """
+        self.db = db
+    
+    async def create(self, user_id: int, family_id: int, token_hash: bytes, expires_at: datetime) -> RefreshToken:
+        """
+        Store a new refresh token in the current transaction.
+        
+        Args:
+            user_id (int): ID of the user the token is issued to.
+            family_id (int): Family the token belongs to.
+            token_hash (bytes): Hash of the token's secret.
+            expires_at (datetime): UTC expiry time.
+            
+        Returns:
+            RefreshToken: The new token, with its ID assigned.
+        """
+        token = RefreshToken(user_id=user_id, family_id=family_id, token_hash=token_hash, expires_at=expires_at)
+        self.db.add(token)
+        await self.db.flush()
+        return token
+    
+    async def get_for_update(self, token_id: int) -> Optional[RefreshToken]:
+        """
+        Get a refresh token by ID and lock it until the end of the transaction.
+        
+        Args:
+            token_id (int): Token ID.
+            
+        Returns:
+            Optional[RefreshToken]: The token if found, None otherwise.
+        """
+        query = select(RefreshToken).where(RefreshToken.id == token_id).with_for_update()
+        result = await self.db.execute(query)
+        return result.scalar_one_or_none()
+    
+    async def mark_used(self, token_id: int) -> bool:
+        """
+        Mark a token as exchanged, unless another request already did.
+        
+        Args:
+            token_id (int): Token ID.
+            
+        Returns:
+            bool: True if this call marked the token, False if it was already used.
+        """
+        stmt = (
+            update(RefreshToken)
+            .where(RefreshToken.id == token_id, RefreshToken.used.is_(False))
+            .values(used=True)
+        )
+        result = await self.db.execute(stmt)
+        return result.rowcount > 0
+    
+    async def revoke_family(self, family_id: int) -> None:
+        """
+        Revoke every token in a family.
+        
+        Args:
+            family_id (int): Family ID.
+        """
+        stmt = update(RefreshToken).where(RefreshToken.family_id == family_id).values(revoked=True)
+        await self.db.execute(stmt)
+    
+    async def delete_expired(self, now: datetime, limit: int) -> int:
+        """
+        Delete a batch of expired tokens and commit.
+        
+        Args:
+            now (datetime): Current UTC time.
+            limit (int): Maximum number of tokens to delete.
+            
+        Returns:
+            int: Number of tokens deleted.
+        """
+        query = select(RefreshToken.id).where(RefreshToken.expires_at <= now).limit(limit)
+        token_ids = (await self.db.execute(query)).scalars().all()
+        if token_ids:
+            await self.db.execute(delete(RefreshToken).where(RefreshToken.id.in_(token_ids)))
+            await self.db.commit()
+        return len(token_ids)
@@ -0,0 +1,71 @@
+from datetime import datetime
+from typing import List, Tuple
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.revoked_token import RevokedToken
+
+
+class RevokedTokenRepository:
+    """
+    Repository for revoked access token database operations.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize the repository with a database session.
+        
+        Args:
+            db (AsyncSession): SQLAlchemy async session for database operations.
+        """
+        self.db = db
+    
+    async def create(self, jti: str, expires_at: datetime) -> None:
+        """
+        Record a revoked token.
+        
+        Args:
+            jti (str): ID of the revoked token.
+            expires_at (datetime): UTC expiry of the token.
+        """
+        self.db.add(RevokedToken(jti=jti, expires_at=expires_at))
+        await self.db.commit()
+    
+    async def get_after(self, revocation_id: int, now: datetime, limit: int) -> List[Tuple[int, str, datetime]]:
+        """
+        Get unexpired revocations recorded after a given one, in ID order.
+        
+        Args:
+            revocation_id (int): Return revocations with a greater ID than this.
+            now (datetime): Current UTC time; revocations of expired tokens are skipped.
+            limit (int): Maximum number of revocations to return.
+            
+        Returns:
+            List[Tuple[int, str, datetime]]: (id, jti, expires_at) tuples.
+        """
+        query = (
+            select(RevokedToken.id, RevokedToken.jti, RevokedToken.expires_at)
+            .where(RevokedToken.id > revocation_id, RevokedToken.expires_at > now)
+            .order_by(RevokedToken.id)
+            .limit(limit)
+        )
+        result = await self.db.execute(query)
+        return [(row.id, row.jti, row.expires_at) for row in result]
+    
+    async def delete_expired(self, now: datetime, limit: int) -> int:
+        """
+        Delete a batch of revocations of expired tokens and commit.
+        
+        Args:
+            now (datetime): Current UTC time.
+            limit (int): Maximum number of revocations to delete.
+            
+        Returns:
+            int: Number of revocations deleted.
+        """
+        query = select(RevokedToken.id).where(RevokedToken.expires_at <= now).limit(limit)
+        revocation_ids = (await self.db.execute(query)).scalars().all()
+        if revocation_ids:
+            await self.db.execute(delete(RevokedToken).where(RevokedToken.id.in_(revocation_ids)))
+            await self.db.commit()
+        return len(revocation_ids)
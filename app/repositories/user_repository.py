@@ -1,8 +1,10 @@
 
-from typing import Optional
-from sqlalchemy import select
+from typing import Optional, List, Tuple
+from sqlalchemy import select, update, func
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
+from app.core.deadlines import deadline_lifted
 from app.models.user import User
 
 
@@ -37,12 +39,14 @@ class UserRepository:
         # Import here to avoid circular imports
         from app.core.security import get_password_hash
         
-        hashed_password = get_password_hash(password)
+        # bcrypt is deliberately slow; keep it off the event loop
+        hashed_password = await run_in_threadpool(get_password_hash, password)
         db_user = User(email=email, hashed_password=hashed_password)
         
         self.db.add(db_user)
         await self.db.commit()
-        await self.db.refresh(db_user)
+        with deadline_lifted():
+            await self.db.refresh(db_user)
         
         return db_user
     
@@ -73,3 +77,96 @@ class UserRepository:
         query = select(User).where(User.id == user_id)
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
+    
+    async def update_password_hash(self, user_id: int, old_hash: str, new_hash: str) -> bool:
+        """
+        Replace a user's password hash if it hasn't changed since it was read.
+        
+        Args:
+            user_id (int): User's ID.
+            old_hash (str): The hash the new one was derived from.
+            new_hash (str): The replacement hash.
+            
+        Returns:
+            bool: True if the hash was replaced, False if it had changed meanwhile.
+        """
+        stmt = (
+            update(User)
+            .where(User.id == user_id, User.hashed_password == old_hash)
+            .values(hashed_password=new_hash)
+        )
+        result = await self.db.execute(stmt)
+        await self.db.commit()
+        return result.rowcount > 0
+    
+    async def increment_posts_version(self, user_id: int, default_shard: int = 0) -> Tuple[int, int]:
+        """
+        Increment a user's posts version as part of the current transaction.
+        
+        The caller is responsible for committing. The row stays locked until then,
+        so concurrent changes to the same user's posts are serialized, including
+        against a move of the user's posts to another shard. A user without a
+        post shard yet is pinned to default_shard.
+        
+        Args:
+            user_id (int): User's ID.
+            default_shard (int): Shard to pin the user to if they have none.
+            
+        Returns:
+            Tuple[int, int]: The new posts version and the user's post shard.
+        """
+        stmt = (
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                posts_version=User.posts_version + 1,
+                post_shard=func.coalesce(User.post_shard, default_shard),
+            )
+        )
+        await self.db.execute(stmt)
+        return await self.get_posts_state(user_id)
+    
+    async def advance_posts_version(self, user_id: int, version: int) -> None:
+        """
+        Raise a user's posts version as part of the current transaction.
+        
+        Used to skip versions that are already taken on the user's post shard.
+        The caller must already hold the row lock taken by increment_posts_version.
+        
+        Args:
+            user_id (int): User's ID.
+            version (int): The new posts version.
+        """
+        await self.db.execute(update(User).where(User.id == user_id).values(posts_version=version))
+    
+    async def get_posts_state(self, user_id: int) -> Tuple[int, Optional[int]]:
+        """
+        Get a user's current posts version and post shard.
+        
+        Args:
+            user_id (int): User's ID.
+            
+        Returns:
+            Tuple[int, Optional[int]]: The posts version, and the user's post shard or None
+            if it isn't assigned yet. (0, None) if the user doesn't exist.
+        """
+        query = select(User.posts_version, User.post_shard).where(User.id == user_id)
+        row = (await self.db.execute(query)).one_or_none()
+        if row is None:
+            return 0, None
+        return row.posts_version, row.post_shard
+    
+    async def get_emails_after(self, user_id: int, limit: int) -> List[Tuple[int, str]]:
+        """
+        Get the IDs and emails of users created after a given user, in ID order.
+        
+        Args:
+            user_id (int): Return users with a greater ID than this.
+            limit (int): Maximum number of users to return.
+            
+        Returns:
+            List[Tuple[int, str]]: (id, email) pairs.
+        """
+        query = select(User.id, User.email).where(User.id > user_id).order_by(User.id).limit(limit)
+        result = await self.db.execute(query)
+        return [(row.id, row.email) for row in result]
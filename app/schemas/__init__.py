@@ -1,4 +1,4 @@
 # Schema module initialization
 from app.schemas.user import User, UserCreate, UserLogin, UserInDBBase
-from app.schemas.post import Post, PostCreate, PostDelete
-from app.schemas.token import Token, TokenPayload 
\ No newline at end of file
+from app.schemas.post import Post, PostCreate, PostDelete, PostSearchHit, PostSearchPage, PostStats
+from app.schemas.token import Token, TokenPayload, RefreshRequest, LogoutRequest 
\ No newline at end of file
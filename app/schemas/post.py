@@ -1,8 +1,30 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 
 
+# Maximum post length, in characters
+POST_TEXT_MAX_LENGTH = 1000000
+
+
+def check_post_text(text: str) -> str:
+    """
+    Validate post text received outside of a schema, with the same rules as PostCreate.
+    
+    Args:
+        text (str): Post content.
+        
+    Returns:
+        str: The text, unchanged.
+        
+    Raises:
+        ValueError: If the text is empty, whitespace only or too long.
+    """
+    if len(text) > POST_TEXT_MAX_LENGTH:
+        raise ValueError(f'Post text cannot be longer than {POST_TEXT_MAX_LENGTH} characters')
+    return PostBase.text_must_not_be_empty(text)
+
+
 class PostBase(BaseModel):
     """
     Base schema for post data.
@@ -10,12 +32,12 @@ class PostBase(BaseModel):
     Attributes:
         text (str): Content of the post.
     """
-    text: str = Field(..., min_length=1, max_length=1000000, description="Post content")
+    text: str = Field(..., min_length=1, max_length=POST_TEXT_MAX_LENGTH, description="Post content")
     
     @validator('text')
     def text_must_not_be_empty(cls, v):
-        """Validate that text is not empty."""
-        if not v.strip():
+        """Validate that text is not empty or whitespace only, scanning it without copying."""
+        if not v or v.isspace():
             raise ValueError('Post text cannot be empty')
         return v
 
@@ -56,6 +78,75 @@ class Post(PostInDBBase):
     pass
 
 
+class PostSearchHit(Post):
+    """
+    Schema for a post matched by a search.
+    
+    Attributes:
+        score (float): Relevance of the post to the query, higher is better.
+    """
+    score: float
+
+
+class PostSearchPage(BaseModel):
+    """
+    Schema for a page of search results.
+    
+    Attributes:
+        items (List[PostSearchHit]): Matching posts, best match first.
+        next_cursor (Optional[str]): Cursor for the next page, None on the last page.
+    """
+    items: List[PostSearchHit]
+    next_cursor: Optional[str] = None
+
+
+class PostLookup(BaseModel):
+    """
+    Schema for the result of looking up one post by ID.
+    
+    Attributes:
+        id (int): The requested post ID.
+        found (bool): Whether the post exists and belongs to the user.
+        post (Optional[Post]): The post, None if not found.
+    """
+    id: int
+    found: bool
+    post: Optional[Post] = None
+
+
+class PostChanges(BaseModel):
+    """
+    Schema for the changes to a user's posts since a change token.
+    
+    Attributes:
+        created (List[Post]): Posts created since the token and not deleted since, newest first.
+        deleted (List[int]): IDs of the posts deleted since the token.
+        next_token (str): Token to request the following changes with.
+        has_more (bool): Whether more changes are waiting after next_token.
+    """
+    created: List[Post]
+    deleted: List[int]
+    next_token: str
+    has_more: bool = False
+
+
+class PostStats(BaseModel):
+    """
+    Schema for a user's post statistics.
+    
+    Attributes:
+        post_count (int): Number of posts.
+        total_text_bytes (int): Total UTF-8 size of the post texts.
+        last_post_at (Optional[datetime]): Creation time of the newest post.
+    """
+    post_count: int = 0
+    total_text_bytes: int = 0
+    last_post_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
 class PostDelete(BaseModel):
     """
     Schema for post deletion.
@@ -8,9 +8,20 @@ class Token(BaseModel):
     Attributes:
         access_token (str): JWT access token.
         token_type (str): Type of token, default is "bearer".
+        refresh_token (Optional[str]): Single-use token for POST /api/refresh.
     """
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    """
+    Schema for exchanging a refresh token.
+    
+    Attributes:
+        refresh_token (str): Refresh token from a previous login or refresh.
+    """
+    refresh_token: str
 
 class TokenPayload(BaseModel):
     """
@@ -19,6 +30,17 @@ class TokenPayload(BaseModel):
     Attributes:
         sub (str): Subject of the token (usually the user ID).
         exp (int): Expiration timestamp.
+        jti (str): Unique token ID, used to revoke the token.
     """
     sub: Optional[str] = None
-    exp: Optional[int] = None 
\ No newline at end of file
+    exp: Optional[int] = None
+    jti: Optional[str] = None
+
+class LogoutRequest(BaseModel):
+    """
+    Schema for logging out.
+    
+    Attributes:
+        refresh_token (Optional[str]): Refresh token to revoke along with the access token.
+    """
+    refresh_token: Optional[str] = None
@@ -1,13 +1,53 @@
-from datetime import timedelta
+import hmac
+import secrets
+from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-from app.core.security import verify_password, create_access_token
+from app.core import tasks
+from app.core.security import (
+    get_password_hash,
+    verify_password_needs_rehash,
+    dummy_verify_password,
+    create_access_token,
+    new_refresh_secret,
+    hash_refresh_secret,
+    format_refresh_token,
+    parse_refresh_token,
+)
 from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.deadlines import deadline_lifted
+from app.core.email_filter import registered_emails
+from app.core.revocation import token_revocations
 from app.repositories.user_repository import UserRepository
+from app.repositories.refresh_token_repository import RefreshTokenRepository
 from app.models.user import User
-from app.schemas.token import Token
+from app.schemas.token import Token, TokenPayload
+
+
+async def store_rehashed_password(user_id: int, old_hash: str, password: str) -> None:
+    """
+    Rehash a password with the current bcrypt cost and store it.
+    
+    Runs in the background with its own session, after the login response, so
+    the login only pays for verifying the password. The hash is only replaced
+    if it is still the one that was verified, so a password change made in
+    the meantime is never overwritten. If it fails, the next login tries again.
+    
+    Args:
+        user_id (int): User's ID.
+        old_hash (str): The hash the password was verified against.
+        password (str): The verified plain text password.
+    """
+    # bcrypt is deliberately slow; keep it off the event loop
+    new_hash = await run_in_threadpool(get_password_hash, password)
+    async with AsyncSessionLocal() as session:
+        await UserRepository(session).update_password_hash(user_id, old_hash, new_hash)
+
 
 class AuthService:
     """
@@ -25,6 +65,7 @@ class AuthService:
         """
         self.db = db
         self.user_repository = UserRepository(db)
+        self.refresh_token_repository = RefreshTokenRepository(db)
     
     async def authenticate_user(self, email: str, password: str) -> Optional[User]:
         """
@@ -37,13 +78,28 @@ class AuthService:
         Returns:
             Optional[User]: Authenticated user if successful, None otherwise.
         """
+        # Unknown emails still pay for a password check, so response timing
+        # doesn't reveal whether an email is registered
+        if settings.EMAIL_FILTER_ENABLED and not await registered_emails.may_exist(email):
+            await run_in_threadpool(dummy_verify_password, password)
+            return None
+        
         user = await self.user_repository.get_by_email(email)
         
         if not user:
+            await run_in_threadpool(dummy_verify_password, password)
             return None
         
-        if not verify_password(password, user.hashed_password):
+        valid, needs_rehash = await run_in_threadpool(verify_password_needs_rehash, password, user.hashed_password)
+        if not valid:
             return None
+        
+        # The stored hash uses an outdated cost; upgrade it without delaying the login
+        if needs_rehash:
+            tasks.spawn(
+                store_rehashed_password(user.id, user.hashed_password, password),
+                name=f"rehash-password-{user.id}",
+            )
             
         return user
     
@@ -56,28 +112,35 @@ class AuthService:
             password (str): User's password.
             
         Returns:
-            Token: Access token for the new user.
+            Token: Access and refresh tokens for the new user.
             
         Raises:
             HTTPException: If a user with the email already exists.
         """
-        existing_user = await self.user_repository.get_by_email(email)
+        # Skip the lookup when the email is definitely new; the unique index on
+        # users.email still rejects a duplicate the filter hasn't seen yet
+        if not settings.EMAIL_FILTER_ENABLED or registered_emails.may_contain(email):
+            existing_user = await self.user_repository.get_by_email(email)
+            
+            if existing_user:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Email already registered"
+                )
         
-        if existing_user:
+        try:
+            user = await self.user_repository.create(email, password)
+        except IntegrityError:
+            await self.db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
-            
-        user = await self.user_repository.create(email, password)
-        
-        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            subject=str(user.id), 
-            expires_delta=access_token_expires
-        )
+        registered_emails.add(email)
         
-        return Token(access_token=access_token)
+        # The user exists now; a 504 would make the retry fail with "Email already registered"
+        with deadline_lifted():
+            return await self.issue_tokens(user.id)
     
     async def login_user(self, email: str, password: str) -> Token:
         """
@@ -88,7 +151,7 @@ class AuthService:
             password (str): User's password.
             
         Returns:
-            Token: Access token for the authenticated user.
+            Token: Access and refresh tokens for the authenticated user.
             
         Raises:
             HTTPException: If authentication fails.
@@ -102,10 +165,102 @@ class AuthService:
                 headers={"WWW-Authenticate": "Bearer"},
             )
             
+        return await self.issue_tokens(user.id)
+    
+    async def issue_tokens(self, user_id: int, family_id: Optional[int] = None) -> Token:
+        """
+        Create an access token and a new refresh token, and commit.
+        
+        Args:
+            user_id (int): ID of the user to issue tokens to.
+            family_id (Optional[int]): Family of the refresh token being rotated,
+                None to start a new family (a new login).
+            
+        Returns:
+            Token: The access and refresh tokens.
+        """
+        secret, token_hash = new_refresh_secret()
+        expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        refresh_token = await self.refresh_token_repository.create(
+            user_id,
+            family_id if family_id is not None else secrets.randbits(63),
+            token_hash,
+            expires_at,
+        )
+        await self.db.commit()
+        
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            subject=str(user.id), 
+            subject=str(user_id), 
             expires_delta=access_token_expires
         )
         
-        return Token(access_token=access_token) 
\ No newline at end of file
+        return Token(access_token=access_token, refresh_token=format_refresh_token(refresh_token.id, secret))
+    
+    async def refresh_tokens(self, token: str) -> Token:
+        """
+        Exchange a refresh token for a new access token and a new refresh token.
+        
+        Each refresh token can be exchanged once. If a token is presented again,
+        either it or its replacement is in the wrong hands, so every token in
+        its family is revoked and the user has to log in again.
+        
+        Args:
+            token (str): Refresh token from a previous login or refresh.
+            
+        Returns:
+            Token: New access and refresh tokens.
+            
+        Raises:
+            HTTPException: If the token is invalid, expired, revoked or reused.
+        """
+        invalid = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        try:
+            token_id, secret = parse_refresh_token(token)
+        except ValueError:
+            raise invalid
+        
+        stored = await self.refresh_token_repository.get_for_update(token_id)
+        if not stored or not hmac.compare_digest(stored.token_hash, hash_refresh_secret(secret)):
+            raise invalid
+        if stored.revoked or stored.expires_at <= datetime.utcnow():
+            raise invalid
+        
+        # A concurrent exchange of the same token loses the race here and counts as reuse
+        if stored.used or not await self.refresh_token_repository.mark_used(token_id):
+            await self.refresh_token_repository.revoke_family(stored.family_id)
+            await self.db.commit()
+            raise invalid
+        
+        return await self.issue_tokens(stored.user_id, stored.family_id)
+    
+    async def logout(self, token_data: TokenPayload, refresh_token: Optional[str] = None) -> None:
+        """
+        Revoke the current access token and, if given, the refresh token's family.
+        
+        Args:
+            token_data (TokenPayload): Claims of the access token to revoke.
+            refresh_token (Optional[str]): Refresh token issued with it. Ignored if it
+                is invalid or belongs to another user.
+        """
+        if token_data.jti:
+            await token_revocations.revoke(token_data.jti, token_data.exp)
+        
+        if not refresh_token:
+            return
+        try:
+            token_id, secret = parse_refresh_token(refresh_token)
+        except ValueError:
+            return
+        stored = await self.refresh_token_repository.get_for_update(token_id)
+        if (
+            stored
+            and str(stored.user_id) == token_data.sub
+            and hmac.compare_digest(stored.token_hash, hash_refresh_secret(secret))
+        ):
+            await self.refresh_token_repository.revoke_family(stored.family_id)
+            await self.db.commit()
@@ -1,12 +1,30 @@
-from typing import List, Dict, Any
+import logging
+from datetime import datetime
+from math import ceil
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.repositories.post_change_repository import PostChangeRepository
 from app.repositories.post_repository import PostRepository
-from app.core.cache import get_cache, set_cache, clear_cache
+from app.repositories.user_repository import UserRepository
+from app.core.cache import (
+    get_cache, get_cache_entry, get_cache_many, set_cache, set_cache_many, clear_cache, refresh_in_background,
+    post_cache,
+)
+from app.core.circuit_breaker import CircuitOpenError, DATABASE_ERRORS, circuit_breaker
+from app.core.cursors import encode_cursor, decode_cursor
+from app.core.deadlines import DeadlineExceeded, deadline_lifted
+from app.core.idempotency import IdempotencyClaim
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import metrics
+from app.core.search import post_search_index
+from app.core.sharding import ShardSessions, shard_router, post_id_allocator
 from app.models.post import Post
 from app.models.user import User
-from app.schemas.post import Post as PostSchema
+from app.schemas.post import Post as PostSchema, PostChanges, PostLookup, PostSearchHit, PostSearchPage, PostStats
+
+logger = logging.getLogger(__name__)
 
 class PostService:
     """
@@ -15,60 +33,484 @@ class PostService:
     This class handles post creation, retrieval, and deletion operations.
     """
     
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, shards: Optional[ShardSessions] = None):
         """
         Initialize the service with a database session.
         
         Args:
             db (AsyncSession): SQLAlchemy async session for database operations.
+            shards (Optional[ShardSessions]): Sessions on the post shards, closed by the caller.
+                Only needed when posts are sharded.
         """
         self.db = db
-        self.repository = PostRepository(db)
+        self.shards = shards if shards is not None else ShardSessions(db)
+        self.user_repository = UserRepository(db)
+    
+    def _repository(self, user_id: int, post_shard: Optional[int]) -> PostRepository:
+        shard = shard_router.shard_for(user_id, post_shard)
+        return PostRepository(self.shards.get(shard))
     
-    async def create_post(self, text: str, current_user: User) -> Dict[str, int]:
+    async def create_post(
+        self,
+        text: str,
+        current_user: User,
+        text_bytes: Optional[int] = None,
+        claim: Optional[IdempotencyClaim] = None,
+    ) -> Dict[str, int]:
         """
         Create a new post.
         
         Args:
             text (str): Post content.
             current_user (User): The user creating the post.
+            text_bytes (Optional[int]): UTF-8 size of the text, if the caller already knows it.
+            claim (Optional[IdempotencyClaim]): Idempotency key of the request, completed
+                with the result in the transaction that writes the post.
             
         Returns:
             Dict[str, int]: Dictionary with the post ID.
         """
-        post = await self.repository.create(text, current_user.id)
+        # Reserve an ID before taking the user's lock; refilling the ID block is a round trip
+        post_id = await post_id_allocator.next_id() if shard_router.sharded else None
+        # Bump the posts version next: it locks the user against concurrent
+        # changes and moves, and pins the shard of a first post
+        version, shard = await self._increment_posts_version(current_user.id)
+        # On the primary's shard this commits the version bump in the same transaction;
+        # on another shard the bump is committed right after the post
+        record = None if claim is None else lambda post: claim.record(self.db, {"post_id": post.id})
+        shard_db = self.shards.get(shard)
+        post = await PostRepository(shard_db).create(
+            text, current_user.id, post_id, text_bytes, version, record
+        )
+        if claim is not None and shard_db is not self.db:
+            claim.wrote({"post_id": post.id})
+        with deadline_lifted():
+            await self.db.commit()
+        post_search_index.advance(current_user.id, version - 1, version)
         
-        # Clear cache for this user's posts
-        clear_cache(f"user_posts_{current_user.id}")
+        # Prepend the new post to the cached list instead of invalidating it
+        new_post = PostSchema.from_orm(post)
+        self._update_cached_posts(current_user.id, version, lambda posts: [new_post] + posts)
         
         return {"post_id": post.id}
     
-    async def get_posts(self, current_user: User) -> List[PostSchema]:
+    def posts_etag(self, current_user: User) -> str:
         """
-        Get all posts for a user, with caching.
+        Build the ETag for a user's post list from their posts version.
+        
+        Args:
+            current_user (User): The user whose posts are listed.
+            
+        Returns:
+            str: Quoted entity tag.
+        """
+        return f'"{current_user.id}.{current_user.posts_version}"'
+    
+    async def get_posts(self, current_user: User) -> Tuple[List[PostSchema], int]:
+        """
+        Get all of a user's unarchived posts, with caching.
+        
+        Cached lists are tagged with the posts version they were loaded at, so a
+        list cached by this worker is never served after a change made by another.
+        A list past its expiry is still returned at once while a single background
+        refresh reloads it. When loading fails because the database is down or
+        its circuit is open, or runs past the request deadline, the last cached
+        list is returned, even if it misses recent changes, until it is older
+        than the stale limit.
         
         Args:
             current_user (User): The user whose posts to retrieve.
             
         Returns:
-            List[PostSchema]: List of posts belonging to the user.
+            Tuple[List[PostSchema], int]: List of posts belonging to the user, and the posts
+            version they are at. It is older than the user's posts version when stale posts
+            were returned because the database failed or was too slow.
+            
+        Raises:
+            HTTPException: If the database's circuit is open and no posts are cached.
         """
         # Check cache first
         cache_key = f"user_posts_{current_user.id}"
-        cached_posts = get_cache(cache_key)
+        cached = get_cache_entry(cache_key)
         
-        if cached_posts is not None:
-            return cached_posts
+        if cached is not None:
+            (version, cached_posts), is_stale = cached
+            if version == current_user.posts_version:
+                if is_stale:
+                    metrics.increment("cache.stale_served")
+                    user_id, post_shard = current_user.id, current_user.post_shard
+                    refresh_in_background(
+                        cache_key,
+                        lambda: self._refresh_cache_in_background(user_id, version, post_shard)
+                    )
+                return cached_posts, version
         
         # If not in cache, retrieve from database
-        posts = await self.repository.get_by_user_id(current_user.id)
+        try:
+            posts = await self.refresh_cache(current_user.id, current_user.posts_version, current_user.post_shard)
+        except DeadlineExceeded:
+            # A slow query, not a failing database, so the circuit is left alone
+            if cached is not None:
+                metrics.increment("cache.stale_on_deadline")
+                return cached_posts, version
+            raise
+        except (CircuitOpenError, *DATABASE_ERRORS) as exc:
+            if cached is not None:
+                metrics.increment("cache.stale_on_error")
+                if not isinstance(exc, CircuitOpenError):
+                    logger.warning("Serving cached posts of user %s, loading them failed: %r", current_user.id, exc)
+                return cached_posts, version
+            if isinstance(exc, CircuitOpenError):
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Database unavailable",
+                    headers={"Retry-After": str(ceil(exc.retry_after))}
+                )
+            raise
+        return posts, current_user.posts_version
+    
+    async def get_posts_by_ids(self, current_user: User, post_ids: List[int]) -> List[PostLookup]:
+        """
+        Get several of a user's posts by ID, archived ones included.
+        
+        Each post is cached on its own, tagged with its owner. Posts never change
+        once created, so a cached post stays valid until it is deleted. Entries
+        also record the posts version at which the post last existed: when it
+        is older than the user's posts version, which any change moves, the
+        entries are confirmed with a single query for the IDs still existing.
+        All IDs are looked up in the cache at once and the misses are loaded
+        with a single query.
+        
+        Args:
+            current_user (User): The user whose posts to retrieve.
+            post_ids (List[int]): Post IDs, in the order the results are wanted.
+            
+        Returns:
+            List[PostLookup]: One result per requested ID, in request order. Posts that
+            don't exist or belong to another user are marked not found.
+        """
+        wanted = list(dict.fromkeys(post_ids))
+        found: Dict[int, PostSchema] = {}
+        # Cached posts the user may have deleted since
+        unconfirmed: Dict[int, PostSchema] = {}
+        cached = get_cache_many([f"post_{post_id}" for post_id in wanted], post_cache)
+        for post_id in wanted:
+            entry = cached.get(f"post_{post_id}")
+            if entry is not None:
+                user_id, version, post = entry
+                if user_id != current_user.id:
+                    continue
+                if version == current_user.posts_version:
+                    found[post_id] = post
+                else:
+                    unconfirmed[post_id] = post
+        
+        repository = self._repository(current_user.id, current_user.post_shard)
+        if unconfirmed:
+            existing = set(await repository.get_existing_ids(current_user.id, list(unconfirmed)))
+            if len(existing) < len(unconfirmed):
+                existing.update(await repository.archive.get_existing_ids(
+                    current_user.id, [post_id for post_id in unconfirmed if post_id not in existing]
+                ))
+            confirmed = {post_id: post for post_id, post in unconfirmed.items() if post_id in existing}
+            set_cache_many({
+                f"post_{post_id}": (current_user.id, current_user.posts_version, post)
+                for post_id, post in confirmed.items()
+            }, store=post_cache)
+            for post_id in unconfirmed.keys() - existing:
+                clear_cache(f"post_{post_id}")
+            found.update(confirmed)
+        
+        misses = [post_id for post_id in wanted if post_id not in found and post_id not in unconfirmed]
+        metrics.increment("posts.by_ids.cache_hits", len(found))
+        metrics.increment("posts.by_ids.cache_misses", len(misses))
+        if misses:
+            posts = list(await repository.get_by_ids(current_user.id, misses))
+            if len(posts) < len(misses):
+                loaded_ids = {post.id for post in posts}
+                posts += await repository.archive.get_by_ids(
+                    current_user.id, [post_id for post_id in misses if post_id not in loaded_ids]
+                )
+            loaded = {post.id: PostSchema.from_orm(post) for post in posts}
+            set_cache_many({
+                f"post_{post_id}": (current_user.id, current_user.posts_version, post)
+                for post_id, post in loaded.items()
+            }, store=post_cache)
+            found.update(loaded)
+        
+        return [
+            PostLookup(id=post_id, found=post_id in found, post=found.get(post_id))
+            for post_id in post_ids
+        ]
+    
+    def next_page_cursor(self, posts: List[PostSchema]) -> str:
+        """
+        Build the cursor continuing after a user's full list of unarchived posts.
+        
+        Args:
+            posts (List[PostSchema]): The list returned by get_posts.
+            
+        Returns:
+            str: Cursor for get_posts_page, pointing into the archive.
+        """
+        if not posts:
+            return encode_cursor([None, None])
+        last = posts[-1]
+        return encode_cursor([last.created_at.isoformat(), last.id])
+    
+    def changes_token(self, version: int) -> str:
+        """
+        Build the change token for a posts version.
+        
+        Args:
+            version (int): The posts version the client is up to date with.
+            
+        Returns:
+            str: Opaque token for get_changes.
+        """
+        return encode_cursor([version])
+    
+    async def get_changes(self, current_user: User, token: str, limit: int) -> PostChanges:
+        """
+        Get the posts created and deleted since a change token.
+        
+        Changes are read from the user's change log, so the cost depends on the
+        number of changes rather than on the number of posts.
+        
+        Args:
+            current_user (User): The user whose changes to retrieve.
+            token (str): Token from a post listing or from the previous call.
+            limit (int): Maximum number of changes.
+            
+        Returns:
+            PostChanges: The changes and the token for the next call.
+            
+        Raises:
+            HTTPException: If the token is invalid, or 410 if the changes since it were
+                compacted away and the posts must be listed again.
+        """
+        try:
+            (since,) = decode_cursor(token, 1)
+            if not isinstance(since, int) or since < 0:
+                raise ValueError("Invalid token")
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid change token"
+            )
+        
+        until = current_user.posts_version
+        if since >= until:
+            return PostChanges(created=[], deleted=[], next_token=token)
+        
+        repository = self._repository(current_user.id, current_user.post_shard)
+        changes = await repository.changes.get_since(current_user.id, since, until, limit + 1)
+        # Checked after reading the changes, so a compaction in between is noticed
+        stats = await repository.stats.get(current_user.id)
+        if stats is not None and since < stats.changes_compacted_version:
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Changes since this token are no longer available; list the posts again"
+            )
+        
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        deleted = [change.post_id for change in changes if change.deleted]
+        deleted_ids = set(deleted)
+        created_ids = [change.post_id for change in changes if not change.deleted and change.post_id not in deleted_ids]
+        
+        posts_by_id = {post.id: post for post in await repository.get_by_ids(current_user.id, created_ids)}
+        missing = [post_id for post_id in created_ids if post_id not in posts_by_id]
+        if missing:
+            # Archived since they were created
+            posts_by_id.update((post.id, post) for post in await repository.archive.get_by_ids(current_user.id, missing))
+        created = [
+            PostSchema.from_orm(posts_by_id[post_id])
+            for post_id in reversed(created_ids)
+            if post_id in posts_by_id
+        ]
+        
+        return PostChanges(
+            created=created,
+            deleted=deleted,
+            next_token=self.changes_token(changes[-1].version if has_more else until),
+            has_more=has_more,
+        )
+    
+    async def get_posts_page(
+        self,
+        current_user: User,
+        limit: int,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[PostSchema], Optional[str]]:
+        """
+        Get a page of a user's posts, newest first.
+        
+        Pages are read from the posts table and continue into the archive once
+        it is exhausted, so the archive is only read by clients paging past
+        the user's recent posts.
+        
+        Args:
+            current_user (User): The user whose posts to retrieve.
+            limit (int): Maximum number of posts.
+            cursor (Optional[str]): Cursor returned with the previous page.
+            
+        Returns:
+            Tuple[List[PostSchema], Optional[str]]: The posts and the cursor for the next page,
+            None on the last page.
+            
+        Raises:
+            HTTPException: If the cursor is invalid.
+        """
+        before = None
+        if cursor:
+            try:
+                created_at, post_id = decode_cursor(cursor, 2)
+                if created_at is not None:
+                    before = (datetime.fromisoformat(created_at), int(post_id))
+            except (ValueError, TypeError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor"
+                )
+        
+        repository = self._repository(current_user.id, current_user.post_shard)
+        posts = await repository.get_page(current_user.id, limit, before)
+        if len(posts) < limit:
+            if posts:
+                before = (posts[-1].created_at, posts[-1].id)
+            posts += await repository.archive.get_page(current_user.id, limit - len(posts), before)
+        
+        items = [PostSchema.from_orm(post) for post in posts]
+        next_cursor = None
+        if len(items) == limit:
+            next_cursor = encode_cursor([items[-1].created_at.isoformat(), items[-1].id])
+        
+        return items, next_cursor
+    
+    async def refresh_cache(
+        self,
+        user_id: int,
+        version: Optional[int] = None,
+        post_shard: Optional[int] = None,
+    ) -> List[PostSchema]:
+        """
+        Load a user's posts from the database and store them in the cache.
+        
+        Args:
+            user_id (int): ID of the user whose posts to load.
+            version (Optional[int]): The user's posts version. If not given, it is read from
+                the database along with the post shard. It must be read before the posts so a
+                concurrent change can only make the cached entry look older than it is.
+            post_shard (Optional[int]): The user's post shard, read along with version.
+            
+        Returns:
+            List[PostSchema]: List of posts belonging to the user.
+        """
+        if version is None:
+            version, post_shard = await self.user_repository.get_posts_state(user_id)
+        shard = shard_router.shard_for(user_id, post_shard)
+        repository = PostRepository(self.shards.get(shard))
+        # Once the shard keeps failing, stop sending it queries for a while
+        posts = await circuit_breaker(f"posts.{shard}").call(lambda: repository.get_by_user_id(user_id))
         
         # Convert to schema and cache
         post_schemas = [PostSchema.from_orm(post) for post in posts]
-        set_cache(cache_key, post_schemas)
+        set_cache(f"user_posts_{user_id}", (version, post_schemas))
         
         return post_schemas
     
+    @staticmethod
+    async def _refresh_cache_in_background(user_id: int, version: int, post_shard: Optional[int]) -> None:
+        # The request's session is closed once the response is sent, so use new ones
+        try:
+            async with AsyncSessionLocal() as session, ShardSessions(session) as shards:
+                await PostService(session, shards).refresh_cache(user_id, version, post_shard)
+        except (CircuitOpenError, *DATABASE_ERRORS) as exc:
+            logger.warning("Refreshing cached posts of user %s failed: %r", user_id, exc)
+    
+    async def get_stats(self, current_user: User) -> PostStats:
+        """
+        Get a user's post statistics from the precomputed counters.
+        
+        Args:
+            current_user (User): The user whose statistics to retrieve.
+            
+        Returns:
+            PostStats: Post count, total text size and newest post time.
+        """
+        stats = await self._repository(current_user.id, current_user.post_shard).stats.get(current_user.id)
+        if stats is None:
+            return PostStats()
+        return PostStats.from_orm(stats)
+    
+    async def search_posts(
+        self,
+        current_user: User,
+        query: str,
+        limit: int,
+        cursor: Optional[str] = None,
+    ) -> PostSearchPage:
+        """
+        Search a user's posts, ranked by relevance.
+        
+        Uses the MySQL FULLTEXT index when available, otherwise the in-process
+        inverted index, which is rebuilt whenever the user's posts version shows
+        that it missed a change.
+        
+        Args:
+            current_user (User): The user whose posts to search.
+            query (str): Search terms.
+            limit (int): Maximum number of results.
+            cursor (Optional[str]): Cursor returned with the previous page.
+            
+        Returns:
+            PostSearchPage: Matching posts and the cursor for the next page.
+            
+        Raises:
+            HTTPException: If the cursor is invalid.
+        """
+        after = None
+        if cursor:
+            try:
+                score, post_id = decode_cursor(cursor, 2)
+                after = (float(score), int(post_id))
+            except (ValueError, TypeError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor"
+                )
+        
+        repository = self._repository(current_user.id, current_user.post_shard)
+        if repository.supports_fulltext():
+            matches = await repository.search_fulltext(current_user.id, query, limit, after)
+        else:
+            index = post_search_index.get(current_user.id, current_user.posts_version)
+            if index is None:
+                posts = await repository.get_by_user_id(current_user.id)
+                index = post_search_index.build(
+                    current_user.id,
+                    current_user.posts_version,
+                    ((post.id, post.text) for post in posts)
+                )
+            ranked = index.search(query, limit, after)
+            posts_by_id = {
+                post.id: post
+                for post in await repository.get_by_ids(current_user.id, [post_id for post_id, _ in ranked])
+            }
+            matches = [(posts_by_id[post_id], score) for post_id, score in ranked if post_id in posts_by_id]
+        
+        items = [
+            PostSearchHit(id=post.id, text=post.text, user_id=post.user_id, created_at=post.created_at, score=score)
+            for post, score in matches
+        ]
+        next_cursor = None
+        if len(matches) == limit:
+            last = items[-1]
+            next_cursor = encode_cursor([last.score, last.id])
+        
+        return PostSearchPage(items=items, next_cursor=next_cursor)
+    
     async def delete_post(self, post_id: int, current_user: User) -> Dict[str, str]:
         """
         Delete a post.
@@ -83,8 +525,10 @@ class PostService:
         Raises:
             HTTPException: If the post doesn't exist or doesn't belong to the user.
         """
-        # First check if the post exists and belongs to the user
-        post = await self.repository.get_by_id(post_id)
+        # First check if the post exists and belongs to the user. Only the user's
+        # own shard is searched, so with sharding another user's post is not found.
+        repository = self._repository(current_user.id, current_user.post_shard)
+        post = await repository.get_by_id(post_id) or await repository.archive.get_by_id(post_id)
         
         if not post:
             raise HTTPException(
@@ -98,8 +542,16 @@ class PostService:
                 detail="Not authorized to delete this post"
             )
         
-        # Delete the post
-        deleted = await self.repository.delete(post_id, current_user.id)
+        # Delete the post, bumping the posts version first as in create_post
+        version, shard = await self._increment_posts_version(current_user.id)
+        # The post may have been archived since it was looked up
+        repository = PostRepository(self.shards.get(shard))
+        deleted = (
+            await repository.delete(post_id, current_user.id, version)
+            or await repository.archive.delete(post_id, current_user.id, version)
+        )
+        await self.db.commit()
+        post_search_index.advance(current_user.id, version - 1, version)
         
         if not deleted:
             raise HTTPException(
@@ -107,7 +559,70 @@ class PostService:
                 detail="Failed to delete post"
             )
         
-        # Clear cache for this user's posts
-        clear_cache(f"user_posts_{current_user.id}")
+        # Remove the post from the cached list instead of invalidating it
+        self._update_cached_posts(
+            current_user.id,
+            version,
+            lambda posts: [cached_post for cached_post in posts if cached_post.id != post_id]
+        )
+        
+        return {"message": "Post deleted successfully"} 
+    
+    async def _increment_posts_version(self, user_id: int) -> Tuple[int, int]:
+        """
+        Bump a user's posts version, skipping versions already used on their post shard.
+        
+        On a shard other than the primary's, a change is committed before the
+        version bump. If the primary's commit then fails, the shard keeps a
+        change logged under a version the primary rolled back, and reusing that
+        version would make every later write fail on the change log's key. The
+        version therefore moves past the shard's latest change, which also tells
+        cached lists and search indexes that they missed a change.
+        
+        Args:
+            user_id (int): ID of the user whose posts change.
+            
+        Returns:
+            Tuple[int, int]: The new posts version and the user's post shard.
+        """
+        version, shard = await self.user_repository.increment_posts_version(user_id, shard_router.placement(user_id))
+        if shard_router.uses_primary(shard):
+            return version, shard
+        
+        latest = await PostChangeRepository(self.shards.get(shard)).latest_version(user_id)
+        if latest >= version:
+            logger.warning("Skipping posts versions %s-%s of user %s, already used on shard %s", version, latest, user_id, shard)
+            version = latest + 1
+            await self.user_repository.advance_posts_version(user_id, version)
+        return version, shard
+    
+    def _update_cached_posts(
+        self,
+        user_id: int,
+        version: int,
+        apply_change: Callable[[List[PostSchema]], List[PostSchema]],
+    ) -> None:
+        """
+        Apply a committed change to a user's cached post list in place.
+        
+        The change is only applied when the cached list is exactly one version
+        behind; otherwise it may have missed another change and is invalidated.
+        
+        Args:
+            user_id (int): ID of the user whose posts changed.
+            version (int): The user's posts version after the change.
+            apply_change (Callable[[List[PostSchema]], List[PostSchema]]): Builds the new list
+                from the cached one. It must not modify the cached list, which concurrent
+                readers may still hold.
+        """
+        cache_key = f"user_posts_{user_id}"
+        cached = get_cache(cache_key)
+        
+        if cached is None:
+            return
         
-        return {"message": "Post deleted successfully"} 
\ No newline at end of file
+        cached_version, cached_posts = cached
+        if cached_version == version - 1:
+            set_cache(cache_key, (version, apply_change(cached_posts)))
+        else:
+            clear_cache(cache_key)
\ No newline at end of file
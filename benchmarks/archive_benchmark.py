@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Benchmark GET /api/posts list latency before and after archiving old posts.
+
+Users get posts spread evenly over --days days. Each user's uncached post list
+is loaded through PostService before and after archiving the oldest 90% of
+the posts, then the first page past the recent posts is read from the archive.
+
+Usage:
+    python benchmarks/archive_benchmark.py [--users 20] [--posts 5000] [--days 1000] [--samples 50]
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+from common import create_schema, report
+from sqlalchemy import insert, select, func
+
+from app.core.database import AsyncSessionLocal
+from app.jobs.archive_posts import archive_posts
+from app.models.post import Post
+from app.models.post_archive import ArchivedPost
+from app.models.user import User
+from app.repositories.user_repository import UserRepository
+from app.services.post_service import PostService
+
+
+async def create_users(users, posts, days):
+    now = datetime.utcnow()
+    user_ids = []
+    async with AsyncSessionLocal() as session:
+        for _ in range(users):
+            user = User(email=f"archive-{time.time_ns()}@example.com", hashed_password="x")
+            session.add(user)
+            await session.flush()
+            user_ids.append(user.id)
+            rows = [
+                {
+                    "text": f"post number {i} " + "lorem ipsum dolor sit amet " * 8,
+                    "user_id": user.id,
+                    "created_at": now - timedelta(days=days * (posts - i) / posts),
+                }
+                for i in range(posts)
+            ]
+            for start in range(0, len(rows), 5000):
+                await session.execute(insert(Post), rows[start:start + 5000])
+        await session.commit()
+    return user_ids
+
+
+async def list_posts(user_ids, samples):
+    results = []
+    for _ in range(samples):
+        async with AsyncSessionLocal() as session:
+            user = await UserRepository(session).get_by_id(random.choice(user_ids))
+            started = time.perf_counter()
+            await PostService(session).refresh_cache(user.id, user.posts_version, user.post_shard)
+            results.append(time.perf_counter() - started)
+    return results
+
+
+async def page_into_archive(user_ids, samples):
+    results = []
+    for _ in range(samples):
+        async with AsyncSessionLocal() as session:
+            user = await UserRepository(session).get_by_id(random.choice(user_ids))
+            service = PostService(session)
+            cursor = service.next_page_cursor(await service.refresh_cache(user.id, user.posts_version, user.post_shard))
+            started = time.perf_counter()
+            await service.get_posts_page(user, 100, cursor)
+            results.append(time.perf_counter() - started)
+    return results
+
+
+async def main(users, posts, days, samples):
+    await create_schema()
+    user_ids = await create_users(users, posts, days)
+    print(f"{users} users x {posts} posts over {days} days")
+
+    report("list before archiving", await list_posts(user_ids, samples))
+
+    started = time.perf_counter()
+    archived = await archive_posts(older_than_days=days // 10, pause=0)
+    print(f"archived {archived} posts in {time.perf_counter() - started:.1f} s")
+
+    report("list after archiving 90%", await list_posts(user_ids, samples))
+    report("first archive page (100 posts)", await page_into_archive(user_ids, samples))
+
+    async with AsyncSessionLocal() as session:
+        text_bytes, stored_bytes = (await session.execute(
+            select(func.sum(ArchivedPost.text_bytes), func.sum(func.length(ArchivedPost.body)))
+        )).one()
+    print(f"archived text: {text_bytes / 2**20:.1f} MiB stored in {stored_bytes / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--posts", type=int, default=5000, help="posts per user")
+    parser.add_argument("--days", type=int, default=1000, help="age of the oldest posts")
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.users, args.posts, args.days, args.samples))
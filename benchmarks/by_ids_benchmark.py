@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Benchmark fetching a few posts by ID, full listing vs GET /api/posts/by-ids.
+
+A user has --posts posts; each sample picks --ids of them at random, as a
+client following notifications would. Without the multi-get endpoint the
+client downloads the whole list (cache dropped first, as on a worker that
+doesn't hold it). With it, the posts are fetched cold (per-post cache
+empty) and warm. Requests go through the whole application in-process.
+
+Usage:
+    python benchmarks/by_ids_benchmark.py [--posts 5000] [--ids 20] [--samples 50]
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+from common import create_schema, report
+from sqlalchemy import insert, select
+
+from app.core.cache import clear_cache
+from app.core.database import AsyncSessionLocal
+from app.core.security import create_access_token
+from app.main import app
+from app.models.post import Post
+from app.models.user import User
+
+
+async def create_user(posts):
+    async with AsyncSessionLocal() as session:
+        user = User(email=f"by-ids-{time.time_ns()}@example.com", hashed_password="x")
+        session.add(user)
+        await session.flush()
+        rows = [{"text": f"post number {i} " + "lorem ipsum dolor sit amet " * 8, "user_id": user.id} for i in range(posts)]
+        await session.execute(insert(Post), rows)
+        await session.commit()
+        post_ids = (await session.execute(select(Post.id).where(Post.user_id == user.id))).scalars().all()
+        return create_access_token(subject=user.id), post_ids
+
+
+async def timed_get(client, path, auth, params=None):
+    started = time.perf_counter()
+    response = await client.get(path, params=params, headers=auth)
+    assert response.status_code == 200, response.text
+    return time.perf_counter() - started, len(response.content)
+
+
+async def main(posts, ids, samples):
+    await create_schema()
+    token, post_ids = await create_user(posts)
+    auth = {"Authorization": f"Bearer {token}"}
+    full, cold, warm = [], [], []
+
+    async with httpx.AsyncClient(app=app, base_url="http://benchmark") as client:
+        for _ in range(samples):
+            wanted = ",".join(str(post_id) for post_id in random.sample(post_ids, ids))
+
+            clear_cache()
+            elapsed, full_bytes = await timed_get(client, "/api/posts", auth)
+            full.append(elapsed)
+
+            clear_cache()
+            elapsed, by_ids_bytes = await timed_get(client, "/api/posts/by-ids", auth, {"ids": wanted})
+            cold.append(elapsed)
+            elapsed, _ = await timed_get(client, "/api/posts/by-ids", auth, {"ids": wanted})
+            warm.append(elapsed)
+
+    print(f"{ids} of {posts} posts")
+    report(f"full listing ({full_bytes / 1024:.0f} KiB)", full)
+    report(f"by-ids, cold ({by_ids_bytes / 1024:.1f} KiB)", cold)
+    report("by-ids, cached", warm)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--ids", type=int, default=20, help="posts fetched per request")
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.posts, args.ids, args.samples))
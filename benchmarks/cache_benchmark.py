@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""
+Benchmark post listing when cached lists expire and when the database fails.
+
+A burst of --concurrency requests lists the posts of a user whose cached list
+has just expired. Without stale-while-revalidate, modelled by dropping the
+entry, every request waits for a reload; with it, the stale list is returned
+and a single background refresh runs. Then every statement fails, as with
+the database down, while the posts have changed since they were cached:
+the same bursts authenticate with the cached user row and are served from
+the stale list, and the circuit breakers stop sending queries to the
+failing database.
+
+Usage:
+    python benchmarks/cache_benchmark.py [--posts 5000] [--concurrency 50] [--rounds 10]
+"""
+import argparse
+import asyncio
+import time
+
+from common import create_schema, report
+from sqlalchemy import event, insert, update
+from sqlalchemy.exc import OperationalError
+
+from app.core import tasks
+from app.core.cache import cache, clear_cache
+from app.core.circuit_breaker import breakers
+from app.core.database import AsyncSessionLocal, engine
+from app.core.metrics import metrics
+from app.core.security import get_current_user
+from app.models.post import Post
+from app.models.user import User
+from app.repositories.post_repository import PostRepository
+from app.schemas.token import TokenPayload
+from app.services.post_service import PostService
+
+loads = 0
+get_by_user_id = PostRepository.get_by_user_id
+
+
+async def counting_get_by_user_id(self, user_id):
+    global loads
+    loads += 1
+    return await get_by_user_id(self, user_id)
+
+
+def fail_statement(connection, cursor, statement, parameters, context, executemany):
+    global loads
+    loads += 1
+    time.sleep(0.005)  # a connection attempt failing
+    raise OperationalError(statement, parameters, ConnectionRefusedError("database is down"))
+
+
+async def create_user(posts):
+    async with AsyncSessionLocal() as session:
+        user = User(email=f"cache-{time.time_ns()}@example.com", hashed_password="x")
+        session.add(user)
+        await session.flush()
+        rows = [{"text": f"post number {i} " + "lorem ipsum dolor sit amet " * 8, "user_id": user.id} for i in range(posts)]
+        await session.execute(insert(Post), rows)
+        await session.commit()
+        return user.id
+
+
+async def change_posts(user_id):
+    # Another worker changed the posts, so the cached list must be reloaded
+    async with AsyncSessionLocal() as session:
+        await session.execute(update(User).where(User.id == user_id).values(posts_version=User.posts_version + 1))
+        await session.commit()
+
+
+async def list_posts(user_id):
+    async with AsyncSessionLocal() as session:
+        started = time.perf_counter()
+        try:
+            user = await get_current_user(TokenPayload(sub=str(user_id)), session)
+            await PostService(session).get_posts(user)
+        except Exception:
+            pass
+        return time.perf_counter() - started
+
+
+async def burst(user_id, concurrency, rounds, expire):
+    global loads
+    loads = 0
+    samples = []
+    for _ in range(rounds):
+        expire(f"user_posts_{user_id}")
+        samples.extend(await asyncio.gather(*[list_posts(user_id) for _ in range(concurrency)]))
+        await tasks.drain(10)
+    return samples
+
+
+def drop(key):
+    clear_cache(key)
+
+
+def make_stale(key):
+    data, _, stale_until = cache[key]
+    cache[key] = (data, time.time() - 1, stale_until)
+
+
+async def main(posts, concurrency, rounds):
+    await create_schema()
+    user_id = await create_user(posts)
+    PostRepository.get_by_user_id = counting_get_by_user_id
+    await list_posts(user_id)
+    print(f"{posts} posts, bursts of {concurrency} requests right after expiry")
+
+    report("reload on expiry", await burst(user_id, concurrency, rounds, drop))
+    print(f"{'':<40} post list loads={loads}")
+    await list_posts(user_id)
+    report("stale-while-revalidate", await burst(user_id, concurrency, rounds, make_stale))
+    print(f"{'':<40} post list loads={loads}")
+
+    await change_posts(user_id)
+    async with AsyncSessionLocal() as session:
+        # Caches the user row at the new posts version, the list stays at the old one
+        await get_current_user(TokenPayload(sub=str(user_id)), session)
+    event.listen(engine.sync_engine, "before_cursor_execute", fail_statement)
+    try:
+        report("database down, serve stale", await burst(user_id, concurrency, rounds, make_stale))
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", fail_statement)
+    counters = metrics.snapshot()["counters"]
+    print(
+        f"{'':<40} failed statements={loads}"
+        f" breaker rejections={counters.get('circuit.users.rejected', 0):.0f}"
+        f"+{counters.get('circuit.posts.0.rejected', 0):.0f}"
+        f" cached users on error={counters.get('cache.user_stale_on_error', 0):.0f}"
+        f" served stale on error={counters.get('cache.stale_on_error', 0):.0f}"
+    )
+    breakers.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50, help="requests per burst")
+    parser.add_argument("--rounds", type=int, default=10, help="bursts per scenario")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.posts, args.concurrency, args.rounds))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+Benchmark a client catching up on a few changes, full listing vs change feed.
+
+A user with --posts posts makes --changes creates and deletes, then the
+client syncs either by listing all posts again or by asking GET
+/api/posts/changes for what changed since its token. The cached list is
+dropped before each full listing, as on a worker that doesn't hold it.
+Requests go through the whole application in-process.
+
+Usage:
+    python benchmarks/changes_benchmark.py [--posts 5000] [--changes 10] [--samples 50]
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from common import create_schema, report
+from sqlalchemy import insert
+
+from app.core.cache import clear_cache
+from app.core.database import AsyncSessionLocal
+from app.core.security import create_access_token
+from app.main import app
+from app.models.post import Post
+from app.models.user import User
+
+
+async def create_user(posts):
+    async with AsyncSessionLocal() as session:
+        user = User(email=f"changes-{time.time_ns()}@example.com", hashed_password="x")
+        session.add(user)
+        await session.flush()
+        rows = [{"text": f"post number {i} " + "lorem ipsum dolor sit amet " * 8, "user_id": user.id} for i in range(posts)]
+        await session.execute(insert(Post), rows)
+        await session.commit()
+        return create_access_token(subject=user.id)
+
+
+async def make_changes(client, auth, changes):
+    for i in range(changes):
+        response = await client.post("/api/posts", json={"text": f"change {i}"}, headers=auth)
+        if i % 2:
+            await client.request("DELETE", "/api/posts", json={"post_id": response.json()["post_id"]}, headers=auth)
+
+
+async def main(posts, changes, samples):
+    await create_schema()
+    auth = {"Authorization": f"Bearer {await create_user(posts)}"}
+    full, feed = [], []
+    full_bytes = feed_bytes = 0
+
+    async with httpx.AsyncClient(app=app, base_url="http://benchmark") as client:
+        for _ in range(samples):
+            token = (await client.get("/api/posts", headers=auth)).headers["X-Changes-Token"]
+            await make_changes(client, auth, changes)
+
+            clear_cache()
+            started = time.perf_counter()
+            response = await client.get("/api/posts", headers=auth)
+            full.append(time.perf_counter() - started)
+            full_bytes = len(response.content)
+
+            started = time.perf_counter()
+            response = await client.get("/api/posts/changes", params={"since": token}, headers=auth)
+            feed.append(time.perf_counter() - started)
+            feed_bytes = len(response.content)
+
+    print(f"{posts} posts, {changes} changes since the client's last sync")
+    report(f"full listing ({full_bytes / 1024:.0f} KiB)", full)
+    report(f"change feed ({feed_bytes / 1024:.1f} KiB)", feed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--changes", type=int, default=10, help="posts created, half of them deleted again")
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.posts, args.changes, args.samples))
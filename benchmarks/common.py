@@ -0,0 +1,36 @@
+"""
+Shared helpers for the benchmark scripts.
+"""
+import os
+import statistics
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Benchmarks run against a throwaway SQLite database unless DATABASE_URL is set
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/benchmark.db"
+
+
+async def create_schema():
+    """Create all tables in the benchmark database and silence SQL echo."""
+    from app.core.database import engine, Base
+    import app.models  # noqa: F401  (registers the models)
+
+    engine.echo = False
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def report(name, samples):
+    print(
+        f"{name:<40} p50={statistics.median(samples) * 1000:8.2f} ms"
+        f"  p95={percentile(samples, 0.95) * 1000:8.2f} ms"
+        f"  max={max(samples) * 1000:8.2f} ms"
+    )
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Benchmark slow queries with and without request deadlines.
+
+--requests concurrent requests each run a query that takes far longer than
+the read deadline (a self-join over --posts posts), followed by cheap post
+listings. Without deadlines the slow queries run to completion, holding
+their connections the whole time; with a --deadline-ms read deadline they
+are stopped by the database's statement timeout and answered with 504.
+Requests go through the whole application in-process.
+
+Usage:
+    python benchmarks/deadline_benchmark.py [--posts 3000] [--requests 10] [--deadline-ms 200]
+"""
+import argparse
+import asyncio
+import logging
+import time
+from collections import Counter
+
+import httpx
+from common import create_schema, report
+from fastapi import Depends
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_db
+from app.core.metrics import metrics
+from app.core.security import create_access_token
+from app.main import app
+from app.models.post import Post
+from app.models.user import User
+
+SLOW_QUERY = text("SELECT count(*) FROM posts a, posts b WHERE a.text < b.text")
+
+
+async def slow_report(db: AsyncSession = Depends(get_db)):
+    return {"pairs": (await db.execute(SLOW_QUERY)).scalar()}
+
+
+async def create_user(posts):
+    async with AsyncSessionLocal() as session:
+        user = User(email=f"deadline-{time.time_ns()}@example.com", hashed_password="x")
+        session.add(user)
+        await session.flush()
+        rows = [{"text": f"post number {i} lorem ipsum", "user_id": user.id} for i in range(posts)]
+        await session.execute(insert(Post), rows)
+        await session.commit()
+        return create_access_token(subject=user.id)
+
+
+async def timed_get(client, path, auth):
+    started = time.perf_counter()
+    response = await client.get(path, headers=auth)
+    return time.perf_counter() - started, response.status_code
+
+
+async def run(client, auth, requests):
+    started = time.perf_counter()
+    slow = await asyncio.gather(*[timed_get(client, "/api/benchmark/slow", auth) for _ in range(requests)])
+    listings = [await timed_get(client, "/api/posts", auth) for _ in range(requests)]
+    return slow, listings, time.perf_counter() - started
+
+
+async def main(posts, requests, deadline_ms):
+    await create_schema()
+    auth = {"Authorization": f"Bearer {await create_user(posts)}"}
+    app.router.add_api_route("/api/benchmark/slow", slow_report)
+    # The 504s are logged as warnings by the access log
+    logging.disable(logging.WARNING)
+
+    async with httpx.AsyncClient(app=app, base_url="http://benchmark", timeout=None) as client:
+        for name, deadlines in (("no deadlines", {}), (f"{deadline_ms} ms read deadline", {"read": deadline_ms})):
+            settings.REQUEST_DEADLINES_MS = deadlines
+            slow, listings, elapsed = await run(client, auth, requests)
+            statuses = Counter(status_code for _, status_code in slow)
+            print(f"{name}: {elapsed:.2f} s in total, slow requests answered {dict(statuses)}")
+            report("  slow requests", [duration for duration, _ in slow])
+            report("  post listings afterwards", [duration for duration, _ in listings])
+
+    print({name: value for name, value in metrics.snapshot()["counters"].items() if name.startswith("deadline.")})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=3000)
+    parser.add_argument("--requests", type=int, default=10, help="concurrent slow requests")
+    parser.add_argument("--deadline-ms", type=int, default=200)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.posts, args.requests, args.deadline_ms))
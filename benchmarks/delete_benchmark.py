@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""
+Benchmark deleting large posts, hard delete vs soft delete, while other requests read.
+
+Each user gets --posts posts of --size bytes. Posts are deleted one per
+transaction, as DELETE /api/posts does, while --readers concurrent tasks list
+posts. Timings are taken once with the previous hard DELETE, then with the
+tombstone update, followed by the background purge of the tombstones.
+
+Usage:
+    python benchmarks/delete_benchmark.py [--posts 500] [--size 100000] [--readers 4]
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from common import create_schema, report
+from sqlalchemy import delete, insert, select
+
+from app.core.database import AsyncSessionLocal
+from app.core.purge import PostPurger
+from app.models.post import Post
+from app.models.user import User
+from app.repositories.post_repository import PostRepository
+from app.repositories.post_stats_repository import PostStatsRepository, post_text_bytes
+
+
+async def create_posts(posts, size):
+    async with AsyncSessionLocal() as session:
+        user = User(email=f"delete-{time.time_ns()}@example.com", hashed_password="x")
+        session.add(user)
+        await session.flush()
+        text = ("lorem ipsum dolor sit amet " * (size // 27 + 1))[:size]
+        await session.execute(insert(Post), [{"text": f"{i} {text}", "user_id": user.id} for i in range(posts)])
+        await session.commit()
+        post_ids = (await session.execute(select(Post.id).where(Post.user_id == user.id))).scalars().all()
+        return user.id, post_ids
+
+
+async def hard_delete(session, post_id, user_id):
+    # PostRepository.delete as it was before soft deletes
+    size_query = select(post_text_bytes).where(Post.id == post_id, Post.user_id == user_id)
+    text_bytes = (await session.execute(size_query)).scalar_one_or_none() or 0
+    result = await session.execute(delete(Post).where(Post.id == post_id, Post.user_id == user_id))
+    if result.rowcount > 0:
+        await PostStatsRepository(session).record_post_deleted(user_id, text_bytes)
+    await session.commit()
+
+
+async def soft_delete(session, post_id, user_id):
+    await PostRepository(session).delete(post_id, user_id)
+
+
+async def read_posts(user_id, stop, samples):
+    while not stop.is_set():
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as session:
+            await PostRepository(session).get_page(user_id, 20)
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(0)
+
+
+async def run(delete_post, posts, size, readers):
+    user_id, post_ids = await create_posts(posts, size)
+    random.shuffle(post_ids)
+    stop = asyncio.Event()
+    reads = []
+    reader_tasks = [asyncio.create_task(read_posts(user_id, stop, reads)) for _ in range(readers)]
+    deletes = []
+    for post_id in post_ids:
+        async with AsyncSessionLocal() as session:
+            started = time.perf_counter()
+            await delete_post(session, post_id, user_id)
+            deletes.append(time.perf_counter() - started)
+    stop.set()
+    await asyncio.gather(*reader_tasks)
+    return deletes, reads
+
+
+async def main(posts, size, readers):
+    await create_schema()
+    print(f"{posts} posts of {size // 1000} kB, {readers} concurrent readers")
+
+    deletes, reads = await run(hard_delete, posts, size, readers)
+    report("hard delete", deletes)
+    report("  reads meanwhile", reads)
+
+    deletes, reads = await run(soft_delete, posts, size, readers)
+    report("soft delete", deletes)
+    report("  reads meanwhile", reads)
+
+    purger = PostPurger(batch_size=200, pause_seconds=0, idle_seconds=0, max_busy_connections=2)
+    started = time.perf_counter()
+    while await purger.purge_batch(0):
+        pass
+    print(f"purged {posts} tombstones in {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=500)
+    parser.add_argument("--size", type=int, default=100000, help="post size in bytes")
+    parser.add_argument("--readers", type=int, default=4, help="concurrent listing tasks")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.posts, args.size, args.readers))
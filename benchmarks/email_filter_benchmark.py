@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""
+Measure memory use and false positive rate of the registered email filter.
+
+Fills a filter sized from the EMAIL_FILTER_* settings (or the given
+arguments) with synthetic emails, then probes it with emails that were never
+added.
+
+Usage:
+    python benchmarks/email_filter_benchmark.py [--users 10000000] [--error-rate 0.001] [--probes 1000000]
+"""
+import argparse
+import statistics
+import time
+
+from common import percentile
+from app.core.email_filter import BloomFilter
+
+
+def main(users, error_rate, probes):
+    bloom = BloomFilter(users, error_rate)
+    print(f"Users: {users:,}  target false positive rate: {error_rate}")
+    print(f"Bits: {bloom.size:,} ({bloom.size / users:.1f} per user)  hash functions: {bloom.hash_count}")
+    print(f"Memory: {len(bloom.bits) / 1024 / 1024:.1f} MiB")
+
+    started = time.perf_counter()
+    for i in range(users):
+        bloom.add(f"user{i}@example.com")
+    elapsed = time.perf_counter() - started
+    print(f"Load: {elapsed:.1f} s ({users / elapsed:,.0f} emails/s)")
+
+    false_positives = 0
+    samples = []
+    for i in range(probes):
+        email = f"unknown{i}@example.org"
+        started = time.perf_counter()
+        hit = email in bloom
+        samples.append(time.perf_counter() - started)
+        false_positives += hit
+    print(f"False positives: {false_positives:,} / {probes:,} = {false_positives / probes:.5f}")
+    print(
+        f"Lookup of an unknown email: p50={statistics.median(samples) * 1e6:.2f} us"
+        f"  p95={percentile(samples, 0.95) * 1e6:.2f} us"
+    )
+
+    misses = sum(f"user{i}@example.com" not in bloom for i in range(0, users, max(1, users // probes)))
+    print(f"False negatives among registered emails: {misses}")
+
+
+if __name__ == "__main__":
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10_000_000)
+    parser.add_argument("--error-rate", type=float, default=settings.EMAIL_FILTER_FALSE_POSITIVE_RATE)
+    parser.add_argument("--probes", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    main(args.users, args.error_rate, args.probes)
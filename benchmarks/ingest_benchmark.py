@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Benchmark peak memory of creating a 1 MB post, JSON vs text/plain ingestion.
+
+Each request goes through the whole application in-process; tracemalloc's
+peak is reset before the request and read after it. The request bodies are
+built up front, so client-side allocations are the same for both routes.
+
+Usage:
+    python benchmarks/ingest_benchmark.py [--size 1000000] [--requests 10]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+
+import httpx
+from common import create_schema
+
+from app.core.database import AsyncSessionLocal
+from app.core.security import create_access_token
+from app.main import app
+from app.models.user import User
+
+
+async def create_token():
+    async with AsyncSessionLocal() as session:
+        user = User(email=f"ingest-{time.time_ns()}@example.com", hashed_password="x")
+        session.add(user)
+        await session.commit()
+        return create_access_token(subject=user.id)
+
+
+async def measure(client, path, content, headers, requests):
+    peaks = []
+    for _ in range(requests):
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        response = await client.post(path, content=content, headers=headers)
+        assert response.status_code == 201, response.text
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - baseline)
+    return peaks
+
+
+def report(name, peaks, size):
+    median = statistics.median(peaks)
+    print(f"{name:<28} peak={median / 2**20:7.2f} MiB  ({median / size:4.1f}x the body)")
+
+
+async def main(size, requests):
+    await create_schema()
+    token = await create_token()
+    text = ("lorem ipsum dolor sit amet " * (size // 27 + 1))[:size]
+    json_body = json.dumps({"text": text}).encode()
+    text_body = text.encode()
+    auth = {"Authorization": f"Bearer {token}"}
+
+    tracemalloc.start()
+    async with httpx.AsyncClient(app=app, base_url="http://benchmark") as client:
+        # Warm up imports and caches outside the measurements
+        await client.post("/api/posts", json={"text": "warm-up"}, headers=auth)
+        await client.post("/api/posts/text", content=b"warm-up", headers={**auth, "Content-Type": "text/plain"})
+
+        json_peaks = await measure(
+            client, "/api/posts", json_body, {**auth, "Content-Type": "application/json"}, requests
+        )
+        text_peaks = await measure(
+            client, "/api/posts/text", text_body, {**auth, "Content-Type": "text/plain; charset=utf-8"}, requests
+        )
+    tracemalloc.stop()
+
+    report("POST /api/posts (JSON)", json_peaks, size)
+    report("POST /api/posts/text", text_peaks, size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1000000, help="post size in characters")
+    parser.add_argument("--requests", type=int, default=10)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.size, args.requests))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Benchmark request latency while log output can't keep up.
+
+Simulated requests each log --records SQL-like records and yield to the
+event loop in between, the way echo=True logs a request's statements. The
+log stream is slowed down to --write-ms per write, as with a blocked stdout
+pipe or a slow disk. The requests run once with a synchronous stream
+handler, the previous echo=True behaviour, and then through the queue
+pipeline, with and without sampling.
+
+Usage:
+    python benchmarks/logging_benchmark.py [--requests 200] [--records 10] [--write-ms 1]
+"""
+import argparse
+import asyncio
+import io
+import logging
+import time
+
+from common import report
+
+from app.core.config import settings
+from app.core.logs import log_pipeline
+
+sql_logger = logging.getLogger("sqlalchemy.engine.Engine")
+
+
+class SlowStream(io.StringIO):
+    def __init__(self, write_seconds):
+        super().__init__()
+        self.write_seconds = write_seconds
+
+    def write(self, text):
+        time.sleep(self.write_seconds)
+        return len(text)
+
+
+async def handle_request(records):
+    started = time.perf_counter()
+    for i in range(records):
+        sql_logger.info("SELECT posts.id, posts.text FROM posts WHERE posts.user_id = ? [%s]", i)
+        await asyncio.sleep(0)
+    return time.perf_counter() - started
+
+
+async def run(requests, records, concurrency=20):
+    samples = []
+    for start in range(0, requests, concurrency):
+        batch = min(concurrency, requests - start)
+        samples.extend(await asyncio.gather(*[handle_request(records) for _ in range(batch)]))
+    return samples
+
+
+async def main(requests, records, write_seconds):
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+
+    handler = logging.StreamHandler(SlowStream(write_seconds))
+    root.addHandler(handler)
+    report("synchronous handler", await run(requests, records))
+    root.removeHandler(handler)
+
+    for name, rates in (("queue, unsampled", {}), ("queue, SQL sampled at 1%", {"sqlalchemy.engine": 0.01})):
+        settings.LOG_SAMPLE_RATES = rates
+        log_pipeline.start(SlowStream(write_seconds))
+        report(name, await run(requests, records))
+        print(f"{'':<40} dropped={log_pipeline.handler.dropped} of {requests * records} records")
+        log_pipeline.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--records", type=int, default=10, help="log records per request")
+    parser.add_argument("--write-ms", type=float, default=1.0, help="time taken by each write to the log stream")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.requests, args.records, args.write_ms / 1000))
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Benchmark read-after-write latency of GET /api/posts for users with large histories.
+
+Each iteration creates a post through PostService and then lists the user's
+posts, comparing incremental cache maintenance with whole-list invalidation
+(the previous behaviour).
+
+Usage:
+    python benchmarks/read_after_write_benchmark.py [--histories 1000 10000 50000] [--writes 20]
+"""
+import argparse
+import asyncio
+import time
+
+from common import create_schema, report
+from sqlalchemy import insert
+
+from app.core.cache import clear_cache
+from app.core.database import AsyncSessionLocal
+from app.models.post import Post
+from app.models.user import User
+from app.repositories.user_repository import UserRepository
+from app.services.post_service import PostService
+
+
+async def create_user_with_history(history):
+    async with AsyncSessionLocal() as session:
+        user = User(email=f"raw-{history}-{time.time_ns()}@example.com", hashed_password="x")
+        session.add(user)
+        await session.commit()
+        rows = [{"text": f"post number {i} " + "x" * 200, "user_id": user.id} for i in range(history)]
+        for start in range(0, len(rows), 5000):
+            await session.execute(insert(Post), rows[start:start + 5000])
+        await session.commit()
+        return user.id
+
+
+async def run(user_id, writes, invalidate):
+    samples = []
+    for i in range(writes):
+        async with AsyncSessionLocal() as session:
+            user = await UserRepository(session).get_by_id(user_id)
+            await PostService(session).create_post(f"new post {i}", user)
+        if invalidate:
+            clear_cache(f"user_posts_{user_id}")
+
+        async with AsyncSessionLocal() as session:
+            user = await UserRepository(session).get_by_id(user_id)
+            started = time.perf_counter()
+            await PostService(session).get_posts(user)
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def main(histories, writes):
+    await create_schema()
+    for history in histories:
+        user_id = await create_user_with_history(history)
+        async with AsyncSessionLocal() as session:
+            await PostService(session).get_posts(await UserRepository(session).get_by_id(user_id))
+
+        report(f"history={history} invalidate", await run(user_id, writes, invalidate=True))
+        report(f"history={history} incremental", await run(user_id, writes, invalidate=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--histories", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--writes", type=int, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.histories, args.writes))
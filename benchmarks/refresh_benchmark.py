@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+"""
+Compare the latency of renewing an access token by logging in again with
+exchanging a refresh token.
+
+Login pays for a bcrypt verification at the configured BCRYPT_ROUNDS;
+refresh is an HMAC check plus a few primary key reads and writes.
+
+Usage:
+    python benchmarks/refresh_benchmark.py [--iterations 50]
+"""
+import argparse
+import asyncio
+import time
+
+from common import create_schema, report
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.auth_service import AuthService
+
+EMAIL = "refresh-benchmark@example.com"
+PASSWORD = "benchmark-password"
+
+
+async def main(iterations):
+    await create_schema()
+    async with AsyncSessionLocal() as session:
+        token = await AuthService(session).signup_user(EMAIL, PASSWORD)
+
+    login_samples = []
+    for _ in range(iterations):
+        async with AsyncSessionLocal() as session:
+            started = time.perf_counter()
+            await AuthService(session).login_user(EMAIL, PASSWORD)
+            login_samples.append(time.perf_counter() - started)
+
+    refresh_samples = []
+    refresh_token = token.refresh_token
+    for _ in range(iterations):
+        async with AsyncSessionLocal() as session:
+            started = time.perf_counter()
+            token = await AuthService(session).refresh_tokens(refresh_token)
+            refresh_samples.append(time.perf_counter() - started)
+        refresh_token = token.refresh_token
+
+    print(f"BCRYPT_ROUNDS={settings.BCRYPT_ROUNDS}")
+    report("login (bcrypt verify)", login_samples)
+    report("refresh (HMAC + rotation)", refresh_samples)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.iterations))
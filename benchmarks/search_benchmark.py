@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+Benchmark post search query latency for a user with 100k posts.
+
+Measures the in-process inverted index used on SQLite/local runs. Pass
+--database-url with a MySQL URL to also measure the FULLTEXT index (the posts
+are inserted into that database for a dedicated benchmark user).
+
+Usage:
+    python benchmarks/search_benchmark.py [--posts 100000] [--database-url URL]
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from common import report
+from app.core.search import UserPostIndex
+
+QUERIES = ["alpha", "quick fox", "database latency", "zeta omega kappa", "word17 word230"]
+PAGES = 3
+PAGE_SIZE = 20
+
+
+def generate_posts(count, seed=42):
+    """Generate synthetic posts with a Zipf-like word distribution."""
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(5000)] + [
+        "alpha", "quick", "fox", "database", "latency", "zeta", "omega", "kappa",
+    ]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    rng.shuffle(weights)
+    for post_id in range(1, count + 1):
+        length = rng.randint(10, 80)
+        yield post_id, " ".join(rng.choices(vocabulary, weights, k=length))
+
+
+def benchmark_in_process(posts, repeat):
+    start = time.perf_counter()
+    index = UserPostIndex(version=0)
+    for post_id, text in posts:
+        index.add(post_id, text)
+    print(f"In-process index build: {time.perf_counter() - start:.2f} s for {len(posts)} posts")
+
+    for query in QUERIES:
+        samples = []
+        for _ in range(repeat):
+            after = None
+            for _ in range(PAGES):
+                started = time.perf_counter()
+                results = index.search(query, PAGE_SIZE, after)
+                samples.append(time.perf_counter() - started)
+                if len(results) < PAGE_SIZE:
+                    break
+                post_id, score = results[-1]
+                after = (score, post_id)
+        report(f"in-process '{query}'", samples)
+
+    samples = []
+    for post_id in range(1, repeat + 1):
+        started = time.perf_counter()
+        index.add(len(posts) + post_id, "incremental alpha update")
+        samples.append(time.perf_counter() - started)
+    report("in-process incremental add", samples)
+
+
+async def benchmark_fulltext(database_url, posts, repeat):
+    from sqlalchemy import insert
+    from app.core.database import build_engine
+    from app.models.post import Post
+    from app.models.user import User
+    from app.repositories.post_repository import PostRepository
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    engine = build_engine(database_url)
+    engine.echo = False
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        user = User(email=f"search-bench-{int(time.time())}@example.com", hashed_password="x")
+        session.add(user)
+        await session.commit()
+
+        batch = []
+        for _, text in posts:
+            batch.append({"text": text, "user_id": user.id})
+            if len(batch) == 5000:
+                await session.execute(insert(Post), batch)
+                batch = []
+        if batch:
+            await session.execute(insert(Post), batch)
+        await session.commit()
+
+        repository = PostRepository(session)
+        for query in QUERIES:
+            samples = []
+            for _ in range(repeat):
+                after = None
+                for _ in range(PAGES):
+                    started = time.perf_counter()
+                    results = await repository.search_fulltext(user.id, query, PAGE_SIZE, after)
+                    samples.append(time.perf_counter() - started)
+                    if len(results) < PAGE_SIZE:
+                        break
+                    post, score = results[-1]
+                    after = (score, post.id)
+            report(f"fulltext '{query}'", samples)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", help="MySQL URL to benchmark the FULLTEXT index against")
+    args = parser.parse_args()
+
+    posts = list(generate_posts(args.posts))
+    benchmark_in_process(posts, args.repeat)
+    if args.database_url:
+        asyncio.run(benchmark_fulltext(args.database_url, posts, args.repeat))
@@ -1,9 +1,21 @@
 #!/usr/bin/env python
 """
 Script to start the FastAPI Blog Application without Docker.
+
+Runs the multi-worker production server by default. Pass --dev to run a
+single auto-reloading process for local development instead.
 """
-import uvicorn
+import argparse
+
+from app.core.server import run_development, run_production
 
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dev", action="store_true", help="run a single auto-reloading development server")
+    args = parser.parse_args()
+
+    if args.dev:
+        run_development()
+    else:
+        run_production()
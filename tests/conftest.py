@@ -0,0 +1,132 @@
+"""
+Shared fixtures: the application runs against a throwaway SQLite database.
+
+Settings are read when the app modules are imported, so the environment is
+set up here first. One TestClient, and so one event loop, serves the whole
+session; coroutines that must share its engine and locks run in that loop
+through the run fixture. Every test starts with empty tables and empty
+per-worker state.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DATA_DIRECTORY = tempfile.mkdtemp(prefix="app-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DATA_DIRECTORY}/test.db"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["LOG_LEVEL"] = "WARNING"
+os.environ["POST_PURGE_ENABLED"] = "false"  # tests purge explicitly
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, delete
+
+from app.core import tasks
+from app.core.cache import cache, post_cache, refreshing, user_cache
+from app.core.circuit_breaker import breakers
+from app.core.config import settings
+from app.core.database import Base, engine
+from app.core.metrics import metrics
+from app.main import app
+from app import models  # noqa: F401  (registers the models)
+from helpers import signup
+
+
+def _create_schema(path: str = f"{DATA_DIRECTORY}/test.db"):
+    # With a synchronous engine, so the schema exists before the app's warm-up reads it
+    schema_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(schema_engine)
+    schema_engine.dispose()
+
+
+async def _empty_tables():
+    await tasks.drain(5)
+    async with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            await connection.execute(delete(table))
+
+
+def reset_worker_state():
+    """Forget everything this worker keeps in memory between requests."""
+    from app.api.dependencies.rate_limit import auth_rate_limiter
+    from app.core.email_filter import registered_emails
+    from app.core.revocation import token_revocations, TokenDenylist
+    from app.core.search import post_search_index
+
+    cache.clear()
+    post_cache.clear()
+    user_cache.clear()
+    refreshing.clear()
+    breakers.clear()
+    metrics.counters.clear()
+    metrics.summaries.clear()
+    post_search_index._indexes.clear()
+    auth_rate_limiter.backend._buckets.clear()
+    # Row IDs restart in an emptied table, so the filter and the channel start over too
+    registered_emails.__init__(settings.EMAIL_FILTER_EXPECTED_USERS, settings.EMAIL_FILTER_FALSE_POSITIVE_RATE)
+    registered_emails.ready = True
+    token_revocations.denylist = TokenDenylist(token_revocations.denylist.bucket_seconds)
+    token_revocations.channel.last_id = 0
+
+
+@pytest.fixture(scope="session")
+def client():
+    _create_schema()
+    with TestClient(app) as test_client:
+        deadline = time.monotonic() + 10
+        while test_client.get("/ready").status_code != 200:
+            assert time.monotonic() < deadline, "the application never became ready"
+            time.sleep(0.02)
+        yield test_client
+
+
+@pytest.fixture
+def run(client):
+    """Run a coroutine function in the application's event loop and return its result."""
+    def call(function, *args):
+        return client.portal.call(function, *args)
+    return call
+
+
+@pytest.fixture(autouse=True)
+def clean_state(request):
+    if "client" not in request.fixturenames and "run" not in request.fixturenames:
+        yield
+        return
+    client = request.getfixturevalue("client")
+    client.portal.call(_empty_tables)
+    reset_worker_state()
+    yield
+
+
+@pytest.fixture
+def second_shard(client, tmp_path, monkeypatch) -> int:
+    """Add a post shard on its own SQLite database and return its index."""
+    from app.core.sharding import ShardRouter, post_id_allocator, shard_router
+    from app.models.id_block import IdBlock
+
+    async def seed_post_ids():
+        # Done by the sharding migration, which create_all doesn't run
+        async with engine.begin() as connection:
+            await connection.execute(IdBlock.__table__.insert().values(name="posts", next_id=1))
+
+    _create_schema(f"{tmp_path}/shard.db")
+    client.portal.call(seed_post_ids)
+    monkeypatch.setattr(post_id_allocator, "_next", 0)
+    monkeypatch.setattr(post_id_allocator, "_end", 0)
+    router = ShardRouter([settings.DATABASE_URL, f"sqlite+aiosqlite:///{tmp_path}/shard.db"])
+    monkeypatch.setattr(shard_router, "engines", router.engines)
+    monkeypatch.setattr(shard_router, "_sessionmakers", router._sessionmakers)
+    yield 1
+    client.portal.call(router.dispose)
+
+
+@pytest.fixture
+def user(client) -> dict:
+    return signup(client)
+
@@ -0,0 +1,55 @@
+"""
+Request helpers shared by the tests.
+"""
+import itertools
+from contextlib import contextmanager
+
+from jose import jwt
+from sqlalchemy import event
+
+from app.core.database import engine
+
+_emails = itertools.count()
+
+
+def new_email() -> str:
+    return f"user{next(_emails)}@example.com"
+
+
+def signup(client, email: str = None, password: str = "password123") -> dict:
+    """
+    Register a user.
+
+    Returns:
+        dict: The token response, plus the email under "email", the user's ID under
+            "user_id" and the headers to authenticate with under "headers".
+    """
+    email = email or new_email()
+    response = client.post("/api/signup", json={"email": email, "password": password})
+    assert response.status_code == 201, response.text
+    tokens = response.json()
+    tokens["email"] = email
+    tokens["user_id"] = int(jwt.get_unverified_claims(tokens["access_token"])["sub"])
+    tokens["headers"] = {"Authorization": f"Bearer {tokens['access_token']}"}
+    return tokens
+
+
+def create_post(client, headers: dict, text: str = "hello world") -> int:
+    response = client.post("/api/posts", json={"text": text}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["post_id"]
+
+
+@contextmanager
+def recorded_statements():
+    """Collect the SQL statements run on the engine while the block runs."""
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
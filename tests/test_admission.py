@@ -0,0 +1,105 @@
+import asyncio
+
+from app.core.admission import AdaptiveConcurrencyLimiter, AdmissionControlMiddleware, route_group
+from app.core.config import settings
+
+
+def _limiter(**overrides) -> AdaptiveConcurrencyLimiter:
+    options = dict(name="test", initial_limit=2, max_limit=4, target_latency=0.1, queue_timeout=0.05, max_queue=10)
+    options.update(overrides)
+    return AdaptiveConcurrencyLimiter(**options)
+
+
+def test_route_groups():
+    assert route_group("POST", "/api/login") == "auth"
+    assert route_group("POST", "/api/signup") == "auth"
+    assert route_group("GET", "/api/posts") == "read"
+    assert route_group("DELETE", "/api/posts/1") == "write"
+    assert route_group("GET", "/ready") is None
+
+
+def test_requests_over_the_limit_are_shed_after_the_queue_timeout():
+    async def scenario():
+        limiter = _limiter()
+        assert await limiter.acquire()
+        assert await limiter.acquire()
+        return await limiter.acquire(), limiter.in_flight
+
+    assert asyncio.run(scenario()) == (False, 2)
+
+
+def test_released_slots_go_to_waiting_requests():
+    async def scenario():
+        limiter = _limiter(initial_limit=1, queue_timeout=1.0)
+        await limiter.acquire()
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.release(0.01)
+        return await waiting, limiter.in_flight
+
+    assert asyncio.run(scenario()) == (True, 1)
+
+
+def test_limit_backs_off_on_slow_requests_and_grows_on_fast_ones():
+    limiter = _limiter(initial_limit=4, max_limit=8)
+    limiter.in_flight = 1
+    limiter.release(1.0)
+    assert limiter.limit == 4 * limiter.BACKOFF_RATIO
+
+    limiter.in_flight = 4
+    before = limiter.limit
+    limiter.release(0.01)
+    assert limiter.limit > before
+
+
+def test_middleware_rejects_with_503_and_retry_after():
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def scenario():
+        middleware = AdmissionControlMiddleware(endpoint)
+        limiter = middleware.limiters["auth"]
+        limiter.queue_timeout = 0
+        limiter.in_flight = int(limiter.limit)
+
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        await middleware({"type": "http", "method": "POST", "path": "/api/login"}, None, send)
+        return messages[0]
+
+    start = asyncio.run(scenario())
+    assert start["status"] == 503
+    assert (b"retry-after", b"1") in start["headers"]
+
+
+def _admission_middleware(app) -> AdmissionControlMiddleware:
+    layer = app.middleware_stack
+    while not isinstance(layer, AdmissionControlMiddleware):
+        layer = layer.app
+    return layer
+
+
+def test_shed_requests_carry_cors_headers(client, monkeypatch):
+    limiter = _admission_middleware(client.app).limiters["read"]
+    monkeypatch.setattr(limiter, "queue_timeout", 0)
+    monkeypatch.setattr(limiter, "in_flight", int(limiter.limit))
+
+    response = client.get("/api/posts", headers={"Origin": "https://example.com"})
+
+    assert response.status_code == 503
+    assert "access-control-allow-origin" in response.headers
+
+
+def test_metrics_need_the_debug_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "DEBUG_TOKEN", None)
+    assert client.get("/metrics").status_code == 403
+
+    monkeypatch.setattr(settings, "DEBUG_TOKEN", "s3cret")
+    assert client.get("/metrics").status_code == 403
+    response = client.get("/metrics", headers={"X-Debug-Token": "s3cret"})
+    assert response.status_code == 200
+    assert "counters" in response.json()
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.core.sharding import shard_router
+from app.jobs.archive_posts import archive_posts
+from app.models.post import Post
+from app.models.user import User
+from helpers import create_post
+
+
+def _backdate(run, post_ids, shard=0):
+    async def backdate():
+        async with shard_router.engines[shard].begin() as connection:
+            await connection.execute(
+                update(Post).where(Post.id.in_(post_ids)).values(created_at=datetime.utcnow() - timedelta(days=30))
+            )
+
+    run(backdate)
+
+
+def _archive(run):
+    return run(archive_posts, 7, 100, 0, True)
+
+
+def test_archived_posts_leave_the_list_and_its_etag(client, run, user):
+    old = create_post(client, user["headers"], "old news")
+    recent = create_post(client, user["headers"], "fresh news")
+    _backdate(run, [old])
+    etag = client.get("/api/posts", headers=user["headers"]).headers["ETag"]
+
+    assert _archive(run) == 1
+
+    response = client.get("/api/posts", headers={**user["headers"], "If-None-Match": etag})
+    assert response.status_code == 200
+    assert [post["id"] for post in response.json()] == [recent]
+
+    # Still reachable by paging past the recent posts
+    page = client.get("/api/posts", params={"limit": 10}, headers=user["headers"]).json()
+    assert [post["id"] for post in page] == [recent, old]
+
+
+def test_search_pages_stay_full_after_archiving(client, run, user):
+    old = [create_post(client, user["headers"], "weekly report") for _ in range(3)]
+    recent = [create_post(client, user["headers"], "weekly report") for _ in range(3)]
+    _backdate(run, old)
+    client.get("/api/posts/search", params={"q": "report"}, headers=user["headers"])
+
+    _archive(run)
+
+    page = client.get("/api/posts/search", params={"q": "report", "limit": 3}, headers=user["headers"]).json()
+    assert sorted(item["id"] for item in page["items"]) == sorted(recent)
+
+
+def test_archiving_on_another_shard_bumps_the_version(client, run, user, second_shard):
+    async def pin():
+        async with shard_router.engines[0].begin() as connection:
+            await connection.execute(update(User).where(User.id == user["user_id"]).values(post_shard=second_shard))
+
+    run(pin)
+    old = create_post(client, user["headers"], "old")
+    recent = create_post(client, user["headers"], "recent")
+    _backdate(run, [old], second_shard)
+    etag = client.get("/api/posts", headers=user["headers"]).headers["ETag"]
+
+    assert _archive(run) == 1
+
+    response = client.get("/api/posts", headers={**user["headers"], "If-None-Match": etag})
+    assert [post["id"] for post in response.json()] == [recent]
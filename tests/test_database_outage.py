@@ -0,0 +1,175 @@
+import time
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+from app.core.cache import cache, clear_cache, get_cache_entry, set_cache, user_cache
+from app.core.circuit_breaker import breakers
+from app.core.config import settings
+from app.core.database import engine
+from app.core.deadlines import DeadlineExceeded, DeadlineSession, request_deadline
+from app.core.metrics import metrics
+from app.models.post import Post
+from app.models.user import User
+from app.services.post_service import PostService
+from helpers import create_post, new_email, signup
+
+
+@contextmanager
+def database_down():
+    """Make every statement on the engine fail as if the database were unreachable."""
+    def fail(connection, cursor, statement, parameters, context, executemany):
+        raise OperationalError(statement, parameters, ConnectionRefusedError("database is down"))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", fail)
+    try:
+        yield
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", fail)
+
+
+def test_cached_posts_are_served_while_the_database_is_down(client, user):
+    post_id = create_post(client, user["headers"])
+    client.get("/api/posts", headers=user["headers"])
+    # The posts changed since they were cached
+    key = f"user_posts_{user['user_id']}"
+    (version, posts), _ = get_cache_entry(key)
+    set_cache(key, (version - 1, posts))
+
+    with database_down():
+        response = client.get("/api/posts", headers=user["headers"])
+
+    assert response.status_code == 200
+    assert [post["id"] for post in response.json()] == [post_id]
+    assert "ETag" not in response.headers
+
+
+def test_circuit_open_without_cached_user_is_503(client, user, monkeypatch):
+    monkeypatch.setattr(settings, "CIRCUIT_BREAKER_FAILURE_THRESHOLD", 1)
+    clear_cache()
+
+    with database_down():
+        with pytest.raises(OperationalError):
+            client.get("/api/posts", headers=user["headers"])
+        response = client.get("/api/posts", headers=user["headers"])
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_user_is_loaded_again_once_the_database_is_back(client, user):
+    create_post(client, user["headers"])
+    client.get("/api/posts", headers=user["headers"])
+    with database_down():
+        assert client.get("/api/posts", headers=user["headers"]).status_code == 200
+
+    second_id = create_post(client, user["headers"])
+
+    response = client.get("/api/posts", headers=user["headers"])
+    assert response.json()[0]["id"] == second_id
+    assert "ETag" in response.headers
+
+
+def test_user_rows_are_cached_apart_and_rewritten_only_when_they_change(client, user, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_MAX_ENTRIES", 1)
+    monkeypatch.setattr(settings, "CACHE_MAX_USER_ENTRIES", 1)
+    key = f"user_{user['user_id']}"
+    client.get("/api/posts", headers=user["headers"])
+    entry = user_cache[key]
+
+    client.get("/api/posts", headers=user["headers"])
+    assert user_cache[key] is entry
+    assert list(cache) == [f"user_posts_{user['user_id']}"]
+
+    create_post(client, user["headers"])
+    client.get("/api/posts", headers=user["headers"])
+    assert user_cache[key][0][1] == entry[0][1] + 1
+    assert f"user_posts_{user['user_id']}" in cache
+
+    other = signup(client)
+    client.get("/api/posts", headers=other["headers"])
+    assert list(user_cache) == [f"user_{other['user_id']}"]
+
+
+def test_cached_posts_are_served_when_loading_them_runs_past_the_deadline(client, user, monkeypatch):
+    post_id = create_post(client, user["headers"])
+    client.get("/api/posts", headers=user["headers"])
+    key = f"user_posts_{user['user_id']}"
+    (version, posts), _ = get_cache_entry(key)
+    set_cache(key, (version - 1, posts))
+
+    async def slow_refresh_cache(*args):
+        raise DeadlineExceeded()
+
+    monkeypatch.setattr(PostService, "refresh_cache", slow_refresh_cache)
+    response = client.get("/api/posts", headers=user["headers"])
+
+    assert response.status_code == 200
+    assert [post["id"] for post in response.json()] == [post_id]
+    assert "ETag" not in response.headers
+    # A slow query doesn't mean the database is down
+    assert not breakers["posts.0"].failures
+
+
+def test_past_deadline_without_cached_posts_is_504(client, user, monkeypatch):
+    monkeypatch.setitem(settings.REQUEST_DEADLINES_MS, "read", 1)
+    monkeypatch.setattr(settings, "DB_DEADLINE_GRACE_MS", 0)
+    clear_cache()
+
+    assert client.get("/api/posts", headers=user["headers"]).status_code == 504
+
+
+def test_cached_user_and_posts_are_served_past_the_deadline(client, user, monkeypatch):
+    post_id = create_post(client, user["headers"])
+    client.get("/api/posts", headers=user["headers"])
+    key = f"user_posts_{user['user_id']}"
+    (version, posts), _ = get_cache_entry(key)
+    set_cache(key, (version - 1, posts))
+    monkeypatch.setitem(settings.REQUEST_DEADLINES_MS, "read", 1)
+    monkeypatch.setattr(settings, "DB_DEADLINE_GRACE_MS", 0)
+
+    def slow_statement(connection, cursor, statement, parameters, context, executemany):
+        time.sleep(0.01)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", slow_statement)
+    try:
+        response = client.get("/api/posts", headers=user["headers"])
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", slow_statement)
+
+    assert response.status_code == 200
+    assert [post["id"] for post in response.json()] == [post_id]
+    assert metrics.snapshot()["counters"]["cache.stale_on_deadline"] == 1
+
+
+def expire_deadline_after_committing(model, monkeypatch):
+    """Make the request deadline pass as soon as a row of the model is committed."""
+    commit = DeadlineSession.commit
+
+    async def commit_then_expire(session):
+        wrote = any(isinstance(row, model) for row in [*session.new, *session.identity_map.values()])
+        await commit(session)
+        if wrote:
+            request_deadline.set(time.monotonic() - 1)
+
+    monkeypatch.setattr(DeadlineSession, "commit", commit_then_expire)
+
+
+def test_post_written_just_before_the_deadline_is_created(client, user, monkeypatch):
+    expire_deadline_after_committing(Post, monkeypatch)
+    response = client.post("/api/posts", json={"text": "just in time"}, headers=user["headers"])
+    monkeypatch.undo()
+
+    assert response.status_code == 201, response.text
+    assert [post["id"] for post in client.get("/api/posts", headers=user["headers"]).json()] == [
+        response.json()["post_id"]
+    ]
+
+
+def test_user_signed_up_just_before_the_deadline_gets_tokens(client, monkeypatch):
+    expire_deadline_after_committing(User, monkeypatch)
+    response = client.post("/api/signup", json={"email": new_email(), "password": "password123"})
+
+    assert response.status_code == 201, response.text
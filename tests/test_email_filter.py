@@ -0,0 +1,64 @@
+import time
+
+from app.core.database import PrimarySessionLocal
+from app.core.email_filter import BloomFilter, registered_emails
+from app.core.security import get_password_hash
+from app.models.user import User
+from app.repositories.user_repository import UserRepository
+from helpers import new_email
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    emails = [f"user{n}@example.com" for n in range(1000)]
+    for email in emails:
+        bloom.add(email)
+    assert all(email in bloom for email in emails)
+    assert sum(f"other{n}@example.com" in bloom for n in range(1000)) < 50
+
+
+def _create_user_elsewhere(run, email):
+    # As another worker would: the user exists, but this worker's filter hasn't seen it
+    async def create():
+        async with PrimarySessionLocal() as session:
+            await UserRepository(session).create(email, "password123")
+
+    run(create)
+
+
+def _login(client, email):
+    return client.post("/api/login", json={"email": email, "password": "password123"})
+
+
+def test_login_finds_users_created_by_other_workers(client, run):
+    email = new_email()
+    _create_user_elsewhere(run, email)
+
+    registered_emails._synced_at = time.monotonic()
+    assert _login(client, email).status_code == 200
+
+
+def test_login_finds_users_committed_out_of_id_order(client, run):
+    hashed_password = get_password_hash("password123")
+
+    async def create_with_id(user_id, email):
+        async with PrimarySessionLocal() as session:
+            session.add(User(id=user_id, email=email, hashed_password=hashed_password))
+            await session.commit()
+
+    run(create_with_id, 1000, new_email())
+    run(registered_emails.sync)
+    assert registered_emails.max_user_id == 1000
+
+    # Its ID was assigned before 1000, but it committed after the filter read 1000
+    late_email = new_email()
+    run(create_with_id, 950, late_email)
+    assert _login(client, late_email).status_code == 200
+
+
+def test_signups_the_filter_missed_are_still_rejected(client, run):
+    email = new_email()
+    _create_user_elsewhere(run, email)
+
+    response = client.post("/api/signup", json={"email": email, "password": "password123"})
+    assert response.status_code == 400
@@ -0,0 +1,182 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from app.core import server
+from app.core.config import settings
+from app.core.database import PrimarySessionLocal
+from app.core.deadlines import DeadlineExceeded
+from app.core.idempotency import (
+    DatabaseIdempotencyStore,
+    IdempotencyStore,
+    IdempotentRequests,
+    InMemoryIdempotencyStore,
+    build_idempotency_store,
+)
+from app.core.search import post_search_index
+from app.models.id_block import IdBlock
+from helpers import signup
+
+
+def test_store_interface_is_abstract():
+    with pytest.raises(TypeError):
+        IdempotencyStore()
+
+
+def test_unknown_store_is_rejected():
+    with pytest.raises(ValueError):
+        build_idempotency_store("filesystem")
+
+
+def test_memory_store_needs_a_single_worker(monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_STORE", "memory")
+    monkeypatch.setattr(settings, "WORKERS", 4)
+    with pytest.raises(ValueError):
+        server.build_gunicorn_options()
+
+
+def _post(client, user, key, text="hello"):
+    return client.post("/api/posts", json={"text": text}, headers={**user["headers"], "Idempotency-Key": key})
+
+
+def test_retries_replay_the_original_response(client, user):
+    first = _post(client, user, "key-1")
+    retry = _post(client, user, "key-1")
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert len(client.get("/api/posts", headers=user["headers"]).json()) == 1
+
+
+def test_reusing_a_key_with_another_body_is_rejected(client, user):
+    _post(client, user, "key-1", "hello")
+    assert _post(client, user, "key-1", "goodbye").status_code == 422
+
+
+def test_keys_are_scoped_per_user(client, user):
+    other = signup(client)
+    assert _post(client, user, "shared").json() != _post(client, other, "shared").json()
+
+
+def test_workers_share_keys_through_the_database(client, run):
+    calls = []
+
+    async def operation(claim):
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return {"post_id": len(calls)}
+
+    async def two_workers():
+        workers = [
+            IdempotentRequests(DatabaseIdempotencyStore(settings.IDEMPOTENCY_KEY_TTL_SECONDS, 60), wait_seconds=5)
+            for _ in range(2)
+        ]
+        return await asyncio.gather(*(
+            worker.execute("create_post:1", "key", b"{}", operation) for worker in workers
+        ))
+
+    results = run(two_workers)
+    assert len(calls) == 1
+    assert sorted(replayed for _, replayed in results) == [False, True]
+    assert results[0][0] == results[1][0] == {"post_id": 1}
+
+
+def test_keys_of_dead_requests_are_taken_over(client, run):
+    async def scenario():
+        crashed = DatabaseIdempotencyStore(settings.IDEMPOTENCY_KEY_TTL_SECONDS, lease_seconds=0)
+        assert await crashed.reserve(b"k" * 16, b"f" * 16) is None
+        # The request never completes; after its lease a retry claims the key
+        return await DatabaseIdempotencyStore(settings.IDEMPOTENCY_KEY_TTL_SECONDS, 60).reserve(b"k" * 16, b"f" * 16)
+
+    assert run(scenario) is None
+
+
+def test_failed_requests_can_be_retried(client, run):
+    requests = IdempotentRequests(DatabaseIdempotencyStore(settings.IDEMPOTENCY_KEY_TTL_SECONDS, 60), wait_seconds=1)
+
+    async def failing(claim):
+        raise RuntimeError("boom")
+
+    async def succeeding(claim):
+        return {"post_id": 7}
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await requests.execute("create_post:1", "key", b"{}", failing)
+        return await requests.execute("create_post:1", "key", b"{}", succeeding)
+
+    assert run(scenario) == ({"post_id": 7}, False)
+
+
+@pytest.mark.parametrize("store", ["database", "memory"])
+def test_failure_after_the_commit_keeps_the_key(client, run, store):
+    requests = IdempotentRequests(build_idempotency_store(store), wait_seconds=1)
+
+    async def write(claim, fail_before_commit=False):
+        async with PrimarySessionLocal() as session:
+            await session.execute(insert(IdBlock).values(name=f"row {claim.key.hex()}", next_id=1))
+            await claim.record(session, {"post_id": 7})
+            if fail_before_commit:
+                raise DeadlineExceeded()
+            await session.commit()
+        raise DeadlineExceeded()
+
+    async def succeeding(claim):
+        return {"post_id": 8}
+
+    async def scenario():
+        with pytest.raises(DeadlineExceeded):
+            await requests.execute("create_post:1", "committed", b"{}", write)
+        with pytest.raises(DeadlineExceeded):
+            await requests.execute("create_post:1", "rolled back", b"{}", lambda claim: write(claim, True))
+        results = [
+            await requests.execute("create_post:1", key, b"{}", succeeding) for key in ("committed", "rolled back")
+        ]
+        async with PrimarySessionLocal() as session:
+            return results, await session.scalar(select(func.count()).select_from(IdBlock))
+
+    # The committed write is replayed; the one that never committed runs again
+    assert run(scenario) == ([({"post_id": 7}, True), ({"post_id": 8}, False)], 1)
+
+
+def test_write_committed_outside_the_recording_transaction_is_replayed(client, run):
+    requests = IdempotentRequests(DatabaseIdempotencyStore(settings.IDEMPOTENCY_KEY_TTL_SECONDS, 60), wait_seconds=1)
+
+    async def written_on_another_shard(claim):
+        claim.wrote({"post_id": 7})
+        raise RuntimeError("the primary's commit failed")
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await requests.execute("create_post:1", "key", b"{}", written_on_another_shard)
+        return await requests.execute("create_post:1", "key", b"{}", written_on_another_shard)
+
+    assert run(scenario) == ({"post_id": 7}, True)
+
+
+def test_post_failing_after_its_commit_is_not_created_again(client, user, monkeypatch):
+    def fail(*args):
+        raise DeadlineExceeded()
+
+    monkeypatch.setattr(post_search_index, "advance", fail)
+    assert _post(client, user, "key-1").status_code == 504
+    monkeypatch.undo()
+
+    retry = _post(client, user, "key-1")
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert [post["id"] for post in client.get("/api/posts", headers=user["headers"]).json()] == [
+        retry.json()["post_id"]
+    ]
+
+
+def test_memory_store_forgets_the_oldest_keys():
+    async def scenario():
+        store = InMemoryIdempotencyStore(ttl_seconds=60, max_keys=2)
+        for key in (b"a", b"b", b"c"):
+            await store.reserve(key, b"f")
+        return len(store), await store.reserve(b"a", b"f")
+
+    assert asyncio.run(scenario()) == (2, None)
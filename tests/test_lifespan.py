@@ -0,0 +1,53 @@
+from app.core.cache import cache
+from app.core.database import build_engine, check_database, warm_up_pool
+from app.core.lifespan import warm_post_cache
+from app.main import create_app
+from conftest import DATA_DIRECTORY
+from helpers import create_post
+
+
+def test_ready_after_warm_up(client):
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready"}
+
+
+def test_not_ready_until_warmed_up(client):
+    client.app.state.ready = False
+    try:
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json() == {"status": "warming up"}
+    finally:
+        client.app.state.ready = True
+
+
+def test_create_app_builds_independent_apps():
+    first, second = create_app(), create_app()
+    assert first is not second
+    assert first.state.ready is False
+    assert {route.path for route in first.routes} == {route.path for route in second.routes}
+
+
+def test_warm_up_opens_distinct_connections(run):
+    target = build_engine(f"sqlite+aiosqlite:///{DATA_DIRECTORY}/warm-up.db")
+
+    async def warm_up():
+        try:
+            await warm_up_pool(target, 3)
+            await check_database(target)
+            return target.pool.checkedin()
+        finally:
+            await target.dispose()
+
+    assert run(warm_up) == 3
+
+
+def test_warm_post_cache_loads_active_users(client, run, user):
+    post_id = create_post(client, user["headers"])
+
+    run(warm_post_cache, 10)
+
+    user_id = int(client.get("/api/posts", headers=user["headers"]).json()[0]["user_id"])
+    version, posts = cache[f"user_posts_{user_id}"][0]
+    assert [post.id for post in posts] == [post_id]
@@ -0,0 +1,66 @@
+import json
+import logging
+import queue
+
+import pytest
+
+from app.core.logs import DroppingQueueHandler, JsonFormatter, SamplingFilter, access_logger, request_id
+
+
+def _record(name="app", level=logging.INFO, **extra):
+    record = logging.makeLogRecord({"name": name, "levelno": level, "levelname": logging.getLevelName(level), "msg": "hi"})
+    record.__dict__.update(extra)
+    return record
+
+
+def test_sampling_applies_to_child_loggers_but_keeps_warnings():
+    sampling = SamplingFilter({"sqlalchemy.engine": 0.0})
+    assert not sampling.filter(_record("sqlalchemy.engine.Engine"))
+    assert sampling.filter(_record("sqlalchemy.engine.Engine", logging.WARNING))
+    assert sampling.filter(_record("app.services"))
+
+
+def test_full_queue_drops_and_counts_records():
+    handler = DroppingQueueHandler(queue.Queue(1))
+    handler.enqueue(_record())
+    handler.enqueue(_record())
+    assert handler.dropped == 1
+
+
+def test_json_records_include_extra_fields():
+    entry = json.loads(JsonFormatter().format(_record(request_id="abc", status=201)))
+    assert entry["message"] == "hi"
+    assert entry["request_id"] == "abc"
+    assert entry["status"] == 201
+
+
+@pytest.fixture
+def access_records():
+    records = []
+
+    class Collect(logging.Handler):
+        def emit(self, record):
+            records.append(record)
+
+    handler = Collect()
+    access_logger.addHandler(handler)
+    access_logger.setLevel(logging.INFO)
+    yield records
+    access_logger.setLevel(logging.NOTSET)
+    access_logger.removeHandler(handler)
+
+
+def test_requests_get_an_id_and_one_access_record(client, access_records):
+    response = client.get("/ready")
+
+    generated = response.headers["X-Request-ID"]
+    assert len(generated) == 16
+    [record] = [record for record in access_records if record.path == "/ready"]
+    assert (record.status, record.route, record.method) == (200, "/ready", "GET")
+
+    response = client.get("/ready", headers={"X-Request-ID": "from-proxy.1"})
+    assert response.headers["X-Request-ID"] == "from-proxy.1"
+
+    response = client.get("/ready", headers={"X-Request-ID": "bad id\n"})
+    assert response.headers["X-Request-ID"] != "bad id\n"
+    assert request_id.get() is None
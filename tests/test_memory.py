@@ -0,0 +1,89 @@
+import asyncio
+import tracemalloc
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.memory import MemoryProfilerMiddleware, cache_footprint, deep_sizeof, memory_profiler
+from app.core.metrics import metrics
+from app.main import debug_router
+
+
+def test_deep_sizeof_follows_containers():
+    assert deep_sizeof(["x" * 1000]) > 1000
+    footprint = cache_footprint({"user_posts_1": ([1, 2], 0, 0), "user_posts_2": ([3], 0, 0), "post_7": (None, 0, 0)})
+    assert footprint["entries"] == 3
+    assert footprint["by_prefix"]["user_posts_"]["entries"] == 2
+
+
+@pytest.fixture(autouse=True)
+def stop_tracing(monkeypatch):
+    monkeypatch.setattr(memory_profiler, "middleware", None)
+    yield
+    tracemalloc.stop()
+
+
+def _profiled(monkeypatch, endpoint):
+    monkeypatch.setattr(metrics, "summaries", {})
+    return MemoryProfilerMiddleware(endpoint, sample_rate=0)
+
+
+async def _request(middleware, path):
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await middleware({"type": "http", "method": "GET", "path": path}, receive, send)
+
+
+async def _endpoint(scope, receive, send):
+    held = bytearray(100000)
+    await asyncio.sleep(0.01 if scope["path"] == "/slow" else 0)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": bytes(len(held) // 100000)})
+
+
+def test_requests_record_the_memory_they_allocate(monkeypatch):
+    middleware = _profiled(monkeypatch, _endpoint)
+    asyncio.run(_request(middleware, "/fast"))
+
+    assert metrics.summaries["memory.request_allocated_bytes.GET unmatched"].max >= 100000
+    assert metrics.summaries["memory.request_peak_bytes.GET unmatched"].max >= 100000
+
+
+def test_peaks_are_only_recorded_for_requests_that_ran_alone(monkeypatch):
+    middleware = _profiled(monkeypatch, _endpoint)
+
+    async def overlapping():
+        await asyncio.gather(_request(middleware, "/slow"), _request(middleware, "/fast"))
+
+    asyncio.run(overlapping())
+
+    assert metrics.summaries["memory.request_allocated_bytes.GET unmatched"].count == 2
+    assert "memory.request_peak_bytes.GET unmatched" not in metrics.summaries
+
+
+def _debug_client() -> TestClient:
+    app = FastAPI()
+    app.include_router(debug_router)
+    return TestClient(app)
+
+
+def test_debug_endpoint_is_closed_without_a_token(monkeypatch):
+    monkeypatch.setattr(settings, "DEBUG_TOKEN", None)
+    assert _debug_client().get("/debug/memory", headers={"X-Debug-Token": ""}).status_code == 403
+
+
+def test_debug_endpoint_requires_the_token(monkeypatch):
+    monkeypatch.setattr(settings, "DEBUG_TOKEN", "s3cret")
+    client = _debug_client()
+    assert client.get("/debug/memory").status_code == 403
+    assert client.get("/debug/memory", headers={"X-Debug-Token": "guess"}).status_code == 403
+
+    response = client.get("/debug/memory", headers={"X-Debug-Token": "s3cret"})
+    assert response.status_code == 200
+    assert "cache" in response.json()
@@ -0,0 +1,77 @@
+import bcrypt
+from sqlalchemy import select, update
+
+from app.core import tasks
+from app.core.config import settings
+from app.core.database import PrimarySessionLocal, engine
+from app.core.security import get_password_hash, verify_password_needs_rehash
+from app.jobs.calibrate_bcrypt import calibrate
+from app.services import auth_service
+from app.models.user import User
+
+
+def _hash_with_cost(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+
+
+def _cost(hashed: str) -> int:
+    return int(hashed.split("$")[2])
+
+
+def test_new_hashes_use_the_configured_cost():
+    assert _cost(get_password_hash("password123")) == settings.BCRYPT_ROUNDS
+
+
+def test_hashes_with_another_cost_need_a_rehash():
+    assert verify_password_needs_rehash("password123", _hash_with_cost("password123", settings.BCRYPT_ROUNDS + 1)) == (True, True)
+    assert verify_password_needs_rehash("password123", get_password_hash("password123")) == (True, False)
+    assert verify_password_needs_rehash("wrong", get_password_hash("password123")) == (False, False)
+
+
+def test_rehash_runs_after_the_login_response(client, run, user, monkeypatch):
+    async def store_old_hash():
+        async with engine.begin() as connection:
+            await connection.execute(
+                update(User).values(hashed_password=_hash_with_cost("password123", settings.BCRYPT_ROUNDS + 1))
+            )
+
+    run(store_old_hash)
+    hashed = []
+    spawned = []
+    monkeypatch.setattr(auth_service, "get_password_hash", lambda password: hashed.append(password) or get_password_hash(password))
+    monkeypatch.setattr(auth_service.tasks, "spawn", lambda coroutine, name=None: spawned.append(coroutine))
+
+    response = client.post("/api/login", json={"email": user["email"], "password": "password123"})
+
+    assert response.status_code == 200
+    assert hashed == []
+
+    async def run_rehash():
+        await spawned[0]
+
+    run(run_rehash)
+    assert hashed == ["password123"]
+
+
+def test_login_rehashes_in_the_background(client, run, user):
+    async def store_old_hash():
+        async with engine.begin() as connection:
+            await connection.execute(
+                update(User).values(hashed_password=_hash_with_cost("password123", settings.BCRYPT_ROUNDS + 1))
+            )
+
+    async def stored_hash():
+        await tasks.drain(5)
+        async with PrimarySessionLocal() as session:
+            return (await session.execute(select(User.hashed_password))).scalar_one()
+
+    run(store_old_hash)
+    response = client.post("/api/login", json={"email": user["email"], "password": "password123"})
+
+    assert response.status_code == 200
+    assert _cost(run(stored_hash)) == settings.BCRYPT_ROUNDS
+
+
+def test_calibration_stops_at_the_budget():
+    recommended, timings = calibrate(target_ms=0.0, samples=1)
+    assert recommended == min(timings)
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.core.database import engine
+from app.jobs.compact_post_changes import compact_post_changes
+from app.models.post_change import PostChange
+from helpers import create_post
+
+
+def changes_token(client, user) -> str:
+    response = client.get("/api/posts", headers=user["headers"])
+    assert response.status_code == 200
+    return response.headers["X-Changes-Token"]
+
+
+def changes(client, user, since: str, **params):
+    return client.get("/api/posts/changes", params={"since": since, **params}, headers=user["headers"])
+
+
+def test_feed_returns_creates_and_deletes_since_the_token(client, user):
+    kept = create_post(client, user["headers"], "kept")
+    removed = create_post(client, user["headers"], "removed")
+    token = changes_token(client, user)
+
+    added = create_post(client, user["headers"], "added")
+    client.request("DELETE", "/api/posts", json={"post_id": removed}, headers=user["headers"])
+
+    body = changes(client, user, token).json()
+    assert [post["id"] for post in body["created"]] == [added]
+    assert body["deleted"] == [removed]
+    assert body["has_more"] is False
+    assert kept not in body["deleted"]
+
+    # Nothing changed since the new token
+    body = changes(client, user, body["next_token"]).json()
+    assert (body["created"], body["deleted"]) == ([], [])
+
+
+def test_post_created_and_deleted_since_the_token_is_only_deleted(client, user):
+    token = changes_token(client, user)
+    post_id = create_post(client, user["headers"])
+    client.request("DELETE", "/api/posts", json={"post_id": post_id}, headers=user["headers"])
+
+    body = changes(client, user, token).json()
+    assert (body["created"], body["deleted"]) == ([], [post_id])
+
+
+def test_feed_pages_with_next_token(client, user):
+    token = changes_token(client, user)
+    post_ids = [create_post(client, user["headers"], f"post {i}") for i in range(3)]
+
+    first = changes(client, user, token, limit=2).json()
+    assert first["has_more"] is True
+    assert [post["id"] for post in first["created"]] == post_ids[1::-1]
+
+    second = changes(client, user, first["next_token"], limit=2).json()
+    assert second["has_more"] is False
+    assert [post["id"] for post in second["created"]] == [post_ids[2]]
+
+
+def test_invalid_token_is_400(client, user):
+    assert changes(client, user, "not a token").status_code == 400
+
+
+def test_token_older_than_the_compacted_changes_is_410(client, run, user):
+    token = changes_token(client, user)
+    create_post(client, user["headers"], "old")
+
+    async def age_changes():
+        async with engine.begin() as connection:
+            await connection.execute(update(PostChange).values(created_at=datetime.utcnow() - timedelta(days=60)))
+
+    run(age_changes)
+    assert run(compact_post_changes, 30, 100, 0) == 1
+    create_post(client, user["headers"], "new")
+
+    assert changes(client, user, token).status_code == 410
+    # A fresh listing gives a token the feed can answer
+    assert changes(client, user, changes_token(client, user)).status_code == 200
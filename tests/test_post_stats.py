@@ -0,0 +1,41 @@
+from sqlalchemy import update
+
+from app.core.database import engine
+from app.jobs.reconcile_post_stats import reconcile_post_stats
+from app.models.post_stats import UserPostStats
+from helpers import create_post
+
+
+def stats(client, user) -> dict:
+    response = client.get("/api/posts/stats", headers=user["headers"])
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_new_user_has_empty_stats(client, user):
+    assert stats(client, user) == {"post_count": 0, "total_text_bytes": 0, "last_post_at": None}
+
+
+def test_stats_follow_creates_and_deletes(client, user):
+    create_post(client, user["headers"], "héllo")
+    post_id = create_post(client, user["headers"], "abc")
+    current = stats(client, user)
+    assert (current["post_count"], current["total_text_bytes"]) == (2, 9)
+    assert current["last_post_at"] is not None
+
+    client.request("DELETE", "/api/posts", json={"post_id": post_id}, headers=user["headers"])
+    current = stats(client, user)
+    assert (current["post_count"], current["total_text_bytes"]) == (1, 6)
+
+
+def test_reconcile_repairs_drift(client, run, user):
+    create_post(client, user["headers"], "abc")
+
+    async def corrupt():
+        async with engine.begin() as connection:
+            await connection.execute(update(UserPostStats).values(post_count=7, total_text_bytes=99))
+
+    run(corrupt)
+    assert run(reconcile_post_stats, 100, 0) == 1
+    assert stats(client, user)["post_count"] == 1
+    assert run(reconcile_post_stats, 100, 0) == 0
@@ -0,0 +1,76 @@
+from app.core.cache import get_cache, set_cache
+from helpers import create_post, recorded_statements, signup
+
+
+def test_listing_carries_an_etag(client, user):
+    create_post(client, user["headers"])
+
+    response = client.get("/api/posts", headers=user["headers"])
+
+    assert response.status_code == 200
+    assert response.headers["ETag"].startswith('"')
+
+
+def test_matching_etag_gets_304_without_loading_posts(client, user):
+    create_post(client, user["headers"])
+    etag = client.get("/api/posts", headers=user["headers"]).headers["ETag"]
+
+    with recorded_statements() as statements:
+        response = client.get("/api/posts", headers={**user["headers"], "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert not [statement for statement in statements if "FROM posts" in statement]
+
+
+def test_writes_change_the_etag(client, user):
+    post_id = create_post(client, user["headers"])
+    etag = client.get("/api/posts", headers=user["headers"]).headers["ETag"]
+
+    create_post(client, user["headers"], "second")
+    response = client.get("/api/posts", headers={**user["headers"], "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    etag = response.headers["ETag"]
+    client.request("DELETE", "/api/posts", json={"post_id": post_id}, headers=user["headers"])
+    response = client.get("/api/posts", headers={**user["headers"], "If-None-Match": etag})
+    assert response.status_code == 200
+    assert [post["text"] for post in response.json()] == ["second"]
+
+
+def test_etags_are_per_user(client, user):
+    other = signup(client)
+    etag = client.get("/api/posts", headers=user["headers"]).headers["ETag"]
+
+    response = client.get("/api/posts", headers={**other["headers"], "If-None-Match": etag})
+    assert response.status_code == 200
+
+
+
+def test_writes_update_the_cached_list_in_place(client, user):
+    first = create_post(client, user["headers"], "first")
+    client.get("/api/posts", headers=user["headers"])
+
+    second = create_post(client, user["headers"], "second")
+    version, posts = get_cache(f"user_posts_{user['user_id']}")
+    assert [post.id for post in posts] == [second, first]
+
+    with recorded_statements() as statements:
+        listed = client.get("/api/posts", headers=user["headers"]).json()
+    assert [post["id"] for post in listed] == [second, first]
+    assert not [statement for statement in statements if "FROM posts" in statement]
+
+    client.request("DELETE", "/api/posts", json={"post_id": first}, headers=user["headers"])
+    assert [post.id for post in get_cache(f"user_posts_{user['user_id']}")[1]] == [second]
+
+
+def test_cached_list_that_missed_a_change_is_dropped(client, user):
+    create_post(client, user["headers"])
+    client.get("/api/posts", headers=user["headers"])
+    key = f"user_posts_{user['user_id']}"
+    version, posts = get_cache(key)
+    set_cache(key, (version - 1, posts))
+
+    create_post(client, user["headers"])
+    assert get_cache(key) is None
@@ -0,0 +1,82 @@
+import time
+
+from app.core.cache import cache, get_cache_many, post_cache, set_cache_many
+from app.core.config import settings
+from helpers import create_post, recorded_statements, signup
+
+
+def lookup(client, user, post_ids):
+    response = client.get(
+        "/api/posts/by-ids", params={"ids": ",".join(map(str, post_ids))}, headers=user["headers"]
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def found_ids(results):
+    return [result["id"] for result in results if result["found"]]
+
+
+def test_results_follow_the_requested_order(client, user):
+    first = create_post(client, user["headers"], "first")
+    second = create_post(client, user["headers"], "second")
+    other_post = create_post(client, signup(client)["headers"])
+
+    results = lookup(client, user, [second, other_post, first, second])
+
+    assert [result["id"] for result in results] == [second, other_post, first, second]
+    assert [result["found"] for result in results] == [True, False, True, True]
+    assert results[0]["post"]["text"] == "second"
+
+
+def test_cached_posts_survive_other_changes(client, user):
+    post_ids = [create_post(client, user["headers"], f"post {i}") for i in range(3)]
+    lookup(client, user, post_ids)
+
+    create_post(client, user["headers"], "unrelated")
+    with recorded_statements() as statements:
+        assert found_ids(lookup(client, user, post_ids)) == post_ids
+
+    # Only the IDs were checked, the posts were not loaded again
+    post_reads = [statement for statement in statements if "FROM posts" in statement]
+    assert len(post_reads) == 1
+    assert "posts.text" not in post_reads[0]
+
+    # Confirmed at the new posts version, so the next lookup needs no query
+    with recorded_statements() as statements:
+        lookup(client, user, post_ids)
+    assert not [statement for statement in statements if "FROM posts" in statement]
+
+
+def test_deleted_post_is_not_served_from_cache(client, user):
+    kept = create_post(client, user["headers"], "kept")
+    removed = create_post(client, user["headers"], "removed")
+    lookup(client, user, [kept, removed])
+
+    client.request("DELETE", "/api/posts", json={"post_id": removed}, headers=user["headers"])
+
+    assert found_ids(lookup(client, user, [kept, removed])) == [kept]
+    assert f"post_{removed}" not in post_cache
+
+
+def test_posts_cached_one_by_one_dont_evict_lists(client, user, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_MAX_ENTRIES", 2)
+    monkeypatch.setattr(settings, "CACHE_MAX_POST_ENTRIES", 2)
+    post_ids = [create_post(client, user["headers"], f"post {i}") for i in range(4)]
+    client.get("/api/posts", headers=user["headers"])
+
+    lookup(client, user, post_ids)
+
+    assert f"user_posts_{user['user_id']}" in cache
+    assert list(post_cache) == [f"post_{post_id}" for post_id in post_ids[2:]]
+
+
+def test_get_cache_many_drops_entries_too_old_to_serve():
+    store = {}
+    set_cache_many({"fresh": 1, "stale": 2, "expired": 3}, store=store)
+    now = time.time()
+    store["stale"] = (2, now - 1, now + 60)
+    store["expired"] = (3, now - 120, now - 60)
+
+    assert get_cache_many(["fresh", "stale", "expired", "missing"], store) == {"fresh": 1}
+    assert set(store) == {"fresh", "stale"}
@@ -0,0 +1,72 @@
+import ipaddress
+
+import pytest
+from starlette.requests import Request
+
+from app.api.dependencies import rate_limit
+from app.core.config import settings
+from app.core.rate_limit import InMemoryRateLimitBackend, RateLimitBackend
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        RateLimitBackend()
+
+
+def test_bucket_allows_a_burst_then_throttles():
+    backend = InMemoryRateLimitBackend(max_buckets=10)
+    bucket = [("ip:a", 1.0, 3)]
+    assert [backend.take(bucket) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert backend.take(bucket) == pytest.approx(1.0, abs=0.01)
+
+
+def test_rejected_attempt_takes_from_no_bucket():
+    backend = InMemoryRateLimitBackend(max_buckets=10)
+    assert backend.take([("ip:a", 1.0, 5), ("email:b", 1.0, 1)]) == 0.0
+    assert backend.take([("ip:a", 1.0, 5), ("email:b", 1.0, 1)]) > 0
+
+    assert backend._buckets["ip:a"][0] == pytest.approx(4.0, abs=0.01)
+
+
+def test_eviction_keeps_the_bucket_count_bounded():
+    backend = InMemoryRateLimitBackend(max_buckets=2)
+    for key in ("a", "b", "c"):
+        backend.take([(key, 0.001, 1)])
+    assert len(backend) == 2
+
+
+def _request(peer: str, forwarded: str = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "client": (peer, 50000), "headers": headers})
+
+
+def test_forwarded_for_is_ignored_from_untrusted_peers(monkeypatch):
+    monkeypatch.setattr(rate_limit, "trusted_proxies", [])
+    assert rate_limit.client_address(_request("203.0.113.9", "198.51.100.1")) == "203.0.113.9"
+
+
+def test_forwarded_for_is_read_from_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(rate_limit, "trusted_proxies", [ipaddress.ip_network("10.0.0.0/8")])
+    # The leftmost entry is whatever the client sent; the proxies appended the rest
+    request = _request("10.0.0.2", "6.6.6.6, 198.51.100.1, 10.0.0.1")
+    assert rate_limit.client_address(request) == "198.51.100.1"
+    assert rate_limit.client_address(_request("10.0.0.2")) == "10.0.0.2"
+
+
+def test_throttled_attempts_get_retry_after(client):
+    payload = {"email": "nobody@example.com", "password": "password123"}
+    statuses = [client.post("/api/login", json=payload).status_code for _ in range(settings.AUTH_RATE_LIMIT_PER_EMAIL_BURST)]
+    assert set(statuses) == {401}
+
+    response = client.post("/api/login", json=payload)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_email_rejections_leave_the_ip_budget(client):
+    payload = {"email": "target@example.com", "password": "password123"}
+    for _ in range(settings.AUTH_RATE_LIMIT_PER_IP_BURST * 2):
+        client.post("/api/login", json=payload)
+
+    response = client.post("/api/login", json={"email": "other@example.com", "password": "password123"})
+    assert response.status_code == 401
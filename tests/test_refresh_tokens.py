@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.core.database import engine
+from app.jobs.purge_expired_tokens import purge_expired_tokens
+from app.models.refresh_token import RefreshToken
+
+
+def refresh(client, refresh_token):
+    return client.post("/api/refresh", json={"refresh_token": refresh_token})
+
+
+def expire_refresh_tokens(run):
+    async def expire():
+        async with engine.begin() as connection:
+            await connection.execute(update(RefreshToken).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+
+    run(expire)
+
+
+def test_refresh_rotates_the_token(client, user):
+    response = refresh(client, user["refresh_token"])
+    assert response.status_code == 200
+    tokens = response.json()
+    assert tokens["refresh_token"] != user["refresh_token"]
+
+    posts = client.get("/api/posts", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert posts.status_code == 200
+
+
+def test_reusing_a_refresh_token_revokes_its_family(client, user):
+    rotated = refresh(client, user["refresh_token"]).json()["refresh_token"]
+
+    assert refresh(client, user["refresh_token"]).status_code == 401
+    # The token that was handed out after the reused one is revoked too
+    assert refresh(client, rotated).status_code == 401
+
+
+def test_malformed_and_expired_tokens_are_rejected(client, run, user):
+    assert refresh(client, "garbage").status_code == 401
+
+    expire_refresh_tokens(run)
+    assert refresh(client, user["refresh_token"]).status_code == 401
+
+
+def test_purge_deletes_expired_tokens(client, run, user):
+    expire_refresh_tokens(run)
+    refresh_tokens, revocations, idempotency_keys = run(purge_expired_tokens, 1000, 0)
+    assert refresh_tokens == 1
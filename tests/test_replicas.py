@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.database import engine
+from app.core.replicas import (
+    DatabaseWriteTracker, InMemoryWriteTracker, ReplicaSet, RoutingSession, WriteTracker, current_user_id,
+)
+from app.models.id_block import IdBlock
+
+
+def test_tracker_interface_is_abstract():
+    with pytest.raises(TypeError):
+        WriteTracker()
+
+
+def test_writers_stay_on_the_primary_for_the_window():
+    tracker = InMemoryWriteTracker(window_seconds=60, max_users=10)
+    tracker.record_write("1")
+    assert asyncio.run(tracker.wrote_recently("1"))
+    assert not asyncio.run(tracker.wrote_recently("2"))
+
+    expired = InMemoryWriteTracker(window_seconds=0, max_users=10)
+    expired.record_write("1")
+    assert not asyncio.run(expired.wrote_recently("1"))
+
+
+def test_oldest_writers_are_forgotten_first():
+    tracker = InMemoryWriteTracker(window_seconds=60, max_users=2)
+    for user_id in ("1", "2", "3"):
+        tracker.record_write(user_id)
+    assert [asyncio.run(tracker.wrote_recently(user_id)) for user_id in ("1", "2", "3")] == [False, True, True]
+
+
+def test_writes_are_tracked_in_the_database_for_every_worker(run, user):
+    tracker = DatabaseWriteTracker(engine, window_seconds=60)
+    sessions = async_sessionmaker(
+        engine, class_=AsyncSession, sync_session_class=RoutingSession, expire_on_commit=False,
+        replicas=ReplicaSet([]), write_tracker=tracker,
+    )
+    user_id = str(user["user_id"])
+
+    async def write_as_user():
+        token = current_user_id.set(user_id)
+        try:
+            async with sessions() as session:
+                await session.execute(insert(IdBlock).values(name="written", next_id=1))
+                await session.commit()
+        finally:
+            current_user_id.reset(token)
+
+    assert not run(tracker.wrote_recently, user_id)
+    run(write_as_user)
+    # A tracker in another worker reads the same column
+    assert run(DatabaseWriteTracker(engine, window_seconds=60).wrote_recently, user_id)
+    assert not run(DatabaseWriteTracker(engine, window_seconds=0).wrote_recently, user_id)
+    assert not run(tracker.wrote_recently, "not-a-user-id")
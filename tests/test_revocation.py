@@ -0,0 +1,62 @@
+import time
+
+import pytest
+from jose import jwt
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.revocation import (
+    DatabaseRevocationChannel,
+    RevocationChannel,
+    TokenDenylist,
+    TokenRevocations,
+    build_revocation_channel,
+)
+
+
+def test_channel_interface_is_abstract():
+    with pytest.raises(TypeError):
+        RevocationChannel()
+
+
+def test_unknown_channel_is_rejected():
+    with pytest.raises(ValueError):
+        build_revocation_channel("carrier-pigeon")
+
+
+def test_denylist_forgets_tokens_once_they_expire():
+    denylist = TokenDenylist(bucket_seconds=1)
+    now = int(time.time())
+    denylist.add("live", now + 60)
+    denylist.add("expired", now - 1)
+    assert "live" in denylist and "expired" not in denylist
+
+    denylist.expire(now + 120)
+    assert len(denylist) == 0
+
+
+def test_logout_revokes_the_access_token(client, user):
+    response = client.post("/api/logout", headers=user["headers"])
+    assert response.status_code == 200
+
+    response = client.get("/api/posts", headers=user["headers"])
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token revoked"
+
+
+def test_logout_revokes_the_refresh_token(client, user):
+    client.post("/api/logout", json={"refresh_token": user["refresh_token"]}, headers=user["headers"])
+    assert client.post("/api/refresh", json={"refresh_token": user["refresh_token"]}).status_code == 401
+
+
+def test_revocations_reach_other_workers(client, run, user, monkeypatch):
+    # Keep this worker's denylist gauge
+    monkeypatch.setattr(metrics, "register_gauge", lambda name, callback: None)
+    other_worker = TokenRevocations(DatabaseRevocationChannel(), settings.TOKEN_DENYLIST_BUCKET_SECONDS)
+    jti = jwt.get_unverified_claims(user["access_token"])["jti"]
+
+    client.post("/api/logout", headers=user["headers"])
+    assert not other_worker.is_revoked(jti)
+
+    run(other_worker.sync)
+    assert other_worker.is_revoked(jti)
@@ -0,0 +1,54 @@
+from app.core.search import tokenize
+from helpers import create_post, signup
+
+
+def search(client, headers, query, **params):
+    response = client.get("/api/posts/search", params={"q": query, **params}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_tokenize_lowercases_words():
+    assert tokenize("Hello, World! hello") == ["hello", "world", "hello"]
+
+
+def test_results_are_ranked_by_relevance(client, user):
+    create_post(client, user["headers"], "apples and pears")
+    best = create_post(client, user["headers"], "apples apples apples")
+    create_post(client, user["headers"], "nothing to see")
+
+    items = search(client, user["headers"], "apples")["items"]
+
+    assert [item["id"] for item in items][0] == best
+    assert len(items) == 2
+
+
+def test_pages_follow_the_cursor(client, user):
+    created = {create_post(client, user["headers"], f"report number {n}") for n in range(5)}
+
+    first = search(client, user["headers"], "report", limit=3)
+    second = search(client, user["headers"], "report", limit=3, cursor=first["next_cursor"])
+
+    found = [item["id"] for item in first["items"] + second["items"]]
+    assert sorted(found) == sorted(created)
+    assert second["next_cursor"] is None
+
+
+def test_index_follows_writes(client, user):
+    search(client, user["headers"], "banana")
+    post_id = create_post(client, user["headers"], "banana bread")
+    assert [item["id"] for item in search(client, user["headers"], "banana")["items"]] == [post_id]
+
+    client.request("DELETE", "/api/posts", json={"post_id": post_id}, headers=user["headers"])
+    assert search(client, user["headers"], "banana")["items"] == []
+
+
+def test_search_only_sees_own_posts(client, user):
+    other = signup(client)
+    create_post(client, other["headers"], "secret plans")
+    assert search(client, user["headers"], "secret")["items"] == []
+
+
+def test_invalid_cursor_is_rejected(client, user):
+    response = client.get("/api/posts/search", params={"q": "x", "cursor": "garbage"}, headers=user["headers"])
+    assert response.status_code == 400
@@ -0,0 +1,49 @@
+from sqlalchemy import insert, select, update
+
+from app.core.sharding import shard_router
+from app.models.post import Post
+from app.models.post_change import PostChange
+from app.models.user import User
+from helpers import create_post
+
+
+def _pin(run, user_id, shard):
+    async def pin():
+        async with shard_router.engines[0].begin() as connection:
+            await connection.execute(update(User).where(User.id == user_id).values(post_shard=shard))
+
+    run(pin)
+
+
+def test_posts_are_stored_on_the_users_shard(client, run, user, second_shard):
+    _pin(run, user["user_id"], second_shard)
+    post_id = create_post(client, user["headers"], "on the second shard")
+
+    async def shard_post_ids():
+        async with shard_router.engines[second_shard].connect() as connection:
+            return (await connection.execute(select(Post.id))).scalars().all()
+
+    assert run(shard_post_ids) == [post_id]
+    assert [post["id"] for post in client.get("/api/posts", headers=user["headers"]).json()] == [post_id]
+
+
+def test_writes_skip_versions_left_on_the_shard_by_a_failed_commit(client, run, user, second_shard):
+    _pin(run, user["user_id"], second_shard)
+    create_post(client, user["headers"])
+    etag = client.get("/api/posts", headers=user["headers"]).headers["ETag"]
+    version = int(etag.strip('"').split(".")[1])
+
+    # The shard committed the next change, then the primary's version bump was rolled back
+    async def orphan_change():
+        async with shard_router.engines[second_shard].begin() as connection:
+            await connection.execute(
+                insert(PostChange).values(user_id=user["user_id"], version=version + 1, post_id=999999, deleted=False)
+            )
+
+    run(orphan_change)
+
+    create_post(client, user["headers"], "still writable")
+    response = client.get("/api/posts", headers={**user["headers"], "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == f'"{user["user_id"]}.{version + 2}"'
+    assert response.json()[0]["text"] == "still writable"
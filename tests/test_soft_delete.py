@@ -0,0 +1,67 @@
+from sqlalchemy import func, select
+
+from app.core.database import engine
+from app.core.metrics import metrics
+from app.core.purge import post_purger
+from app.models.post import Post
+from helpers import create_post
+
+
+def delete_post(client, user, post_id: int):
+    response = client.request("DELETE", "/api/posts", json={"post_id": post_id}, headers=user["headers"])
+    assert response.status_code == 200, response.text
+
+
+def count_rows(run, *conditions) -> int:
+    async def count():
+        async with engine.connect() as connection:
+            return await connection.scalar(select(func.count()).select_from(Post).where(*conditions))
+
+    return run(count)
+
+
+def test_deleted_posts_are_hidden_until_purged(client, run, user):
+    kept = create_post(client, user["headers"], "kept")
+    removed = create_post(client, user["headers"], "removed")
+
+    delete_post(client, user, removed)
+
+    assert [post["id"] for post in client.get("/api/posts", headers=user["headers"]).json()] == [kept]
+    lookup = client.get("/api/posts/by-ids", params={"ids": str(removed)}, headers=user["headers"]).json()
+    assert lookup[0]["found"] is False
+    page = client.get("/api/posts", params={"limit": 10}, headers=user["headers"]).json()
+    assert [post["id"] for post in page] == [kept]
+    # Only a tombstone was written
+    assert count_rows(run, Post.id == removed, Post.deleted_at.is_not(None)) == 1
+
+
+def test_deleting_twice_is_404(client, user):
+    post_id = create_post(client, user["headers"])
+    delete_post(client, user, post_id)
+
+    response = client.request("DELETE", "/api/posts", json={"post_id": post_id}, headers=user["headers"])
+    assert response.status_code == 404
+
+
+def test_purger_removes_tombstones_in_batches(client, run, user, monkeypatch):
+    monkeypatch.setattr(post_purger, "batch_size", 2)
+    monkeypatch.setattr(post_purger, "backlog", {})
+    post_ids = [create_post(client, user["headers"], f"post {i}") for i in range(3)]
+    for post_id in post_ids:
+        delete_post(client, user, post_id)
+
+    assert run(post_purger.purge_batch, 0) == 2
+    assert run(post_purger.purge_batch, 0) == 1
+    assert post_purger.backlog[0] == 0
+    assert count_rows(run) == 0
+    assert metrics.snapshot()["counters"]["posts.purged"] == 3
+
+
+def test_purger_waits_while_the_shard_is_busy(client, run, user, monkeypatch):
+    monkeypatch.setattr(post_purger, "max_busy_connections", -1)
+    post_id = create_post(client, user["headers"])
+    delete_post(client, user, post_id)
+
+    assert run(post_purger.purge_batch, 0) is None
+    assert count_rows(run) == 1
+    assert metrics.snapshot()["counters"]["posts.purge_deferred"] == 1
@@ -0,0 +1,109 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.core import server
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.core.deadlines import DeadlineExceeded, request_deadline
+from app.core.sqlite import writer_for
+from app.models.id_block import IdBlock
+
+
+async def _wait_for_writers(writer, count: int):
+    while writer.waiting < count:
+        await asyncio.sleep(0.001)
+
+
+def test_connections_get_the_pragmas(run):
+    async def read_pragmas():
+        async with engine.connect() as connection:
+            return {
+                name: (await connection.exec_driver_sql(f"PRAGMA {name}")).scalar()
+                for name in ("journal_mode", "synchronous", "cache_size", "busy_timeout")
+            }
+
+    assert run(read_pragmas) == {
+        "journal_mode": "wal",
+        "synchronous": 1,  # NORMAL
+        "cache_size": -settings.SQLITE_CACHE_SIZE_KB,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+    }
+
+
+def test_write_transactions_take_turns_in_order(run):
+    writer = writer_for(engine.url)
+    order = []
+
+    async def write(name: str, hold: asyncio.Event = None):
+        async with AsyncSessionLocal() as session:
+            await session.execute(insert(IdBlock).values(name=name, next_id=1))
+            order.append(name)
+            if hold is not None:
+                await hold.wait()
+            await session.commit()
+
+    async def scenario():
+        hold = asyncio.Event()
+        first = asyncio.create_task(write("first", hold))
+        while not order:
+            await asyncio.sleep(0.001)
+        second = asyncio.create_task(write("second"))
+        await _wait_for_writers(writer, 1)
+        third = asyncio.create_task(write("third"))
+        await _wait_for_writers(writer, 2)
+        # Writers queue behind the open write transaction
+        assert order == ["first"]
+        hold.set()
+        await asyncio.gather(first, second, third)
+
+    run(scenario)
+    assert order == ["first", "second", "third"]
+    assert writer.waiting == 0
+
+
+def test_reads_dont_wait_for_the_writer(run):
+    async def scenario():
+        async with AsyncSessionLocal() as writing:
+            await writing.execute(insert(IdBlock).values(name="held", next_id=1))
+            async with AsyncSessionLocal() as reading:
+                names = (await reading.execute(select(IdBlock.name))).scalars().all()
+            await writing.commit()
+        return names
+
+    # The uncommitted row is not visible, and the read didn't block
+    assert run(scenario) == []
+
+
+def test_waiting_for_the_writer_is_bounded_by_the_deadline(run):
+    writer = writer_for(engine.url)
+
+    async def scenario():
+        async with AsyncSessionLocal() as holding:
+            await holding.execute(insert(IdBlock).values(name="held", next_id=1))
+            token = request_deadline.set(time.monotonic() + 0.05)
+            try:
+                async with AsyncSessionLocal() as waiting:
+                    with pytest.raises(DeadlineExceeded):
+                        await waiting.execute(insert(IdBlock).values(name="late", next_id=1))
+            finally:
+                request_deadline.reset(token)
+            assert writer.waiting == 0
+            await holding.commit()
+
+        # The turn was not lost: the next writer gets it
+        async with AsyncSessionLocal() as session:
+            await session.execute(insert(IdBlock).values(name="next", next_id=1))
+            await session.commit()
+            return (await session.execute(select(IdBlock.name).order_by(IdBlock.name))).scalars().all()
+
+    assert run(scenario) == ["held", "next"]
+
+
+def test_sqlite_runs_a_single_worker_by_default(monkeypatch):
+    monkeypatch.setattr(settings, "WORKERS", 0)
+    monkeypatch.setattr(settings, "DATABASE_URL", "sqlite+aiosqlite:///./app.db")
+    monkeypatch.setattr(server.multiprocessing, "cpu_count", lambda: 6)
+    assert server.default_worker_count() == 1
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.api.dependencies.request_validators import read_body_into_buffer
+from app.core.config import settings
+
+
+def _post_text(client, user, body: bytes, content_type="text/plain; charset=utf-8", **headers):
+    return client.post(
+        "/api/posts/text",
+        content=body,
+        headers={**user["headers"], "Content-Type": content_type, **headers},
+    )
+
+
+def test_large_text_post_is_stored(client, user):
+    text = "ü" * 200000
+    response = _post_text(client, user, text.encode())
+    assert response.status_code == 201
+
+    posts = client.get("/api/posts", headers=user["headers"]).json()
+    assert [post["id"] for post in posts] == [response.json()["post_id"]]
+    assert posts[0]["text"] == text
+    assert client.get("/api/posts/stats", headers=user["headers"]).json()["total_text_bytes"] == len(text.encode())
+
+
+def test_other_media_types_are_rejected(client, user):
+    assert _post_text(client, user, b'{"text": "hi"}', "application/json").status_code == 415
+
+
+def test_invalid_text_is_rejected(client, user):
+    assert _post_text(client, user, b"\xff\xfe").status_code == 422
+    assert _post_text(client, user, b"   ").status_code == 422
+
+
+def test_bodies_over_the_limit_are_rejected(client, user):
+    assert _post_text(client, user, b"x" * (settings.MAX_REQUEST_SIZE_BYTES + 1)).status_code == 413
+
+
+def test_text_posts_support_idempotency_keys(client, user):
+    first = _post_text(client, user, b"once", **{"Idempotency-Key": "text-1"})
+    retry = _post_text(client, user, b"once", **{"Idempotency-Key": "text-1"})
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+
+
+def _streamed_request(chunks, content_length=None):
+    headers = [(b"content-length", str(content_length).encode())] if content_length is not None else []
+    messages = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks]
+    messages.append({"type": "http.request", "body": b"", "more_body": False})
+
+    async def receive():
+        return messages.pop(0)
+
+    return Request({"type": "http", "method": "POST", "headers": headers}, receive)
+
+
+def test_buffer_is_filled_from_chunks():
+    body = asyncio.run(read_body_into_buffer(_streamed_request([b"abc", b"def"], content_length=6)))
+    assert body == bytearray(b"abcdef")
+
+    # Without a Content-Length the buffer grows as chunks arrive
+    assert asyncio.run(read_body_into_buffer(_streamed_request([b"abc", b"def"]))) == bytearray(b"abcdef")
+
+
+def test_body_longer_than_announced_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(read_body_into_buffer(_streamed_request([b"abc", b"def"], content_length=4)))
+    assert error.value.status_code == 413